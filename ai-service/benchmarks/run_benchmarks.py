@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+MarkSure AI Service - Benchmark Suite
+
+Measures each pipeline stage on synthetic chip images (see synthetic.py):
+decode, ImageProcessor.process_image per preset, every enabled OCR backend,
+SimilarityMatcher / MarkingCatalog matching, and end-to-end /analyze
+(in-process, through the FastAPI app).
+
+Usage (from ai-service/):
+    python benchmarks/run_benchmarks.py                           # run, write benchmarks/results/latest.json
+    python benchmarks/run_benchmarks.py --save-baseline benchmarks/baselines/main.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/baselines/main.json
+    python benchmarks/run_benchmarks.py --compare base.json --results other.json   # compare only
+
+Comparison exits with status 1 when a benchmark's median latency or peak
+memory grew by more than the thresholds. Baselines are only comparable on
+the same machine and configuration.
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import asyncio
+import inspect
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Any
+
+import numpy as np
+
+BENCHMARK_DIR = Path(__file__).parent
+SERVICE_DIR = BENCHMARK_DIR.parent
+sys.path.insert(0, str(SERVICE_DIR))
+sys.path.insert(0, str(BENCHMARK_DIR))
+
+from synthetic import generate_samples, generate_catalog
+
+DEFAULT_RESULTS = BENCHMARK_DIR / "results" / "latest.json"
+SCHEMA_VERSION = 1
+
+def log(message: str):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+async def _call(fn: Callable, item: Any):
+    result = fn(item)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+async def measure(name: str, fn: Callable, items: List[Any], iterations: int, warmup: int = 1) -> Dict[str, Any]:
+    """
+    Time fn over items, then re-run once under tracemalloc for peak memory
+    
+    Latency runs are kept free of tracemalloc overhead. Each iteration walks
+    every item, so one sample is one call.
+    
+    Returns:
+        Latency percentiles (ms), throughput, and peak traced memory (MB)
+    """
+    for item in items[:warmup]:
+        await _call(fn, item)
+    
+    gc.collect()
+    samples = []
+    for _ in range(iterations):
+        for item in items:
+            started = time.perf_counter()
+            await _call(fn, item)
+            samples.append((time.perf_counter() - started) * 1000.0)
+    
+    # numpy reports its buffers to tracemalloc, so image arrays are included
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    for item in items:
+        await _call(fn, item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    samples = np.array(samples)
+    result = {
+        'calls': len(samples),
+        'mean_ms': round(float(samples.mean()), 3),
+        'p50_ms': round(float(np.percentile(samples, 50)), 3),
+        'p95_ms': round(float(np.percentile(samples, 95)), 3),
+        'min_ms': round(float(samples.min()), 3),
+        'throughput_per_s': round(1000.0 / float(samples.mean()), 2) if samples.mean() > 0 else None,
+        'peak_memory_mb': round(peak / (1024 * 1024), 3)
+    }
+    log(f"⏱️  {name:<36} p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+        f"peak {result['peak_memory_mb']:>8.2f}MB")
+    return result
+
+def _selected(name: str, only: Optional[List[str]]) -> bool:
+    return not only or any(name.startswith(prefix) for prefix in only)
+
+async def bench_preprocessing(samples, args, results):
+    from src.preprocessing.image_processor import ImageProcessor
+    from src.preprocessing.pipeline import PRESETS
+    
+    processor = ImageProcessor()
+    target_size = (1024, 768)
+    
+    if _selected('decode', args.only):
+        results['decode'] = await measure(
+            'decode', lambda s: processor.decode_image(s['encoded'], target_size=target_size),
+            samples, args.iterations
+        )
+    
+    images = [processor.decode_image(s['encoded'], target_size=target_size) for s in samples]
+    for preset in PRESETS:
+        name = f"preprocess.{preset}"
+        if _selected(name, args.only):
+            results[name] = await measure(
+                name, lambda image: processor.process_image(image, target_size=target_size, preset=preset),
+                images, args.iterations
+            )
+
+async def bench_ocr(samples, args, results, accuracy):
+    from src.ocr.ocr_engine import OCREngine
+    from src.preprocessing.image_processor import ImageProcessor
+    from src.comparison.similarity_matcher import SimilarityMatcher
+    
+    matcher = SimilarityMatcher()
+    processor = ImageProcessor()
+    processed = []
+    for sample in samples:
+        image = processor.decode_image(sample['encoded'], target_size=(1024, 768))
+        image, _, _ = await processor.process_image(image, target_size=(1024, 768))
+        processed.append((image, sample['text']))
+    
+    for engine in args.engines:
+        name = f"ocr.{engine}"
+        if not _selected(name, args.only):
+            continue
+        
+        ocr_engine = OCREngine(primary_engine=engine, fallback_engine=None)
+        try:
+            await ocr_engine.initialize()
+        except Exception as e:
+            log(f"⚠️ Skipping {name}: {e}")
+            continue
+        
+        try:
+            results[name] = await measure(
+                name, lambda item: ocr_engine.extract_text(item[0], engine=engine, min_confidence=0.1),
+                processed, args.iterations
+            )
+            
+            # Recognition quality on the same images, so a speed-up that
+            # breaks reading shows up next to the latency numbers
+            scores = []
+            for image, truth in processed:
+                extracted = await ocr_engine.extract_text(image, engine=engine, min_confidence=0.1)
+                scores.append(matcher.calculate_similarity(extracted.get('text', ''), truth))
+            accuracy[name] = round(float(np.mean(scores)), 4)
+        finally:
+            ocr_engine.cleanup()
+
+async def bench_matching(samples, args, results):
+    from src.comparison.similarity_matcher import SimilarityMatcher
+    from src.comparison.ngram_index import MarkingCatalog
+    
+    matcher = SimilarityMatcher()
+    catalog_texts = generate_catalog(args.catalog_size, seed=args.seed + 1)
+    references = matcher.prepare_references(catalog_texts)
+    # OCR-like queries: the true part number with one confusable character swapped
+    queries = [s['lines'][0].replace('0', 'O').replace('1', 'I', 1) for s in samples]
+    
+    if _selected('similarity.find_best_matches', args.only):
+        results['similarity.find_best_matches'] = await measure(
+            'similarity.find_best_matches', lambda q: matcher.find_best_matches(q, references, limit=5),
+            queries, args.iterations
+        )
+    
+    if _selected('similarity.matrix', args.only):
+        results['similarity.matrix'] = await measure(
+            'similarity.matrix', lambda qs: matcher.similarity_matrix(qs, references),
+            [queries], args.iterations
+        )
+    
+    if _selected('catalog.search', args.only):
+        catalog = MarkingCatalog(catalog_texts, matcher)
+        results['catalog.search'] = await measure(
+            'catalog.search', lambda q: catalog.search(q, limit=5),
+            queries, args.iterations
+        )
+
+def bench_end_to_end(samples, args, results):
+    if not _selected('e2e.analyze', args.only):
+        return
+    
+    # Measure the pipeline, not the result cache or warm-up
+    os.environ.setdefault("CACHE_ENABLED", "false")
+    os.environ.setdefault("WARMUP_ENABLED", "false")
+    os.environ.setdefault("TRACING_ENABLED", "false")
+    os.environ["OCR_PRIMARY_ENGINE"] = args.engines[0]
+    os.environ["OCR_FALLBACK_ENGINE"] = args.engines[1] if len(args.engines) > 1 else ""
+    
+    try:
+        from fastapi.testclient import TestClient
+        import main
+    except Exception as e:
+        log(f"⚠️ Skipping e2e.analyze: {e}")
+        return
+    
+    try:
+        with TestClient(main.app) as client:
+            def analyze(sample):
+                response = client.post(
+                    "/analyze",
+                    files={"image": ("chip.jpg", sample['encoded'], "image/jpeg")},
+                    data={"inspection_id": "benchmark", "ocr_engine_type": args.engines[0]}
+                )
+                response.raise_for_status()
+            
+            # TestClient drives the app on its own event loop thread
+            results['e2e.analyze'] = asyncio.run(measure('e2e.analyze', analyze, samples, args.iterations))
+    except Exception as e:
+        log(f"⚠️ e2e.analyze failed: {e}")
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SERVICE_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+def environment_info() -> Dict[str, Any]:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'commit': _git_commit()
+    }
+
+def run_benchmarks(args) -> Dict[str, Any]:
+    log(f"🧪 Generating {args.samples} synthetic '{args.difficulty}' chip images (seed {args.seed})")
+    samples = generate_samples(args.samples, seed=args.seed, difficulty=args.difficulty)
+    
+    results: Dict[str, Any] = {}
+    accuracy: Dict[str, float] = {}
+    
+    async def _run_stages():
+        await bench_preprocessing(samples, args, results)
+        await bench_ocr(samples, args, results, accuracy)
+        await bench_matching(samples, args, results)
+    
+    asyncio.run(_run_stages())
+    bench_end_to_end(samples, args, results)
+    
+    # resource is POSIX-only; Windows runs report no peak RSS
+    try:
+        import resource
+    except ImportError:
+        max_rss_mb = None
+    else:
+        # ru_maxrss is bytes on macOS and KB on Linux
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        max_rss_mb = round(max_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    
+    return {
+        'schema_version': SCHEMA_VERSION,
+        'timestamp': datetime.now().isoformat(),
+        'environment': environment_info(),
+        'config': {
+            'samples': args.samples,
+            'iterations': args.iterations,
+            'seed': args.seed,
+            'difficulty': args.difficulty,
+            'engines': args.engines,
+            'catalog_size': args.catalog_size
+        },
+        'max_rss_mb': max_rss_mb,
+        'benchmarks': results,
+        'accuracy': accuracy
+    }
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], latency_threshold: float,
+                    memory_threshold: float, min_latency_delta_ms: float = 0.5,
+                    min_memory_delta_mb: float = 1.0) -> List[str]:
+    """
+    Compare two result sets
+    
+    A benchmark regresses when its median latency (or peak memory) grew by
+    more than the relative threshold and by more than the absolute minimum;
+    the minimum keeps sub-millisecond benchmarks from failing on noise.
+    
+    Returns:
+        Human-readable regression descriptions (empty when none)
+    """
+    regressions = []
+    
+    if baseline.get('config') != current.get('config'):
+        log("⚠️ Benchmark configuration differs from the baseline; results may not be comparable")
+    if baseline.get('environment', {}).get('cpu_count') != current.get('environment', {}).get('cpu_count'):
+        log("⚠️ Baseline was recorded on a machine with a different CPU count")
+    
+    print(f"\n{'benchmark':<36} {'p50 base':>10} {'p50 now':>10} {'Δ%':>8} {'mem base':>10} {'mem now':>10} {'Δ%':>8}")
+    print("-" * 98)
+    
+    for name, now in current.get('benchmarks', {}).items():
+        base = baseline.get('benchmarks', {}).get(name)
+        if not base:
+            print(f"{name:<36} {'(new)':>10} {now['p50_ms']:>10.2f}")
+            continue
+        
+        latency_change = (now['p50_ms'] - base['p50_ms']) / base['p50_ms'] if base['p50_ms'] else 0.0
+        memory_change = ((now['peak_memory_mb'] - base['peak_memory_mb']) / base['peak_memory_mb']
+                         if base['peak_memory_mb'] else 0.0)
+        
+        flags = []
+        if latency_change > latency_threshold and now['p50_ms'] - base['p50_ms'] > min_latency_delta_ms:
+            flags.append('latency')
+            regressions.append(f"{name}: p50 {base['p50_ms']:.2f}ms -> {now['p50_ms']:.2f}ms "
+                               f"(+{latency_change * 100:.1f}%)")
+        if memory_change > memory_threshold and now['peak_memory_mb'] - base['peak_memory_mb'] > min_memory_delta_mb:
+            flags.append('memory')
+            regressions.append(f"{name}: peak memory {base['peak_memory_mb']:.1f}MB -> {now['peak_memory_mb']:.1f}MB "
+                               f"(+{memory_change * 100:.1f}%)")
+        
+        marker = f"  ❌ {', '.join(flags)}" if flags else ""
+        print(f"{name:<36} {base['p50_ms']:>10.2f} {now['p50_ms']:>10.2f} {latency_change * 100:>7.1f}% "
+              f"{base['peak_memory_mb']:>10.2f} {now['peak_memory_mb']:>10.2f} {memory_change * 100:>7.1f}%{marker}")
+    
+    for name in baseline.get('benchmarks', {}):
+        if name not in current.get('benchmarks', {}):
+            print(f"{name:<36} (missing from this run)")
+    
+    for name, score in current.get('accuracy', {}).items():
+        base_score = baseline.get('accuracy', {}).get(name)
+        if base_score is not None and score < base_score:
+            log(f"⚠️ {name} accuracy dropped: {base_score:.3f} -> {score:.3f}")
+    
+    return regressions
+
+def write_json(path: Path, data: Dict[str, Any]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+    log(f"📋 Results saved to: {path}")
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="MarkSure AI service benchmarks")
+    parser.add_argument("--samples", type=int, default=8, help="Synthetic images per benchmark")
+    parser.add_argument("--iterations", type=int, default=3, help="Passes over the images per benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--difficulty", choices=["clean", "typical", "hard"], default="typical")
+    parser.add_argument("--engines", default="easyocr,tesseract",
+                        help="Comma-separated OCR backends to benchmark (unavailable ones are skipped)")
+    parser.add_argument("--catalog-size", type=int, default=20000, help="OEM markings for matching benchmarks")
+    parser.add_argument("--only", default=None,
+                        help="Comma-separated benchmark name prefixes, e.g. preprocess,ocr.tesseract")
+    parser.add_argument("--output", type=Path, default=DEFAULT_RESULTS, help="Where to write this run's results")
+    parser.add_argument("--save-baseline", type=Path, default=None, help="Also store the results as a baseline")
+    parser.add_argument("--compare", type=Path, default=None, help="Baseline to compare against")
+    parser.add_argument("--results", type=Path, default=None,
+                        help="With --compare: compare this results file instead of running")
+    parser.add_argument("--latency-threshold", type=float, default=0.15,
+                        help="Allowed relative p50 latency growth (0.15 = 15%%)")
+    parser.add_argument("--memory-threshold", type=float, default=0.20,
+                        help="Allowed relative peak memory growth")
+    parser.add_argument("--dump-images", type=Path, default=None, help="Write the synthetic images here and exit")
+    
+    args = parser.parse_args(argv)
+    args.engines = [engine.strip() for engine in args.engines.split(",") if engine.strip()]
+    args.only = [name.strip() for name in args.only.split(",")] if args.only else None
+    return args
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    
+    if args.dump_images:
+        import cv2
+        args.dump_images.mkdir(parents=True, exist_ok=True)
+        for i, sample in enumerate(generate_samples(args.samples, seed=args.seed, difficulty=args.difficulty)):
+            cv2.imwrite(str(args.dump_images / f"chip_{i:03d}.jpg"), sample['image'])
+            print(f"chip_{i:03d}.jpg  {sample['text']}")
+        return 0
+    
+    if args.results:
+        if not args.compare:
+            print("--results requires --compare")
+            return 2
+        with open(args.results) as f:
+            current = json.load(f)
+    else:
+        print("🔍 MARKSURE AI SERVICE - BENCHMARKS")
+        print("=" * 60)
+        current = run_benchmarks(args)
+        write_json(args.output, current)
+        if args.save_baseline:
+            write_json(args.save_baseline, current)
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, current, args.latency_threshold, args.memory_threshold)
+        print()
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) beyond threshold:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            return 1
+        print("✅ No regressions beyond threshold")
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Synthetic chip-top images for benchmarks
+
+Renders laser-etched style markings (part number, date/lot code, optional
+logo) on a textured epoxy package with pins, then applies the capture
+defects seen on the line: rotation, defocus blur, specular glare and sensor
+noise. Everything is generated from a seed, so a benchmark run always sees
+the same images.
+"""
+
+import cv2
+import numpy as np
+from typing import Dict, List, Tuple, Any
+
+PART_FAMILIES = [
+    ('STM32F', lambda rng: f"{rng.choice([103, 407, 429, 746])}{rng.choice(['C8T6', 'VGT6', 'RBT6', 'ZIT6'])}"),
+    ('ATMEGA', lambda rng: f"{rng.choice([8, 16, 32, 328, 2560])}{rng.choice(['P', 'PA', 'A'])}-{rng.choice(['AU', 'PU', 'MU'])}"),
+    ('LM', lambda rng: f"{rng.choice([317, 358, 393, 741, 1117])}{rng.choice(['N', 'DR', 'MP', ''])}"),
+    ('NE', lambda rng: f"{rng.choice([555, 556, 5532])}{rng.choice(['P', 'DR', ''])}"),
+    ('TPS', lambda rng: f"{rng.randint(54000, 65999)}{rng.choice(['DR', 'DRC', 'DGQ'])}"),
+    ('MAX', lambda rng: f"{rng.choice([232, 485, 3232, 7219])}{rng.choice(['CPE', 'ESE', 'EUA'])}"),
+    ('SN74HC', lambda rng: f"{rng.choice(['00', '04', '14', '595', '165'])}{rng.choice(['N', 'DR', 'PWR'])}"),
+    ('PIC16F', lambda rng: f"{rng.choice([84, 628, 877, 1829])}{rng.choice(['A', ''])}-I/{rng.choice(['P', 'SO', 'SS'])}"),
+    ('AD', lambda rng: f"{rng.choice([620, 8232, 9833, 7705])}{rng.choice(['AN', 'BRZ', 'ARZ'])}")
+]
+
+FONTS = [cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX, cv2.FONT_HERSHEY_PLAIN]
+
+# Capture defects per difficulty level
+DIFFICULTY = {
+    'clean': {'rotation': 0.0, 'blur': 0, 'glare': 0.0, 'noise': 2.0},
+    'typical': {'rotation': 4.0, 'blur': 3, 'glare': 0.35, 'noise': 6.0},
+    'hard': {'rotation': 12.0, 'blur': 7, 'glare': 0.7, 'noise': 12.0}
+}
+
+def random_part_number(rng: np.random.RandomState) -> str:
+    prefix, suffix = PART_FAMILIES[rng.randint(len(PART_FAMILIES))]
+    return prefix + suffix(_Choices(rng))
+
+def random_date_code(rng: np.random.RandomState) -> str:
+    """Year/week code followed by a lot code, e.g. '2338 K7Q4'"""
+    lot = ''.join(rng.choice(list('ABCDEFGHJKMNPQRTUVWXY0123456789'), size=4))
+    return f"{rng.randint(15, 26):02d}{rng.randint(1, 53):02d} {lot}"
+
+class _Choices:
+    """random.Random-like choice/randint on top of a numpy RandomState"""
+    
+    def __init__(self, rng: np.random.RandomState):
+        self.rng = rng
+    
+    def choice(self, options):
+        return options[self.rng.randint(len(options))]
+    
+    def randint(self, low: int, high: int) -> int:
+        return int(self.rng.randint(low, high + 1))
+
+def _package_background(rng: np.random.RandomState, size: Tuple[int, int]) -> np.ndarray:
+    """Matte epoxy texture: dark base, low-frequency mottling and fine grain"""
+    width, height = size
+    base = rng.randint(25, 55)
+    mottling = cv2.resize(rng.normal(0, 6, (height // 16 + 1, width // 16 + 1)), (width, height),
+                          interpolation=cv2.INTER_CUBIC)
+    grain = rng.normal(0, 3, (height, width))
+    texture = np.clip(base + mottling + grain, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(texture, cv2.COLOR_GRAY2BGR)
+
+def _draw_pins(image: np.ndarray, rng: np.random.RandomState, body: Tuple[int, int, int, int]):
+    x0, y0, x1, y1 = body
+    pins = rng.randint(4, 12)
+    pitch = (x1 - x0) / pins
+    for i in range(pins):
+        px = int(x0 + pitch * (i + 0.25))
+        pw = max(2, int(pitch * 0.5))
+        color = (rng.randint(150, 200),) * 3
+        cv2.rectangle(image, (px, max(0, y0 - 18)), (px + pw, y0), color, -1)
+        cv2.rectangle(image, (px, y1), (px + pw, min(image.shape[0] - 1, y1 + 18)), color, -1)
+
+def _draw_logo(image: np.ndarray, rng: np.random.RandomState, center: Tuple[int, int], color: Tuple[int, ...]):
+    """Simple manufacturer-style mark: ring with a letter, or a chevron"""
+    radius = rng.randint(14, 24)
+    if rng.rand() < 0.5:
+        cv2.circle(image, center, radius, color, 2, cv2.LINE_AA)
+        letter = 'STMA'[rng.randint(4)]
+        cv2.putText(image, letter, (center[0] - radius // 2, center[1] + radius // 2),
+                    cv2.FONT_HERSHEY_SIMPLEX, radius / 22.0, color, 2, cv2.LINE_AA)
+    else:
+        points = np.array([
+            [center[0] - radius, center[1] + radius // 2],
+            [center[0], center[1] - radius // 2],
+            [center[0] + radius, center[1] + radius // 2]
+        ], dtype=np.int32)
+        cv2.polylines(image, [points], False, color, 3, cv2.LINE_AA)
+
+def _apply_glare(image: np.ndarray, rng: np.random.RandomState, strength: float) -> np.ndarray:
+    height, width = image.shape[:2]
+    cx, cy = rng.randint(0, width), rng.randint(0, height)
+    sigma = rng.uniform(0.15, 0.35) * max(width, height)
+    yy, xx = np.mgrid[0:height, 0:width]
+    spot = np.exp(-((xx - cx) ** 2 + (yy - cy) ** 2) / (2 * sigma ** 2)) * 255 * strength
+    return np.clip(image.astype(np.float32) + spot[..., None], 0, 255).astype(np.uint8)
+
+def render_chip(rng: np.random.RandomState, lines: List[str], size: Tuple[int, int] = (640, 480),
+                difficulty: str = 'typical', logo: bool = True) -> np.ndarray:
+    """
+    Render one chip-top image
+    
+    Args:
+        rng: Random state (drives layout, texture and defects)
+        lines: Marking lines, top to bottom
+        size: Output size (width, height)
+        difficulty: Key of DIFFICULTY
+        logo: Draw a manufacturer logo left of the marking
+    
+    Returns:
+        BGR image as numpy array
+    """
+    width, height = size
+    defects = DIFFICULTY[difficulty]
+    image = _package_background(rng, size)
+    
+    body = (int(width * 0.08), int(height * 0.12), int(width * 0.92), int(height * 0.88))
+    _draw_pins(image, rng, body)
+    
+    # Pin-1 dimple
+    cv2.circle(image, (body[0] + 18, body[3] - 18), 7, (18, 18, 18), -1, cv2.LINE_AA)
+    
+    ink = (rng.randint(170, 235),) * 3
+    font = FONTS[rng.randint(len(FONTS))]
+    text_x = body[0] + (70 if logo else 30)
+    if logo:
+        _draw_logo(image, rng, (body[0] + 40, body[1] + 45), ink)
+    
+    # Scale the font so the longest line fits the package body
+    available = body[2] - text_x - 20
+    longest = max(lines, key=len)
+    (line_width, _), _ = cv2.getTextSize(longest, font, 1.0, 2)
+    scale = min(2.0, available / max(line_width, 1))
+    (_, line_height), _ = cv2.getTextSize('A', font, scale, 2)
+    
+    y = body[1] + int(line_height * 2.2)
+    for line in lines:
+        cv2.putText(image, line, (text_x, y), font, scale, ink, max(1, int(scale * 2)), cv2.LINE_AA)
+        y += int(line_height * 1.9)
+    
+    if defects['rotation']:
+        angle = rng.uniform(-defects['rotation'], defects['rotation'])
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+        image = cv2.warpAffine(image, matrix, (width, height), borderMode=cv2.BORDER_REFLECT)
+    
+    if defects['glare'] and rng.rand() < 0.6:
+        image = _apply_glare(image, rng, rng.uniform(0.3, 1.0) * defects['glare'])
+    
+    if defects['blur']:
+        kernel = 1 + 2 * rng.randint(0, defects['blur'] // 2 + 1)
+        if kernel > 1:
+            image = cv2.GaussianBlur(image, (kernel, kernel), 0)
+    
+    noise = rng.normal(0, defects['noise'], image.shape)
+    return np.clip(image + noise, 0, 255).astype(np.uint8)
+
+def generate_samples(count: int, seed: int = 0, size: Tuple[int, int] = (640, 480),
+                     difficulty: str = 'typical') -> List[Dict[str, Any]]:
+    """
+    Generate chip images with their ground-truth markings
+    
+    Returns:
+        List of {'image', 'lines', 'text', 'encoded'} dicts; 'encoded' holds
+        the JPEG bytes an uploader would send
+    """
+    rng = np.random.RandomState(seed)
+    samples = []
+    for _ in range(count):
+        lines = [random_part_number(rng), random_date_code(rng)]
+        image = render_chip(rng, lines, size=size, difficulty=difficulty, logo=rng.rand() < 0.7)
+        encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+        samples.append({
+            'image': image,
+            'lines': lines,
+            'text': ' '.join(lines),
+            'encoded': encoded
+        })
+    return samples
+
+def generate_catalog(size: int, seed: int = 1) -> List[str]:
+    """Distinct synthetic OEM part numbers for matching benchmarks"""
+    rng = np.random.RandomState(seed)
+    catalog = set()
+    # Part families are finite; pad with lot-style suffixes for large catalogs
+    while len(catalog) < size:
+        part = random_part_number(rng)
+        if part in catalog:
+            part = f"{part}-{rng.randint(10, 99)}{'ABCDEFGH'[rng.randint(8)]}"
+        catalog.add(part)
+    return sorted(catalog)
@@ -1,24 +1,40 @@
 import os
+import json
+import time
 import asyncio
 import logging
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 import uvicorn
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from pydantic import BaseModel, Field
+from starlette.routing import Match
 import cv2
 import numpy as np
 from PIL import Image
 import io
-import tempfile
 
 # Import our custom modules
-from src.ocr.ocr_engine import OCREngine
+from src.ocr.ocr_engine import OCREngine, ENSEMBLE_MODES
+from src.ocr.engine_router import EngineRouter
 from src.preprocessing.image_processor import ImageProcessor
-from src.comparison.similarity_matcher import SimilarityMatcher
+from src.preprocessing.pipeline import PRESETS, DEFAULT_PRESET, load_presets
+from src.preprocessing.quality_gate import QualityGate
+from src.preprocessing.text_localizer import TextLocalizer
+from src.comparison.similarity_matcher import SimilarityMatcher, SCORERS
+from src.comparison.ngram_index import MarkingCatalog, load_catalog
+from src.caching.result_cache import ResultCache, create_cache_backend
+from src.monitoring.metrics import MetricsRegistry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from src.monitoring.tracing import Tracer, span
+from src.serving.admission import AdmissionController, AdmissionRejected, ocr_slot
+from src.serving.jobs import JobManager, JobQueueFull, FINISHED_STATES, create_job_store
+from src.serving.stream_session import StreamSession
+from src.preprocessing.frame_change import FrameChangeDetector
+from src.ocr.consensus import TemporalConsensus
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,12 +58,113 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Frame size fed to OCR; uploads are decoded and resized to fit within it
+ANALYSIS_TARGET_SIZE = (1024, 768)
+
+# OCR confidence threshold applied to /analyze results
+OCR_MIN_CONFIDENCE = 0.1
+
+# Preprocessing preset used when a request does not name one
+DEFAULT_PREPROCESSING_PRESET = os.getenv("PREPROCESSING_PRESET", DEFAULT_PRESET)
+
+# Tiled OCR for high-resolution frames: images at or above TILING_MIN_PIXELS
+# are OCR'd at full resolution in overlapping tiles instead of being downscaled
+TILING_MIN_PIXELS = int(os.getenv("TILING_MIN_PIXELS", "8000000"))
+TILE_SIZE = int(os.getenv("TILE_SIZE", "1024"))
+TILE_OVERLAP = int(os.getenv("TILE_OVERLAP", "160"))
+TILE_CONCURRENCY = int(os.getenv("TILE_CONCURRENCY", "2"))
+
+# Largest similarity matrix computed at once (cells); bigger requests must ask for top_k
+SIMILARITY_MATRIX_MAX_CELLS = int(os.getenv("SIMILARITY_MATRIX_MAX_CELLS", "50000000"))
+
+# Batch analysis limits
+BATCH_MAX_IMAGES = int(os.getenv("BATCH_MAX_IMAGES", "500"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", os.getenv("MAX_WORKERS", "4")))
+
+# Admission control: deadline for /analyze requests that do not send one
+# (X-Deadline-Ms header or deadline_ms field; 0 disables), and how often a
+# waiting request checks whether its client is still connected
+DEFAULT_DEADLINE_MS = float(os.getenv("REQUEST_TIMEOUT", "30")) * 1000.0
+DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_MS", "250")) / 1000.0
+
+# Live frame streams (/stream): change detection in front of OCR and the
+# temporal consensus of the readings
+STREAM_OCR_INTERVAL = float(os.getenv("STREAM_OCR_INTERVAL_MS", "250")) / 1000.0
+STREAM_PIXEL_THRESHOLD = int(os.getenv("STREAM_PIXEL_THRESHOLD", "25"))
+STREAM_MOTION_FRACTION = float(os.getenv("STREAM_MOTION_FRACTION", "0.02"))
+STREAM_CHANGE_FRACTION = float(os.getenv("STREAM_CHANGE_FRACTION", "0.05"))
+STREAM_CONSENSUS_WINDOW = int(os.getenv("STREAM_CONSENSUS_WINDOW", "7"))
+STREAM_CONSENSUS_MIN_VOTES = int(os.getenv("STREAM_CONSENSUS_MIN_VOTES", "3"))
+STREAM_CONSENSUS_MIN_SHARE = float(os.getenv("STREAM_CONSENSUS_MIN_SHARE", "0.6"))
+# Change detection needs far less than full resolution; large frames are decoded reduced
+STREAM_CHECK_SIZE = (160, 120)
+
 # Global instances
 ocr_engine = None
 image_processor = None
 similarity_matcher = None
+result_cache = None
+quality_gate = None
+text_localizer = None
+engine_router = None
+marking_catalog = None
+admission = None
+job_manager = None
+
+# Per-request span tracing; keeps traces in memory until initialize_services
+# opens the trace file
+TRACE_RESOURCE = {"service.name": "marksure-ai", "service.version": "1.0.0"}
+tracer = Tracer(resource=TRACE_RESOURCE)
+
+# Models loaded by the prefork launcher before forking workers
+preloaded_models: Dict[str, Any] = {}
+
+# Readiness: set once services are initialized and warmed up
+service_state: Dict[str, Any] = {
+    'ready': False,
+    'warmup_ms': None,
+    'error': None,
+    'warmup_task': None
+}
+
+# Metrics served at /metrics (per process; see MetricsRegistry)
+metrics = MetricsRegistry(namespace="marksure")
+http_request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+active_requests = metrics.gauge("active_requests", "HTTP requests currently being handled")
+analysis_stage_seconds = metrics.histogram(
+    "analysis_stage_duration_seconds", "Analysis pipeline stage latency", ("stage", "engine", "preset"))
+analyses_total = metrics.counter(
+    "analyses_total", "Analyses by outcome (ok, retake, cached, error)", ("engine", "preset", "status"))
+ocr_engine_seconds = metrics.histogram(
+    "ocr_engine_duration_seconds", "Latency of single OCR backend calls", ("engine",))
+ocr_engine_errors_total = metrics.counter("ocr_engine_errors_total", "Failed OCR backend calls", ("engine",))
+ocr_fallbacks_total = metrics.counter(
+    "ocr_fallbacks_total", "Extractions retried on the fallback engine, by failed engine", ("engine",))
+matching_seconds = metrics.histogram(
+    "matching_duration_seconds", "Text similarity and catalog matching latency", ("operation", "method"))
+queue_depth = metrics.gauge("queue_depth", "Work waiting for admission, an OCR batch or a worker process", ("queue",))
+ocr_in_flight = metrics.gauge("ocr_in_flight", "OCR calls submitted to an engine and not finished yet", ("engine",))
+cache_lookups_total = metrics.counter(
+    "result_cache_lookups_total", "Result cache lookups by outcome", ("result",))
+cache_hit_rate = metrics.gauge("result_cache_hit_rate", "Share of result cache lookups served without recomputing")
+catalog_lookups_total = metrics.counter(
+    "catalog_lookups_total", "OEM catalog lookups by path taken", ("match_type",))
+admission_rejections_total = metrics.counter(
+    "admission_rejections_total", "Requests turned away before OCR (queue_full, deadline)", ("engine", "reason"))
+stream_frames_total = metrics.counter(
+    "stream_frames_total", "Streamed frames by action (ocr, or why OCR was skipped)", ("action",))
+active_streams = metrics.gauge("active_streams", "Open /stream connections")
 
 # Pydantic models
+class AnalysisOptions(BaseModel):
+    ocr_engine_type: str = "easyocr"
+    preset: str = DEFAULT_PREPROCESSING_PRESET
+    quality_gate: bool = True
+    localize: bool = os.getenv("TEXT_LOCALIZATION_ENABLED", "false").lower() == "true"
+    # None picks tiling automatically from the image size
+    tiling: Optional[bool] = None
+
 class AnalysisResult(BaseModel):
     inspection_id: str
     extracted_text: str
@@ -57,40 +174,175 @@ class AnalysisResult(BaseModel):
     preprocessing_steps: List[str] = []
     processing_time: float
     image_quality_metrics: Dict[str, Any] = {}
+    cached: bool = False
+    stage_timings: Dict[str, float] = {}
+    status: str = "ok"
+    retake_reasons: List[str] = []
+    text_regions: List[Dict[str, int]] = []
+    tiles: int = 0
+    engine_used: str = ""
+    trace_id: str = ""
+    # Spans of this request, when asked for with trace=true
+    trace: Optional[List[Dict[str, Any]]] = None
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str
+    inspection_id: str
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    # Results are deleted after this time
+    expires_at: Optional[str] = None
+    attempts: int = 0
+    result: Optional[AnalysisResult] = None
+    error: Optional[str] = None
+
+class SimilarityMatrixRequest(BaseModel):
+    queries: List[str]
+    # None compares against the loaded OEM marking catalog
+    references: Optional[List[str]] = None
+    method: str = "rapidfuzz"
+    top_k: Optional[int] = None
+    min_score: float = 0.0
+    format: str = "json"
 
 class HealthResponse(BaseModel):
     status: str
     timestamp: str
     services: Dict[str, str]
     version: str
+    details: Dict[str, Any] = {}
 
 # Initialize AI services
 async def initialize_services():
     """Initialize AI services on startup"""
-    global ocr_engine, image_processor, similarity_matcher
+    global ocr_engine, image_processor, similarity_matcher, result_cache, quality_gate, text_localizer, engine_router, marking_catalog, tracer, admission, job_manager
     
     try:
         logger.info("🔧 Initializing AI services...")
         
         # Initialize image processor
+        presets_file = os.getenv("PREPROCESSING_PRESETS_FILE")
+        if presets_file:
+            load_presets(presets_file)
         image_processor = ImageProcessor()
         logger.info("✅ Image processor initialized")
         
+        # Initialize pre-OCR quality gate
+        if os.getenv("QUALITY_GATE_ENABLED", "true").lower() == "true":
+            thresholds = {
+                name: float(os.environ[f"QUALITY_GATE_{name.upper()}"])
+                for name in QualityGate.DEFAULT_THRESHOLDS
+                if os.getenv(f"QUALITY_GATE_{name.upper()}")
+            }
+            quality_gate = QualityGate(thresholds)
+            logger.info("✅ Quality gate initialized")
+        
+        # Text-region localizer (used when a request asks for localization)
+        text_localizer = TextLocalizer()
+        
         # Initialize OCR engine
+        # Only the configured engines are imported (e.g. no torch for Tesseract-only workers)
         ocr_engine = OCREngine(
-            primary_engine='easyocr',
-            fallback_engine='tesseract',
-            languages=['en']
+            primary_engine=os.getenv("OCR_PRIMARY_ENGINE", "easyocr"),
+            fallback_engine=os.getenv("OCR_FALLBACK_ENGINE", "tesseract") or None,
+            languages=['en'],
+            max_workers=int(os.getenv("MAX_WORKERS", "4")),
+            batch_size=int(os.getenv("BATCH_SIZE", "1")),
+            batch_window_ms=float(os.getenv("OCR_BATCH_WINDOW_MS", "10")),
+            max_concurrent_batches=int(os.getenv("EASYOCR_MAX_CONCURRENT_BATCHES", "1")),
+            worker_processes=int(os.getenv("OCR_WORKER_PROCESSES", "0")),
+            cascade_exit_confidence=float(os.getenv("CASCADE_EXIT_CONFIDENCE", "0.85")),
+            easyocr_reader=preloaded_models.get('easyocr_reader')
         )
         await ocr_engine.initialize()
+        ocr_engine.observer = observe_ocr_engine
         logger.info("✅ OCR engine initialized")
         
+        # Engine router (used by ocr_engine_type=auto; needs both engines it routes between)
+        policy = {
+            name: float(os.environ[f"ROUTER_{name.upper()}"])
+            for name in EngineRouter.DEFAULT_POLICY
+            if os.getenv(f"ROUTER_{name.upper()}")
+        }
+        router = EngineRouter(policy=policy)
+        if {router.fast_engine, router.accurate_engine} <= set(ocr_engine.backends):
+            engine_router = router
+        
+        # Bounded queue per engine in front of OCR; ADMISSION_<ENGINE>_MAX_QUEUE
+        # and ADMISSION_<ENGINE>_MAX_CONCURRENT override the defaults per engine
+        limits = {
+            engine: {
+                name: int(os.environ[f"ADMISSION_{engine.upper()}_{name.upper()}"])
+                for name in ('max_queue', 'max_concurrent')
+                if os.getenv(f"ADMISSION_{engine.upper()}_{name.upper()}")
+            }
+            for engine in ocr_engine.backends
+        }
+        admission = AdmissionController(
+            max_concurrent=int(os.getenv("ADMISSION_MAX_CONCURRENT", os.getenv("MAX_WORKERS", "4"))),
+            max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "16")),
+            limits=limits
+        )
+        logger.info(f"✅ Admission control initialized (queue {admission.max_queue} per engine)")
+        
         # Initialize similarity matcher
         similarity_matcher = SimilarityMatcher()
         logger.info("✅ Similarity matcher initialized")
         
-        logger.info("🎉 All AI services initialized successfully!")
+        # Load the OEM marking catalog for /match
+        reference_path = os.getenv("OEM_REFERENCE_PATH")
+        if preloaded_models.get('marking_catalog'):
+            marking_catalog = preloaded_models['marking_catalog']
+            marking_catalog.matcher = similarity_matcher
+        elif reference_path:
+            markings = load_catalog(reference_path)
+            marking_catalog = MarkingCatalog(
+                markings,
+                similarity_matcher,
+                max_candidates=int(os.getenv("MATCH_MAX_CANDIDATES", "300")),
+                confusion_weight=float(os.getenv("MATCH_CONFUSION_WEIGHT", "0.7"))
+            )
+            logger.info(f"✅ OEM marking catalog loaded ({len(marking_catalog)} markings)")
+        
+        # Initialize analysis result cache
+        if os.getenv("CACHE_ENABLED", "true").lower() == "true":
+            cache_backend = create_cache_backend(
+                os.getenv("CACHE_BACKEND", "memory"),
+                ttl=float(os.getenv("CACHE_TTL", "3600")),
+                max_bytes=int(os.getenv("CACHE_MAX_MB", "64")) * 1024 * 1024,
+                directory=os.getenv("CACHE_DIR", "cache"),
+                redis_url=os.getenv("REDIS_URL")
+            )
+            result_cache = ResultCache(cache_backend)
+            logger.info(f"✅ Result cache initialized ({os.getenv('CACHE_BACKEND', 'memory')})")
+        
+        # Write request traces to a rotating OTLP/JSON file per process
+        if os.getenv("TRACING_ENABLED", "true").lower() == "true":
+            tracer = Tracer(
+                path=os.getenv("TRACE_FILE", "logs/traces-{pid}.jsonl"),
+                max_bytes=int(os.getenv("TRACE_MAX_MB", "10")) * 1024 * 1024,
+                backup_count=int(os.getenv("TRACE_BACKUP_COUNT", "5")),
+                resource=TRACE_RESOURCE
+            )
+            logger.info(f"✅ Request tracing enabled ({tracer.path})")
         
+        # Background analysis jobs (/jobs); the sqlite store keeps queued jobs across restarts
+        job_manager = JobManager(
+            create_job_store(os.getenv("JOBS_STORE", "sqlite"), path=os.getenv("JOBS_DB_PATH", "jobs/jobs.sqlite3")),
+            run_job,
+            workers=int(os.getenv("JOBS_WORKERS", "2")),
+            max_queued=int(os.getenv("JOBS_MAX_QUEUED", "1000")),
+            ttl=float(os.getenv("JOBS_TTL", "86400")),
+            cleanup_interval=float(os.getenv("JOBS_CLEANUP_INTERVAL", "300")),
+            lease=float(os.getenv("JOBS_LEASE_SECONDS", "30"))
+        )
+        await job_manager.start()
+        logger.info(f"✅ Job queue started ({os.getenv('JOBS_STORE', 'sqlite')}, {job_manager.workers} workers)")
+        
+        logger.info("🎉 All AI services initialized successfully!")
+    
     except Exception as e:
         logger.error(f"❌ Failed to initialize AI services: {e}")
         raise
@@ -99,13 +351,178 @@ async def initialize_services():
 @app.on_event("startup")
 async def startup_event():
     """Run initialization tasks on startup"""
-    await initialize_services()
+    try:
+        await initialize_services()
+    except Exception as e:
+        service_state['error'] = str(e)
+        raise
     
     # Create necessary directories
     os.makedirs("temp", exist_ok=True)
     os.makedirs("logs", exist_ok=True)
     
-    logger.info("🚀 MarkSure AI Service is ready!")
+    # Warm up in the background so liveness probes answer meanwhile;
+    # readiness stays false until the first inferences have run
+    if os.getenv("WARMUP_ENABLED", "true").lower() == "true":
+        task = asyncio.create_task(warm_up_services(int(os.getenv("WARMUP_ITERATIONS", "1"))))
+        task.add_done_callback(warm_up_done)
+        service_state['warmup_task'] = task
+    else:
+        service_state['ready'] = True
+        logger.info("🚀 MarkSure AI Service is ready!")
+
+def warm_up_done(task: asyncio.Task):
+    """Surface a warm-up task that died, keeping the replica out of rotation"""
+    service_state['warmup_task'] = None
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        service_state['ready'] = False
+        service_state['error'] = f"Warm-up failed: {error}"
+        logger.error(f"❌ Warm-up task failed: {error}", exc_info=error)
+
+def preload_models():
+    """
+    Load heavy, read-only models in the prefork parent
+    
+    Workers forked afterwards share these pages copy-on-write instead of each
+    loading its own copy. Must not run inference (see serve_prefork).
+    """
+    engines = {os.getenv("OCR_PRIMARY_ENGINE", "easyocr"), os.getenv("OCR_FALLBACK_ENGINE", "tesseract")}
+    if 'easyocr' in engines and int(os.getenv("OCR_WORKER_PROCESSES", "0")) == 0:
+        import easyocr
+        logger.info("🔧 Preloading EasyOCR reader...")
+        preloaded_models['easyocr_reader'] = easyocr.Reader(['en'], gpu=False)
+    
+    reference_path = os.getenv("OEM_REFERENCE_PATH")
+    if reference_path:
+        preloaded_models['marking_catalog'] = MarkingCatalog(
+            load_catalog(reference_path),
+            SimilarityMatcher(),
+            max_candidates=int(os.getenv("MATCH_MAX_CANDIDATES", "300")),
+            confusion_weight=float(os.getenv("MATCH_CONFUSION_WEIGHT", "0.7"))
+        )
+        logger.info(f"✅ Preloaded OEM marking catalog ({len(preloaded_models['marking_catalog'])} markings)")
+
+async def warm_up_services(iterations: int = 1):
+    """
+    Run synthetic inferences so the first real request skips lazy init.
+    
+    Failures propagate: a replica whose pipeline cannot run a synthetic
+    frame would fail real ones too, so warm_up_done keeps it out of rotation.
+    """
+    started = time.perf_counter()
+    
+    # Light marking on a dark package, like a typical frame
+    image = np.full((240, 640, 3), 40, dtype=np.uint8)
+    cv2.putText(image, "WARMUP 0123", (40, 140), cv2.FONT_HERSHEY_SIMPLEX, 2.0, (210, 210, 210), 4)
+    
+    engines = list(ocr_engine.backends)
+    
+    # Cold-start calls would skew the engine latency histograms
+    observer, ocr_engine.observer = ocr_engine.observer, None
+    
+    try:
+        for _ in range(iterations):
+            processed_image, _, _ = await image_processor.process_image(
+                image,
+                target_size=ANALYSIS_TARGET_SIZE,
+                preset=DEFAULT_PREPROCESSING_PRESET
+            )
+            for engine in engines:
+                await ocr_engine.extract_text(processed_image, engine=engine, min_confidence=OCR_MIN_CONFIDENCE)
+    finally:
+        ocr_engine.observer = observer
+    
+    service_state['warmup_ms'] = elapsed_ms(started)
+    service_state['ready'] = True
+    logger.info(f"🚀 MarkSure AI Service is ready! (warm-up {service_state['warmup_ms']:.0f}ms)")
+
+def observe_ocr_engine(event: str, engine: str, seconds: float):
+    """OCREngine observer feeding the per-engine metrics"""
+    if event == 'extract':
+        ocr_engine_seconds.observe(seconds, engine=engine)
+    elif event == 'error':
+        ocr_engine_errors_total.inc(engine=engine)
+    elif event == 'fallback':
+        ocr_fallbacks_total.inc(engine=engine)
+
+def collect_service_metrics():
+    """Copy queue depths and cache/catalog counters into metrics before a scrape"""
+    if ocr_engine:
+        for engine, calls in ocr_engine.in_flight.items():
+            ocr_in_flight.set(calls, engine=engine)
+        easyocr_backend = ocr_engine.backends.get('easyocr')
+        if getattr(easyocr_backend, 'batcher', None):
+            queue_depth.set(easyocr_backend.batcher.get_stats()['queued'], queue="easyocr_batch")
+        if getattr(easyocr_backend, 'worker_pool', None):
+            workers = easyocr_backend.worker_pool.get_status()['workers']
+            queue_depth.set(sum(worker['queue_depth'] for worker in workers), queue="ocr_workers")
+    
+    if admission:
+        for engine, gate in admission.gates.items():
+            queue_depth.set(gate.waiting, queue=f"admission_{engine}")
+    
+    if result_cache:
+        cache_stats = result_cache.get_stats()
+        for result in ('hits', 'misses', 'coalesced', 'errors'):
+            cache_lookups_total.set(cache_stats[result], result=result)
+        cache_hit_rate.set(cache_stats['hit_rate'])
+    
+    if marking_catalog:
+        catalog_lookups_total.set(marking_catalog.stats['exact_hits'], match_type="exact")
+        catalog_lookups_total.set(marking_catalog.stats['fuzzy_lookups'], match_type="fuzzy")
+
+metrics.add_collector(collect_service_metrics)
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """Path pattern of the route serving a request, keeping metric labels bounded"""
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+class RequestMetricsMiddleware:
+    """
+    Request latency and in-flight count per route
+    
+    A plain ASGI middleware rather than @app.middleware("http"): that wraps
+    the request stream, which keeps endpoints from noticing when a client
+    disconnects (see run_until_disconnected).
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        active_requests.inc()
+        started = time.perf_counter()
+        status = 500
+        
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            active_requests.dec()
+            http_request_seconds.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=route_template(scope),
+                status=status
+            )
+
+app.add_middleware(RequestMetricsMiddleware)
 
 # Shutdown event
 @app.on_event("shutdown")
@@ -113,6 +530,22 @@ async def shutdown_event():
     """Cleanup tasks on shutdown"""
     logger.info("🔄 Shutting down AI service...")
     
+    # A warm-up still running would keep using the engines torn down below
+    warmup_task = service_state['warmup_task']
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+        await asyncio.gather(warmup_task, return_exceptions=True)
+    
+    # Stop job workers first; interrupted jobs rerun after a restart
+    if job_manager:
+        await job_manager.stop()
+    
+    # Stop OCR executors, schedulers and worker processes
+    if ocr_engine:
+        ocr_engine.cleanup()
+    
+    tracer.close()
+    
     # Cleanup temporary files
     import shutil
     temp_dir = Path("temp")
@@ -127,6 +560,7 @@ async def shutdown_event():
 async def health_check():
     """Health check endpoint"""
     services_status = {}
+    details = {}
     
     # Check OCR engine
     if ocr_engine and ocr_engine.is_initialized:
@@ -134,6 +568,29 @@ async def health_check():
     else:
         services_status["ocr"] = "unhealthy"
     
+    # Check OCR worker processes
+    worker_pool = getattr(ocr_engine.backends.get('easyocr'), 'worker_pool', None) if ocr_engine else None
+    if worker_pool:
+        worker_status = worker_pool.get_status()
+        details["ocr_workers"] = worker_status
+        if worker_status["healthy_workers"] == worker_status["num_workers"]:
+            services_status["ocr_workers"] = "healthy"
+        elif worker_status["healthy_workers"] > 0:
+            services_status["ocr_workers"] = "degraded"
+        else:
+            services_status["ocr_workers"] = "unhealthy"
+    
+    # Report result cache effectiveness
+    if result_cache:
+        details["result_cache"] = result_cache.get_stats()
+    
+    # Report per-engine admission queues
+    if admission:
+        details["admission"] = admission.get_status()
+    
+    if job_manager:
+        details["jobs"] = await job_manager.get_stats()
+    
     # Check image processor
     if image_processor:
         services_status["image_processor"] = "healthy"
@@ -146,108 +603,457 @@ async def health_check():
     else:
         services_status["similarity_matcher"] = "unhealthy"
     
-    overall_status = "healthy" if all(
-        status == "healthy" for status in services_status.values()
-    ) else "unhealthy"
+    if all(status == "healthy" for status in services_status.values()):
+        overall_status = "healthy"
+    elif all(status in ("healthy", "degraded") for status in services_status.values()):
+        overall_status = "degraded"
+    else:
+        overall_status = "unhealthy"
     
     return HealthResponse(
         status=overall_status,
         timestamp=datetime.now().isoformat(),
         services=services_status,
-        version="1.0.0"
+        version="1.0.0",
+        details=details
     )
 
+# Prometheus metrics endpoint
+@app.get("/metrics")
+async def metrics_endpoint():
+    """
+    Service metrics in the Prometheus text format: stage and engine latency
+    histograms, queue depths, active requests, cache hit rates, fallbacks
+    and errors
+    """
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+# Liveness probe: the process is up and serving requests
+@app.get("/health/live")
+async def liveness_check():
+    return {"status": "alive", "pid": os.getpid(), "timestamp": datetime.now().isoformat()}
+
+# Readiness probe: services initialized and warmed up
+@app.get("/health/ready")
+async def readiness_check():
+    body = {
+        "status": "ready" if service_state['ready'] else "not_ready",
+        "pid": os.getpid(),
+        "warmup_ms": service_state['warmup_ms'],
+        "error": service_state['error'],
+        "timestamp": datetime.now().isoformat()
+    }
+    return JSONResponse(status_code=200 if service_state['ready'] else 503, content=body)
+
 # Main analysis endpoint
 @app.post("/analyze", response_model=AnalysisResult)
 async def analyze_image(
+    request: Request,
     image: UploadFile = File(..., description="IC image to analyze"),
-    ocr_engine_type: str = Form("easyocr", description="OCR engine to use"),
+    ocr_engine_type: str = Form("easyocr", description="OCR engine to use: easyocr, tesseract, ensemble, cascade or auto"),
     inspection_id: str = Form(..., description="Inspection ID from backend"),
-    background_tasks: BackgroundTasks = BackgroundTasks()
+    preset: Optional[str] = Form(None, description="Preprocessing preset name"),
+    skip_quality_gate: bool = Form(False, description="Run OCR even on images the quality gate rejects"),
+    localize: Optional[bool] = Form(None, description="OCR only the detected marking regions"),
+    tiling: Optional[bool] = Form(None, description="OCR at full resolution in tiles (default: by image size)"),
+    trace: bool = Form(False, description="Include per-stage spans in the response"),
+    deadline_ms: Optional[float] = Form(None, description="Give up unless OCR can start within this many ms (overrides X-Deadline-Ms)")
 ):
     """
     Analyze IC marking image and extract text with confidence scores
-    """
-    start_time = datetime.now()
     
+    Returns 429 when the engine's queue is full and 503 when the deadline
+    cannot be met, both with a Retry-After header. Work still queued is
+    cancelled if the client disconnects.
+    """
     if not image.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
     
     if not ocr_engine or not image_processor:
         raise HTTPException(status_code=503, detail="AI services not initialized")
     
-    temp_file_path = None
+    options = build_analysis_options(
+        ocr_engine_type=ocr_engine_type,
+        preset=preset,
+        quality_gate=not skip_quality_gate,
+        localize=localize,
+        tiling=tiling
+    )
     
+    # Admit before decoding anything, so overload is rejected cheaply
+    deadline = request_deadline(request, deadline_ms)
     try:
+        ticket = admission.admit(admission_engines(options), deadline)
+    except AdmissionRejected as e:
+        raise admission_error(e)
+    
+    with ticket:
         # Read image data
         image_data = await image.read()
         
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_file:
-            temp_file.write(image_data)
-            temp_file_path = temp_file.name
-        
-        # Load image with OpenCV
-        cv_image = cv2.imread(temp_file_path)
-        if cv_image is None:
-            raise HTTPException(status_code=400, detail="Unable to load image")
-        
-        # Step 1: Preprocess image
-        logger.info(f"📸 Processing image for inspection {inspection_id}")
-        processed_image, preprocessing_steps, quality_metrics = await image_processor.process_image(
-            cv_image,
-            auto_enhance=True,
-            target_size=(1024, 768)
+        return await run_until_disconnected(
+            request,
+            run_analysis(image_data, inspection_id, options, include_trace=trace)
         )
-        
-        # Step 2: OCR text extraction
-        logger.info(f"🔍 Extracting text using {ocr_engine_type}")
-        ocr_results = await ocr_engine.extract_text(
-            processed_image,
-            engine=ocr_engine_type,
-            min_confidence=0.1
+
+def request_deadline(request: Request, deadline_ms: Optional[float]) -> Optional[float]:
+    """time.monotonic() deadline from the form field, the X-Deadline-Ms header or the default"""
+    if deadline_ms is None:
+        header = request.headers.get("x-deadline-ms")
+        try:
+            deadline_ms = float(header) if header else DEFAULT_DEADLINE_MS
+        except ValueError:
+            raise HTTPException(status_code=400, detail="X-Deadline-Ms must be a number of milliseconds")
+    
+    if deadline_ms <= 0:
+        return None
+    return time.monotonic() + deadline_ms / 1000.0
+
+def admission_engines(options: AnalysisOptions) -> List[str]:
+    """
+    Engines an analysis runs for sure, each of which must admit it up front
+    
+    Auto routing admits nothing here: the engine the router picks (and the
+    accurate one on escalation) is admitted when its OCR slot is taken.
+    """
+    if options.ocr_engine_type in ENSEMBLE_MODES:
+        return list(ocr_engine.backends)
+    if options.ocr_engine_type == 'auto':
+        return []
+    return [options.ocr_engine_type]
+
+def admission_error(error: AdmissionRejected) -> HTTPException:
+    """429 for a full queue, 503 for a deadline that cannot be met; both say when to retry"""
+    admission_rejections_total.inc(engine=error.engine, reason=error.reason)
+    logger.warning(f"🚦 Request rejected: {error}")
+    return HTTPException(
+        status_code=429 if error.reason == 'queue_full' else 503,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+async def run_until_disconnected(request: Request, work: Any) -> Any:
+    """
+    Await work, cancelling it if the client disconnects first
+    
+    Cancellation releases the request's queue places and drops OCR calls
+    that have not started; an OCR call already running in a thread finishes
+    on its own.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                logger.info(f"🔌 Client disconnected, cancelled {request.url.path}")
+                # Nobody is left to read it; 499 marks the request in metrics and logs
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        task.cancel()
+
+def build_analysis_options(**fields) -> AnalysisOptions:
+    """Validate per-request analysis options, falling back to defaults for unset fields"""
+    options = AnalysisOptions(**{key: value for key, value in fields.items() if value is not None})
+    
+    if options.preset not in PRESETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown preset '{options.preset}'. Available: {', '.join(PRESETS)}"
         )
-        
-        # Step 3: Post-process results
-        extracted_text = ocr_results.get('text', '').strip()
-        confidence = ocr_results.get('confidence', 0.0)
-        bounding_boxes = ocr_results.get('bounding_boxes', [])
-        alternatives = ocr_results.get('alternatives', [])
+    
+    engine_types = tuple(ocr_engine.backends) + ENSEMBLE_MODES + ('auto',)
+    if options.ocr_engine_type not in engine_types:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown OCR engine '{options.ocr_engine_type}'. Available: {', '.join(engine_types)}"
+        )
+    
+    # Without both routed engines enabled, auto means the primary engine
+    if options.ocr_engine_type == 'auto' and not engine_router:
+        options.ocr_engine_type = ocr_engine.primary_engine
+    
+    return options
+
+async def run_analysis(image_data: bytes, inspection_id: str, options: AnalysisOptions,
+                       include_trace: bool = False) -> AnalysisResult:
+    """Run the decode -> preprocess -> OCR pipeline on raw image bytes, as one trace"""
+    with tracer.trace("analyze", inspection_id=inspection_id) as root:
+        root.set_attributes(engine=options.ocr_engine_type, preset=options.preset, bytes=len(image_data))
+        result = await run_traced_analysis(image_data, inspection_id, options)
+        root.set_attributes(status=result.status, cached=result.cached, confidence=result.ocr_confidence)
+    
+    result.trace_id = root.trace.trace_id
+    if include_trace:
+        result.trace = root.trace.to_list()
+    return result
+
+async def run_traced_analysis(image_data: bytes, inspection_id: str, options: AnalysisOptions) -> AnalysisResult:
+    start_time = datetime.now()
+    
+    try:
+        if result_cache:
+            # Identical uploads with identical settings share one computation
+            preprocessing = {
+                'target_size': ANALYSIS_TARGET_SIZE,
+                'pipeline': image_processor.get_pipeline(options.preset).describe(),
+                'quality_gate': quality_gate.thresholds if quality_gate and options.quality_gate else None,
+                'localize': options.localize,
+                'tiling': [options.tiling, TILING_MIN_PIXELS, TILE_SIZE, TILE_OVERLAP]
+            }
+            if options.ocr_engine_type == 'cascade':
+                preprocessing['cascade_exit_confidence'] = ocr_engine.cascade_exit_confidence
+            elif options.ocr_engine_type == 'auto':
+                preprocessing['router_policy'] = engine_router.policy
+            cache_key = result_cache.make_key(
+                image_data, options.ocr_engine_type, preprocessing, OCR_MIN_CONFIDENCE
+            )
+            with span("result_cache") as cache_span:
+                analysis, cached = await result_cache.get_or_compute(
+                    cache_key,
+                    lambda: analyze_image_data(image_data, inspection_id, options)
+                )
+                cache_span.set_attribute('cached', cached)
+            if cached:
+                # Timings describe the original computation, not this request
+                analysis = {**analysis, 'stage_timings': {}}
+        else:
+            analysis = await analyze_image_data(image_data, inspection_id, options)
+            cached = False
         
         # Calculate processing time
         processing_time = (datetime.now() - start_time).total_seconds()
+        record_analysis_metrics(analysis, options, cached)
         
-        # Schedule cleanup of temporary file
-        background_tasks.add_task(cleanup_temp_file, temp_file_path)
-        
-        logger.info(f"✅ Analysis complete for {inspection_id}: '{extracted_text}' (confidence: {confidence:.2f})")
+        if analysis['status'] == 'retake':
+            logger.info(f"📷 Retake requested for {inspection_id}: {', '.join(analysis['retake_reasons'])}")
+        else:
+            logger.info(f"✅ Analysis complete for {inspection_id}: '{analysis['extracted_text']}' "
+                        f"(confidence: {analysis['ocr_confidence']:.2f}{', cached' if cached else ''})")
         
         return AnalysisResult(
             inspection_id=inspection_id,
-            extracted_text=extracted_text,
-            ocr_confidence=confidence,
-            bounding_boxes=bounding_boxes,
-            alternatives=alternatives,
-            preprocessing_steps=preprocessing_steps,
             processing_time=processing_time,
-            image_quality_metrics=quality_metrics
+            cached=cached,
+            **analysis
         )
-        
+    
+    except HTTPException:
+        raise
+    except AdmissionRejected as e:
+        raise admission_error(e)
     except Exception as e:
+        analyses_total.inc(engine=options.ocr_engine_type, preset=options.preset, status="error")
         logger.error(f"❌ Analysis failed for {inspection_id}: {e}")
-        
-        # Cleanup temp file on error
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
-        
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+def record_analysis_metrics(analysis: Dict[str, Any], options: AnalysisOptions, cached: bool):
+    """Count the analysis outcome and observe its stage timings"""
+    engine, preset = options.ocr_engine_type, options.preset
+    analyses_total.inc(engine=engine, preset=preset, status="cached" if cached else analysis['status'])
+    
+    # Cached results carry no timings: nothing ran for this request
+    for stage, ms in analysis.get('stage_timings', {}).items():
+        analysis_stage_seconds.observe(ms / 1000.0, stage=stage, engine=engine, preset=preset)
+
+async def analyze_image_data(image_data: bytes, inspection_id: str, options: AnalysisOptions) -> Dict[str, Any]:
+    """Decode, preprocess and OCR one image; returns the cacheable part of AnalysisResult"""
+    stage_timings = {}
+    
+    tiled = options.tiling
+    if tiled is None:
+        dimensions = image_processor.read_image_dimensions(image_data)
+        tiled = bool(dimensions) and dimensions[0] * dimensions[1] >= TILING_MIN_PIXELS
+    
+    # Decode in memory, dropping resolution we would resize away anyway.
+    # Tiled frames keep full resolution, decoded as grayscale to save memory.
+    # The CPU-bound stages below run in worker threads, keeping the event loop free.
+    stage_start = time.perf_counter()
+    try:
+        if tiled:
+            cv_image = await asyncio.to_thread(image_processor.decode_image, image_data, grayscale=True)
+        else:
+            cv_image = await asyncio.to_thread(image_processor.decode_image, image_data, target_size=ANALYSIS_TARGET_SIZE)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Unable to load image")
+    stage_timings['decode'] = elapsed_ms(stage_start)
+    
+    # Reject unreadable frames before spending preprocessing and OCR on them
+    if quality_gate and options.quality_gate:
+        stage_start = time.perf_counter()
+        with span("quality_gate") as gate_span:
+            verdict = await asyncio.to_thread(quality_gate.evaluate, cv_image)
+            gate_span.set_attribute('passed', verdict['passed'])
+        stage_timings['quality_gate'] = elapsed_ms(stage_start)
+        
+        if not verdict['passed']:
+            return {
+                'extracted_text': '',
+                'ocr_confidence': 0.0,
+                'image_quality_metrics': verdict['metrics'],
+                'stage_timings': stage_timings,
+                'status': 'retake',
+                'retake_reasons': verdict['reasons']
+            }
+    
+    if tiled:
+        return await analyze_tiled(cv_image, inspection_id, options, stage_timings)
+    
+    # Step 1: Preprocess image
+    logger.info(f"📸 Processing image for inspection {inspection_id}")
+    stage_start = time.perf_counter()
+    preprocess_timings = {}
+    processed_image, preprocessing_steps, quality_metrics = await image_processor.process_image(
+        cv_image,
+        auto_enhance=True,
+        target_size=ANALYSIS_TARGET_SIZE,
+        preset=options.preset,
+        timings=preprocess_timings
+    )
+    stage_timings['preprocess'] = elapsed_ms(stage_start)
+    stage_timings.update({f"preprocess.{stage}": ms for stage, ms in preprocess_timings.items()})
+    
+    # Step 2: Optionally narrow OCR down to the marking regions
+    text_regions = []
+    if options.localize and text_localizer:
+        stage_start = time.perf_counter()
+        with span("localize") as localize_span:
+            text_regions = await asyncio.to_thread(text_localizer.locate, processed_image)
+            localize_span.set_attribute('regions', len(text_regions))
+        stage_timings['localize'] = elapsed_ms(stage_start)
+    
+    # Step 3: OCR text extraction, once the engine has a free slot (auto routing takes its own)
+    stage_start = time.perf_counter()
+    async with ocr_slot(*admission_engines(options)):
+        stage_timings['ocr_queue'] = elapsed_ms(stage_start)
+        logger.info(f"🔍 Extracting text using {options.ocr_engine_type}"
+                    f"{f' on {len(text_regions)} regions' if text_regions else ''}")
+        stage_start = time.perf_counter()
+        with span("ocr", engine=options.ocr_engine_type) as ocr_span:
+            if options.ocr_engine_type == 'auto':
+                ocr_results = await extract_routed(processed_image, text_regions, quality_metrics)
+            else:
+                ocr_results = await extract_with_engine(processed_image, text_regions, options.ocr_engine_type)
+            ocr_span.set_attributes(engine_used=ocr_results.get('engine_used', ''), confidence=ocr_results.get('confidence', 0.0))
+        stage_timings['ocr'] = elapsed_ms(stage_start)
+    
+    # Step 4: Post-process results
+    return {
+        'extracted_text': ocr_results.get('text', '').strip(),
+        'ocr_confidence': ocr_results.get('confidence', 0.0),
+        'bounding_boxes': ocr_results.get('bounding_boxes', []),
+        'alternatives': ocr_results.get('alternatives', []),
+        'preprocessing_steps': preprocessing_steps,
+        'image_quality_metrics': quality_metrics,
+        'stage_timings': stage_timings,
+        'status': 'ok',
+        'text_regions': text_regions,
+        'engine_used': ocr_results.get('engine_used', '')
+    }
+
+async def extract_with_engine(image: np.ndarray, text_regions: List[Dict[str, int]], engine: str) -> Dict[str, Any]:
+    """OCR the whole image or its text regions, feeding single-engine outcomes to the router"""
+    started = time.perf_counter()
+    if text_regions:
+        ocr_results = await ocr_engine.extract_text_regions(
+            image,
+            text_regions,
+            engine=engine,
+            min_confidence=OCR_MIN_CONFIDENCE
+        )
+    else:
+        ocr_results = await ocr_engine.extract_text(
+            image,
+            engine=engine,
+            min_confidence=OCR_MIN_CONFIDENCE
+        )
+    
+    if engine_router and ocr_results.get('engine_used') in ocr_engine.backends:
+        engine_router.record(ocr_results['engine_used'], elapsed_ms(started), ocr_results.get('confidence', 0.0))
+    
+    return ocr_results
+
+async def extract_routed(image: np.ndarray, text_regions: List[Dict[str, int]],
+                         quality_metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Let the router pick the engine, escalating weak fast-engine results"""
+    with span("route") as route_span:
+        decision = engine_router.choose(quality_metrics)
+        route_span.set_attributes(engine=decision['engine'], reason=decision['reason'])
+    engine = decision['engine']
+    logger.info(f"🧭 Routed to {engine} ({decision['reason']})")
+    async with ocr_slot(engine):
+        ocr_results = await extract_with_engine(image, text_regions, engine)
+    
+    if engine_router.should_escalate(engine, ocr_results):
+        # The accurate engine's slot is only taken when a result needs it
+        async with ocr_slot(engine_router.accurate_engine):
+            escalated = await extract_with_engine(image, text_regions, engine_router.accurate_engine)
+        engine_router.note_escalation(decision, engine_router.accurate_engine)
+        if escalated.get('confidence', 0.0) >= ocr_results.get('confidence', 0.0):
+            ocr_results = escalated
+    
+    return ocr_results
+
+async def analyze_tiled(cv_image: np.ndarray, inspection_id: str, options: AnalysisOptions,
+                        stage_timings: Dict[str, float]) -> Dict[str, Any]:
+    """OCR a full-resolution frame tile by tile, preprocessing each tile on its own"""
+    pipeline = image_processor.get_pipeline(options.preset)
+    preprocess_ms = []
+    
+    async def preprocess_tile(tile: np.ndarray) -> np.ndarray:
+        started = time.perf_counter()
+        # No target size: stages must keep the tile geometry so boxes map back
+        processed, _, _ = await asyncio.to_thread(pipeline.run, tile, None, True)
+        preprocess_ms.append(elapsed_ms(started))
+        return processed
+    
+    height, width = cv_image.shape[:2]
+    logger.info(f"🧩 Tiled OCR for inspection {inspection_id}: {width}x{height} frame, "
+                f"{TILE_SIZE}px tiles, {TILE_OVERLAP}px overlap")
+    # Tiles have no per-frame layout features, so auto routing uses the accurate engine
+    engine = engine_router.accurate_engine if options.ocr_engine_type == 'auto' else options.ocr_engine_type
+    stage_start = time.perf_counter()
+    async with ocr_slot(*(ocr_engine.backends if engine in ENSEMBLE_MODES else [engine])):
+        stage_timings['ocr_queue'] = elapsed_ms(stage_start)
+        stage_start = time.perf_counter()
+        ocr_results = await ocr_engine.extract_text_tiled(
+            cv_image,
+            engine=engine,
+            min_confidence=OCR_MIN_CONFIDENCE,
+            tile_size=TILE_SIZE,
+            overlap=TILE_OVERLAP,
+            max_concurrency=TILE_CONCURRENCY,
+            preprocess=preprocess_tile
+        )
+        stage_timings['tiled_ocr'] = elapsed_ms(stage_start)
+    stage_timings['preprocess'] = round(sum(preprocess_ms), 3)
+    
+    return {
+        'extracted_text': ocr_results.get('text', '').strip(),
+        'ocr_confidence': ocr_results.get('confidence', 0.0),
+        'bounding_boxes': ocr_results.get('bounding_boxes', []),
+        'alternatives': ocr_results.get('alternatives', []),
+        'preprocessing_steps': [f"tiled_{ocr_results.get('tiles', 0)}x{TILE_SIZE}px", f"preset_{options.preset}"],
+        'image_quality_metrics': {'width': width, 'height': height},
+        'stage_timings': stage_timings,
+        'status': 'ok',
+        'tiles': ocr_results.get('tiles', 0),
+        'engine_used': ocr_results.get('engine_used', '')
+    }
+
+def elapsed_ms(started: float) -> float:
+    """Milliseconds since a time.perf_counter() reading"""
+    return round((time.perf_counter() - started) * 1000.0, 3)
+
 # Text similarity endpoint
 @app.post("/similarity")
 async def calculate_similarity(
     text1: str = Form(..., description="First text for comparison"),
     text2: str = Form(..., description="Second text for comparison"),
-    method: str = Form("rapidfuzz", description="Similarity method to use")
+    method: str = Form("rapidfuzz", description="Similarity method to use"),
+    inspection_id: Optional[str] = Form(None, description="Inspection ID to trace this comparison under")
 ):
     """
     Calculate similarity between two text strings
@@ -256,9 +1062,12 @@ async def calculate_similarity(
         raise HTTPException(status_code=503, detail="Similarity matcher not initialized")
     
     try:
-        similarity_score = similarity_matcher.calculate_similarity(
-            text1, text2, method=method
-        )
+        start_time = time.perf_counter()
+        with tracer.trace("compare", inspection_id=inspection_id) if inspection_id else nullcontext():
+            similarity_score = similarity_matcher.calculate_similarity(
+                text1, text2, method=method
+            )
+        matching_seconds.observe(time.perf_counter() - start_time, operation="similarity", method=method)
         
         return {
             "text1": text1,
@@ -267,53 +1076,447 @@ async def calculate_similarity(
             "similarity": similarity_score,
             "timestamp": datetime.now().isoformat()
         }
-        
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Similarity calculation failed: {str(e)}")
 
-# Batch analysis endpoint (for future use)
+# Bulk similarity endpoint
+@app.post("/similarity/matrix")
+async def similarity_matrix(request: SimilarityMatrixRequest):
+    """
+    Score many texts at once: queries against references (or the OEM catalog)
+    
+    Returns the full matrix, or the top_k references per query. format 'json'
+    returns nested lists; 'npy' returns the full matrix as a float32 .npy file;
+    'npz' returns a .npz archive ('matrix', or 'indices' and 'scores').
+    Top-k slots without a reference reaching min_score have index -1 and are
+    left out of the JSON 'matches'.
+    """
+    if not similarity_matcher:
+        raise HTTPException(status_code=503, detail="Similarity matcher not initialized")
+    
+    if request.method not in SCORERS:
+        raise HTTPException(status_code=400, detail=f"Unknown method '{request.method}'. Available: {', '.join(SCORERS)}")
+    if request.format not in ("json", "npy", "npz"):
+        raise HTTPException(status_code=400, detail="format must be one of: json, npy, npz")
+    if request.top_k is not None and request.top_k <= 0:
+        raise HTTPException(status_code=400, detail="top_k must be positive")
+    if request.format == "npy" and request.top_k:
+        raise HTTPException(status_code=400, detail="npy holds a single array; use npz for top_k results")
+    
+    if request.references is not None:
+        references = request.references
+    elif marking_catalog:
+        references = marking_catalog.references
+    else:
+        raise HTTPException(status_code=400, detail="No references given and no OEM marking catalog loaded")
+    
+    if not request.top_k and len(request.queries) * len(references) > SIMILARITY_MATRIX_MAX_CELLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Matrix of {len(request.queries)}x{len(references)} exceeds {SIMILARITY_MATRIX_MAX_CELLS} cells; request top_k"
+        )
+    
+    try:
+        start_time = time.perf_counter()
+        
+        # cdist releases the GIL and fans out over its own worker threads
+        if request.top_k:
+            indices, scores = await asyncio.to_thread(
+                similarity_matcher.top_k_matrix,
+                request.queries, references, request.top_k, request.method, request.min_score,
+                SIMILARITY_MATRIX_MAX_CELLS
+            )
+            arrays = {"indices": indices, "scores": scores}
+        else:
+            matrix = await asyncio.to_thread(
+                similarity_matcher.similarity_matrix,
+                request.queries, references, request.method, request.min_score
+            )
+            arrays = {"matrix": matrix}
+        
+        processing_time_ms = elapsed_ms(start_time)
+        matching_seconds.observe(processing_time_ms / 1000.0, operation="similarity_matrix", method=request.method)
+        
+        if request.format != "json":
+            buffer = io.BytesIO()
+            if request.format == "npy":
+                np.save(buffer, arrays["matrix"])
+            else:
+                np.savez(buffer, **arrays)
+            return Response(
+                content=buffer.getvalue(),
+                media_type="application/octet-stream",
+                headers={
+                    "X-Matrix-Shape": ",".join(str(size) for size in next(iter(arrays.values())).shape),
+                    "X-Processing-Time-Ms": str(processing_time_ms)
+                }
+            )
+        
+        result = {
+            "method": request.method,
+            "shape": list(next(iter(arrays.values())).shape),
+            "processing_time_ms": processing_time_ms,
+            "timestamp": datetime.now().isoformat()
+        }
+        if request.top_k:
+            texts = references.texts if hasattr(references, "texts") else references
+            result["indices"] = indices.tolist()
+            result["scores"] = scores.tolist()
+            result["matches"] = [[texts[index] for index in row if index >= 0] for row in indices]
+        else:
+            result["matrix"] = matrix.tolist()
+        return result
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Similarity matrix failed: {str(e)}")
+
+# OEM marking lookup endpoint
+@app.post("/match")
+async def match_marking(
+    text: str = Form(..., description="Text to look up, e.g. OCR output"),
+    limit: int = Form(5, description="Number of matches to return"),
+    method: str = Form("rapidfuzz", description="Similarity method to use"),
+    min_score: float = Form(0.0, description="Minimum similarity (0.0-1.0)"),
+    inspection_id: Optional[str] = Form(None, description="Inspection ID to trace this lookup under")
+):
+    """
+    Find the OEM catalog markings most similar to a text
+    """
+    if not marking_catalog:
+        raise HTTPException(status_code=503, detail="OEM marking catalog not loaded (set OEM_REFERENCE_PATH)")
+    
+    try:
+        start_time = time.perf_counter()
+        with tracer.trace("match", inspection_id=inspection_id) if inspection_id else nullcontext():
+            matches, candidates, match_type = marking_catalog.search(text, limit=limit, method=method, score_cutoff=min_score)
+        processing_time_ms = elapsed_ms(start_time)
+        matching_seconds.observe(processing_time_ms / 1000.0, operation="match", method=method)
+        
+        return {
+            "text": text,
+            "method": method,
+            "match_type": match_type,
+            "matches": [{"marking": marking, "similarity": score} for marking, score in matches],
+            "candidates_scored": candidates,
+            "catalog_size": len(marking_catalog),
+            "processing_time_ms": processing_time_ms,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Marking lookup failed: {str(e)}")
+
+@app.get("/match/stats")
+async def match_stats():
+    """
+    OEM catalog lookup counters: exact (folded-key) hits vs fuzzy fallbacks
+    """
+    if not marking_catalog:
+        raise HTTPException(status_code=503, detail="OEM marking catalog not loaded (set OEM_REFERENCE_PATH)")
+    
+    return {
+        **marking_catalog.get_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+# Batch analysis endpoint
 @app.post("/analyze/batch")
 async def analyze_batch(
     images: List[UploadFile] = File(..., description="List of IC images to analyze"),
-    background_tasks: BackgroundTasks = BackgroundTasks()
+    ocr_engine_type: str = Form("easyocr", description="OCR engine to use: easyocr, tesseract, ensemble, cascade or auto"),
+    preset: Optional[str] = Form(None, description="Preprocessing preset name"),
+    max_concurrency: Optional[int] = Form(None, description="Images analyzed in parallel")
 ):
     """
-    Analyze multiple IC images in batch
+    Analyze multiple IC images concurrently, streaming results as NDJSON
+    
+    Each line is emitted as soon as its image finishes, so one slow image
+    does not hold back the rest of the tray. The last line is a summary.
     """
-    if len(images) > 10:
-        raise HTTPException(status_code=400, detail="Maximum 10 images per batch")
+    if len(images) > BATCH_MAX_IMAGES:
+        raise HTTPException(status_code=400, detail=f"Maximum {BATCH_MAX_IMAGES} images per batch")
+    
+    if not ocr_engine or not image_processor:
+        raise HTTPException(status_code=503, detail="AI services not initialized")
+    
+    options = build_analysis_options(ocr_engine_type=ocr_engine_type, preset=preset)
     
-    results = []
+    concurrency = min(max_concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    if concurrency < 1:
+        raise HTTPException(status_code=400, detail="max_concurrency must be at least 1")
     
+    # Upload files are closed once this handler returns, so read them up front
+    batch_id = f"batch-{datetime.now().timestamp()}"
+    payloads = []
     for i, image in enumerate(images):
+        is_image = bool(image.content_type and image.content_type.startswith("image/"))
+        payloads.append((i, image.filename, is_image, await image.read()))
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def _analyze_one(index: int, filename: str, is_image: bool, image_data: bytes) -> Dict[str, Any]:
+        line = {"index": index, "filename": filename}
+        if not is_image:
+            line["error"] = "File must be an image"
+            return line
+        
+        async with semaphore:
+            try:
+                # The batch bounds its own concurrency, so it queues without a
+                # size limit, but still shares the engines' OCR slots
+                with admission.admit(admission_engines(options), bounded=False):
+                    result = await run_analysis(image_data, f"{batch_id}-{index}", options)
+                line["result"] = result.model_dump()
+            except HTTPException as e:
+                line["error"] = e.detail
+            except Exception as e:
+                line["error"] = str(e)
+        return line
+    
+    async def _stream_results():
+        tasks = [asyncio.create_task(_analyze_one(*payload)) for payload in payloads]
+        successful = 0
+        
         try:
-            # Process each image (simplified version)
-            result = await analyze_image(
-                image=image,
-                inspection_id=f"batch-{datetime.now().timestamp()}-{i}",
-                background_tasks=background_tasks
-            )
-            results.append(result)
+            for task in asyncio.as_completed(tasks):
+                line = await task
+                if "error" not in line:
+                    successful += 1
+                yield json.dumps(line) + "\n"
+        finally:
+            # Client went away mid-stream: stop the remaining work
+            for task in tasks:
+                task.cancel()
+        
+        yield json.dumps({
+            "summary": {
+                "total_images": len(payloads),
+                "successful": successful,
+                "failed": len(payloads) - successful,
+                "max_concurrency": concurrency,
+                "timestamp": datetime.now().isoformat()
+            }
+        }) + "\n"
+    
+    return StreamingResponse(_stream_results(), media_type="application/x-ndjson")
+
+# Asynchronous analysis jobs
+@app.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(
+    image: UploadFile = File(..., description="IC image to analyze"),
+    ocr_engine_type: str = Form("easyocr", description="OCR engine to use: easyocr, tesseract, ensemble, cascade or auto"),
+    inspection_id: str = Form(..., description="Inspection ID from backend"),
+    preset: Optional[str] = Form(None, description="Preprocessing preset name"),
+    skip_quality_gate: bool = Form(False, description="Run OCR even on images the quality gate rejects"),
+    localize: Optional[bool] = Form(None, description="OCR only the detected marking regions"),
+    tiling: Optional[bool] = Form(None, description="OCR at full resolution in tiles (default: by image size)")
+):
+    """
+    Queue an analysis and return its job id right away
+    
+    Same fields as /analyze. Poll GET /jobs/{job_id}, or follow
+    GET /jobs/{job_id}/events, for the result.
+    """
+    if not image.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File must be an image")
+    
+    if not job_manager:
+        raise HTTPException(status_code=503, detail="AI services not initialized")
+    
+    options = build_analysis_options(
+        ocr_engine_type=ocr_engine_type,
+        preset=preset,
+        quality_gate=not skip_quality_gate,
+        localize=localize,
+        tiling=tiling
+    )
+    
+    try:
+        job = await job_manager.submit(await image.read(), inspection_id, options.model_dump())
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=f"Job queue is full: {e}", headers={"Retry-After": "30"})
+    
+    logger.info(f"📥 Queued job {job['id']} for inspection {inspection_id}")
+    return job_status(job)
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """Job status, with the analysis result once done"""
+    job = await job_manager.get(job_id) if job_manager else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job_status(job)
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Server-sent events for one job: a 'status' event on every change and
+    a final 'done' or 'failed' event carrying the full job
+    """
+    job = await job_manager.get(job_id) if job_manager else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    
+    async def _stream_events():
+        async for job in job_manager.watch(job_id):
+            if job is None:
+                # Comment line: keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            event = job['status'] if job['status'] in FINISHED_STATES else "status"
+            yield f"event: {event}\ndata: {job_status(job).model_dump_json()}\n\n"
+    
+    return StreamingResponse(
+        _stream_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def job_status(job: Dict[str, Any]) -> JobStatus:
+    def _iso(timestamp: Optional[float]) -> Optional[str]:
+        return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+    
+    return JobStatus(
+        job_id=job['id'],
+        status=job['status'],
+        inspection_id=job['inspection_id'],
+        created_at=_iso(job['created_at']),
+        started_at=_iso(job['started_at']),
+        finished_at=_iso(job['finished_at']),
+        expires_at=_iso(job['expires_at']),
+        attempts=job['attempts'],
+        result=job['result'],
+        error=job['error']
+    )
+
+async def run_job(job: Dict[str, Any], image_data: bytes) -> Dict[str, Any]:
+    """JobManager handler: one analysis, through the same pipeline and OCR slots as /analyze"""
+    options = AnalysisOptions(**job['options'])
+    try:
+        # The job queue is bounded on its own, so jobs skip the admission queue limit
+        with admission.admit(admission_engines(options), bounded=False):
+            result = await run_analysis(image_data, job['inspection_id'], options)
+    except HTTPException as e:
+        raise RuntimeError(e.detail)
+    
+    logger.info(f"📤 Job {job['id']} finished for inspection {job['inspection_id']}")
+    return result.model_dump()
+
+# Live camera stream endpoint
+@app.websocket("/stream")
+async def stream_frames(websocket: WebSocket):
+    """
+    Inspect one chip position from a live stream of camera frames
+    
+    Query parameters: inspection_id (required), ocr_engine_type, preset,
+    localize, and acks=true for a 'frame' message per frame.
+    
+    Send frames as binary messages (JPEG, PNG, ...). Frames that are still
+    moving or have not changed skip OCR. The server sends JSON messages:
+    'reading' per OCR'd frame, 'result' once the readings agree (again if
+    they settle on a different text), 'error', and a 'summary' in reply to
+    {"type": "end"}. Send {"type": "reset"} when a new chip takes the
+    position.
+    """
+    await websocket.accept()
+    params = websocket.query_params
+    inspection_id = params.get("inspection_id")
+    
+    try:
+        if not ocr_engine or not image_processor:
+            raise HTTPException(status_code=503, detail="AI services not initialized")
+        if not inspection_id:
+            raise HTTPException(status_code=400, detail="inspection_id query parameter is required")
+        options = build_analysis_options(
+            ocr_engine_type=params.get("ocr_engine_type", "easyocr"),
+            preset=params.get("preset"),
+            localize=params["localize"].lower() == "true" if "localize" in params else None,
+            # Camera frames are read whole; tiling is for single high-resolution uploads
+            tiling=False
+        )
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "detail": e.detail})
+        await websocket.close(code=1008)
+        return
+    
+    session = StreamSession(
+        decode=lambda data: image_processor.decode_image(data, target_size=STREAM_CHECK_SIZE, grayscale=True),
+        analyze=lambda data, frame: analyze_stream_frame(data, inspection_id, options, frame),
+        send=websocket.send_json,
+        detector=FrameChangeDetector(
+            pixel_threshold=STREAM_PIXEL_THRESHOLD,
+            motion_fraction=STREAM_MOTION_FRACTION,
+            change_fraction=STREAM_CHANGE_FRACTION
+        ),
+        consensus=TemporalConsensus(
+            window=STREAM_CONSENSUS_WINDOW,
+            min_votes=STREAM_CONSENSUS_MIN_VOTES,
+            min_share=STREAM_CONSENSUS_MIN_SHARE,
+            key=similarity_matcher.fold_text if similarity_matcher else None
+        ),
+        ocr_interval=STREAM_OCR_INTERVAL
+    )
+    acks = params.get("acks", "false").lower() == "true"
+    
+    logger.info(f"🎥 Stream opened for inspection {inspection_id} ({options.ocr_engine_type})")
+    active_streams.inc()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            if message.get("bytes") is not None:
+                verdict = await session.on_frame(message["bytes"])
+                stream_frames_total.inc(action=verdict["action"])
+                if acks or verdict["action"] == "invalid":
+                    await session.send({"type": "frame", **verdict})
+                continue
             
-        except Exception as e:
-            results.append({
-                "error": str(e),
-                "filename": image.filename
-            })
+            try:
+                control = json.loads(message.get("text") or "{}")
+            except ValueError:
+                control = {}
+            if control.get("type") == "reset":
+                session.reset()
+            elif control.get("type") == "end":
+                # Let the frame being read count towards the summary
+                await session.close(wait=True)
+                await session.send({"type": "summary", **session.summary()})
+                await websocket.close()
+                break
+            else:
+                await session.send({"type": "error", "detail": "Expected a binary frame or {\"type\": \"reset\" | \"end\"}"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        active_streams.dec()
+        await session.close()
+        summary = session.summary()
+        logger.info(f"🎬 Stream closed for inspection {inspection_id}: {summary['frames']} frames, "
+                    f"{summary['ocr']} OCR'd, result '{summary['result'] or ''}'")
+
+async def analyze_stream_frame(image_data: bytes, inspection_id: str, options: AnalysisOptions,
+                               frame: int) -> Dict[str, Any]:
+    """Full analysis of one streamed frame, traced and admitted like an /analyze request"""
+    with tracer.trace("stream_frame", inspection_id=inspection_id, frame=frame):
+        try:
+            with admission.admit(admission_engines(options)):
+                analysis = await analyze_image_data(image_data, inspection_id, options)
+        except AdmissionRejected as e:
+            raise RuntimeError(admission_error(e).detail)
+        except HTTPException as e:
+            raise RuntimeError(e.detail)
     
-    return {
-        "total_images": len(images),
-        "successful": len([r for r in results if "error" not in r]),
-        "failed": len([r for r in results if "error" in r]),
-        "results": results,
-        "timestamp": datetime.now().isoformat()
-    }
+    record_analysis_metrics(analysis, options, cached=False)
+    return analysis
 
 # Image preview endpoint
 @app.post("/preview")
 async def preview_preprocessing(
     image: UploadFile = File(..., description="IC image to preview"),
-    background_tasks: BackgroundTasks = BackgroundTasks()
+    preset: Optional[str] = Form(None, description="Preprocessing preset name")
 ):
     """
     Preview image preprocessing results
@@ -321,51 +1524,83 @@ async def preview_preprocessing(
     if not image_processor:
         raise HTTPException(status_code=503, detail="Image processor not initialized")
     
-    temp_file_path = None
+    options = build_analysis_options(preset=preset)
     
     try:
-        # Read and save image temporarily
+        # Read and decode image in memory
         image_data = await image.read()
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_file:
-            temp_file.write(image_data)
-            temp_file_path = temp_file.name
-        
-        # Load with OpenCV
-        cv_image = cv2.imread(temp_file_path)
-        if cv_image is None:
+        try:
+            cv_image = await asyncio.to_thread(image_processor.decode_image, image_data)
+        except ValueError:
             raise HTTPException(status_code=400, detail="Unable to load image")
         
         # Get preprocessing steps
+        stage_timings = {}
         processed_image, steps, quality_metrics = await image_processor.process_image(
             cv_image,
             auto_enhance=True,
-            return_intermediate=True
+            return_intermediate=True,
+            preset=options.preset,
+            timings=stage_timings
         )
         
-        # Schedule cleanup
-        background_tasks.add_task(cleanup_temp_file, temp_file_path)
-        
         return {
+            "preset": options.preset,
             "preprocessing_steps": steps,
+            "stage_timings": stage_timings,
             "quality_metrics": quality_metrics,
             "timestamp": datetime.now().isoformat()
         }
-        
+    
+    except HTTPException:
+        raise
     except Exception as e:
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
         raise HTTPException(status_code=500, detail=f"Preview failed: {str(e)}")
 
-# Utility functions
-async def cleanup_temp_file(file_path: str):
-    """Background task to cleanup temporary files"""
-    try:
-        if os.path.exists(file_path):
-            os.unlink(file_path)
-            logger.info(f"🗑️ Cleaned up temp file: {file_path}")
-    except Exception as e:
-        logger.warning(f"⚠️ Failed to cleanup temp file {file_path}: {e}")
+# Preprocessing presets endpoint
+@app.get("/presets")
+async def list_presets():
+    """
+    List available preprocessing presets and their stages
+    """
+    if not image_processor:
+        raise HTTPException(status_code=503, detail="Image processor not initialized")
+    
+    return {
+        "default": DEFAULT_PREPROCESSING_PRESET,
+        "presets": [image_processor.get_pipeline(name).describe() for name in PRESETS],
+        "timestamp": datetime.now().isoformat()
+    }
+
+# OCR engines endpoint
+@app.get("/engines")
+async def list_engines():
+    """
+    List known OCR engines and the enabled ones with their capabilities
+    """
+    if not ocr_engine:
+        raise HTTPException(status_code=503, detail="OCR engine not initialized")
+    
+    return {
+        **ocr_engine.get_engine_info(),
+        "ensemble_modes": list(ENSEMBLE_MODES) + (["auto"] if engine_router else []),
+        "timestamp": datetime.now().isoformat()
+    }
+
+# Engine router endpoint
+@app.get("/router")
+async def router_status():
+    """
+    Show the OCR engine routing policy, rolling engine stats and recent decisions
+    """
+    if not engine_router:
+        raise HTTPException(status_code=503, detail="Engine router not initialized")
+    
+    return {
+        **engine_router.get_status(),
+        "timestamp": datetime.now().isoformat()
+    }
 
 # Root endpoint
 @app.get("/")
@@ -377,10 +1612,20 @@ async def root():
         "status": "running",
         "endpoints": {
             "health": "/health",
+            "liveness": "/health/live",
+            "readiness": "/health/ready",
+            "metrics": "/metrics",
             "analyze": "/analyze",
             "similarity": "/similarity",
+            "similarity_matrix": "/similarity/matrix",
+            "match": "/match",
             "batch": "/analyze/batch",
+            "jobs": "/jobs",
+            "stream": "/stream (WebSocket)",
             "preview": "/preview",
+            "presets": "/presets",
+            "engines": "/engines",
+            "router": "/router",
             "docs": "/docs"
         },
         "timestamp": datetime.now().isoformat()
@@ -391,12 +1636,35 @@ if __name__ == "__main__":
     host = os.getenv("API_HOST", "0.0.0.0")
     port = int(os.getenv("API_PORT", "8000"))
     log_level = os.getenv("LOG_LEVEL", "info").lower()
+    workers = int(os.getenv("WEB_WORKERS", "1"))
     
-    # Run the server
-    uvicorn.run(
-        "main:app",
-        host=host,
-        port=port,
-        log_level=log_level,
-        reload=True if os.getenv("PYTHON_ENV") == "development" else False
-    )
\ No newline at end of file
+    preload = workers > 1 and os.getenv("PRELOAD_MODELS", "true").lower() == "true"
+    if preload and not hasattr(os, "fork"):
+        # Copy-on-write sharing needs fork (not available on Windows)
+        logger.warning("⚠️ PRELOAD_MODELS needs os.fork; starting uvicorn workers that each load their own models")
+        preload = False
+    
+    if preload:
+        # Load models once here, then fork workers sharing them copy-on-write.
+        # Workers import "main", so preload into that module, not __main__.
+        import importlib
+        from src.serving.prefork import serve_prefork
+        
+        serve_prefork(
+            "main:app",
+            host=host,
+            port=port,
+            workers=workers,
+            log_level=log_level,
+            preload=lambda: importlib.import_module("main").preload_models()
+        )
+    else:
+        # Run the server
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            log_level=log_level,
+            workers=workers,
+            reload=True if os.getenv("PYTHON_ENV") == "development" else False
+        )
\ No newline at end of file
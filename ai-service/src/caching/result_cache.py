@@ -0,0 +1,332 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import asyncio
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+class MemoryCacheBackend:
+    """
+    In-process LRU cache with per-entry TTL and a total size budget
+    """
+    
+    blocking = False
+    
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = 3600.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, payload = entry
+            if expires_at < time.time():
+                self._remove(key)
+                return None
+            
+            self._entries.move_to_end(key)
+            return payload
+    
+    def set(self, key: str, payload: bytes):
+        if len(payload) > self.max_bytes:
+            return
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            
+            self._entries[key] = (time.time() + self.ttl, payload)
+            self.current_bytes += len(payload)
+            
+            # Evict least recently used entries until we fit the budget
+            while self.current_bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+    
+    def _remove(self, key: str):
+        _, payload = self._entries.pop(key)
+        self.current_bytes -= len(payload)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': 'memory',
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes
+        }
+
+class DiskCacheBackend:
+    """
+    On-disk cache: one file per entry, expired by mtime, LRU by access time
+    """
+    
+    blocking = True
+    
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024, ttl: float = 3600.0):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.current_bytes = sum(path.stat().st_size for path in self.directory.glob('*/*.json'))
+    
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            stat = path.stat()
+            if stat.st_mtime + self.ttl < time.time():
+                self._unlink(path)
+                return None
+            
+            payload = path.read_bytes()
+            # Record the access for LRU pruning without touching mtime (used for TTL)
+            os.utime(path, (time.time(), stat.st_mtime))
+            return payload
+        except FileNotFoundError:
+            return None
+    
+    def set(self, key: str, payload: bytes):
+        if len(payload) > self.max_bytes:
+            return
+        
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        
+        # Write atomically so readers never see a partial entry
+        temp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        temp_path.write_bytes(payload)
+        
+        with self._lock:
+            try:
+                self.current_bytes -= path.stat().st_size
+            except FileNotFoundError:
+                pass
+            os.replace(temp_path, path)
+            self.current_bytes += len(payload)
+            
+            if self.current_bytes > self.max_bytes:
+                self._prune()
+    
+    def _prune(self):
+        """Drop expired entries, then least recently accessed ones, until under budget"""
+        now = time.time()
+        entries = []
+        for path in self.directory.glob('*/*.json'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime + self.ttl < now:
+                self._unlink(path)
+            else:
+                entries.append((stat.st_atime, path))
+        
+        entries.sort()
+        for _, path in entries:
+            if self.current_bytes <= self.max_bytes:
+                break
+            self._unlink(path)
+    
+    def _unlink(self, path: Path):
+        try:
+            size = path.stat().st_size
+            path.unlink()
+            self.current_bytes -= size
+        except FileNotFoundError:
+            pass
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': 'disk',
+            'directory': str(self.directory),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes
+        }
+
+class RedisCacheBackend:
+    """
+    Redis-compatible cache backend
+    
+    Any client exposing get(name) and set(name, value, ex=seconds) works,
+    so a local stub (e.g. fakeredis) can stand in for a real server.
+    Eviction under memory pressure is left to the server's maxmemory policy.
+    """
+    
+    blocking = True
+    
+    def __init__(self, url: str = "redis://localhost:6379/0", ttl: float = 3600.0,
+                 prefix: str = "marksure:analysis:", client: Any = None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+    
+    def get(self, key: str) -> Optional[bytes]:
+        payload = self.client.get(self.prefix + key)
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        return payload
+    
+    def set(self, key: str, payload: bytes):
+        self.client.set(self.prefix + key, payload, ex=max(1, int(self.ttl)))
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': 'redis',
+            'prefix': self.prefix
+        }
+
+def create_cache_backend(kind: str, ttl: float, max_bytes: int,
+                         directory: str = "cache", redis_url: Optional[str] = None):
+    """
+    Build a cache backend by name
+    
+    Args:
+        kind: 'memory', 'disk' or 'redis'
+        ttl: Entry lifetime in seconds
+        max_bytes: Size budget for memory and disk backends
+        directory: Cache directory for the disk backend
+        redis_url: Connection URL for the redis backend
+    
+    Returns:
+        Cache backend instance
+    """
+    if kind == 'memory':
+        return MemoryCacheBackend(max_bytes=max_bytes, ttl=ttl)
+    elif kind == 'disk':
+        return DiskCacheBackend(directory, max_bytes=max_bytes, ttl=ttl)
+    elif kind == 'redis':
+        return RedisCacheBackend(url=redis_url or "redis://localhost:6379/0", ttl=ttl)
+    else:
+        raise ValueError(f"Unsupported cache backend: {kind}")
+
+class ResultCache:
+    """
+    Content-addressed cache for analysis results with in-flight coalescing
+    
+    Keys hash the image bytes together with every parameter that changes
+    the result. Concurrent requests for the same key share one computation
+    (single-flight), so a burst of duplicate uploads costs one OCR pass.
+    """
+    
+    def __init__(self, backend: Any):
+        self.backend = backend
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'errors': 0
+        }
+    
+    @staticmethod
+    def make_key(image_data: bytes, engine: str, preprocessing: Dict[str, Any], min_confidence: float) -> str:
+        """
+        Build the cache key for one analysis request
+        
+        Args:
+            image_data: Raw uploaded image bytes
+            engine: OCR engine name
+            preprocessing: Preprocessing parameters that affect the result
+            min_confidence: OCR confidence threshold
+        
+        Returns:
+            Hex digest identifying the request
+        """
+        digest = hashlib.sha256(image_data)
+        params = json.dumps({
+            'engine': engine,
+            'preprocessing': preprocessing,
+            'min_confidence': min_confidence
+        }, sort_keys=True, default=str)
+        digest.update(params.encode('utf-8'))
+        return digest.hexdigest()
+    
+    async def get_or_compute(self, key: str,
+                             compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Return the cached result for key, computing it at most once
+        
+        Args:
+            key: Cache key from make_key
+            compute: Coroutine factory producing a JSON-serializable result
+        
+        Returns:
+            Tuple of (result, served_from_cache)
+        """
+        cached = await self._backend_call(self.backend.get, key)
+        if cached is not None:
+            self.stats['hits'] += 1
+            return json.loads(cached), True
+        
+        # Someone is already computing this key: wait for their result
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats['coalesced'] += 1
+            try:
+                return await asyncio.shield(inflight), True
+            except asyncio.CancelledError:
+                if inflight.cancelled():
+                    # The request doing the work was cancelled; take over
+                    return await self.get_or_compute(key, compute)
+                raise
+        
+        self.stats['misses'] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        
+        try:
+            result = await compute()
+        except BaseException as e:
+            # Errors are never cached; waiters see the same failure
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Mark retrieved so an unawaited failure does not warn
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        
+        future.set_result(result)
+        await self._backend_call(self.backend.set, key, json.dumps(result).encode('utf-8'))
+        return result, False
+    
+    async def _backend_call(self, method: Callable, *args):
+        """Run a backend call, off the event loop for blocking backends"""
+        try:
+            if getattr(self.backend, 'blocking', False):
+                return await asyncio.to_thread(method, *args)
+            return method(*args)
+        except Exception as e:
+            # The cache must never take the service down with it
+            self.stats['errors'] += 1
+            logger.warning(f"⚠️ Result cache {method.__name__} failed: {e}")
+            return None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters plus backend occupancy"""
+        lookups = self.stats['hits'] + self.stats['misses'] + self.stats['coalesced']
+        stats = dict(self.stats)
+        stats['hit_rate'] = (stats['hits'] + stats['coalesced']) / lookups if lookups else 0.0
+        stats['inflight'] = len(self._inflight)
+        stats.update(self.backend.stats())
+        return stats
@@ -0,0 +1,196 @@
+import json
+import numpy as np
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple, Optional, Any
+import logging
+
+from src.comparison.similarity_matcher import SimilarityMatcher, ReferenceSet, CONFUSION_TABLE
+from src.monitoring.tracing import span
+
+logger = logging.getLogger(__name__)
+
+class NGramIndex:
+    """
+    Character n-gram inverted index for fuzzy candidate retrieval
+    
+    Each text is split into overlapping n-grams (padded so short markings
+    and word boundaries still produce grams). A query only touches the
+    postings of its own grams, so its cost depends on how common those
+    grams are rather than on the catalog size.
+    """
+    
+    def __init__(self, texts: List[str], n: int = 3, max_df_ratio: float = 0.05):
+        self.n = n
+        self.max_df_ratio = max_df_ratio
+        self.size = len(texts)
+        
+        postings: Dict[str, List[int]] = defaultdict(list)
+        gram_counts = np.zeros(len(texts), dtype=np.int32)
+        
+        for doc_id, text in enumerate(texts):
+            grams = self._grams(text)
+            gram_counts[doc_id] = len(grams)
+            for gram in grams:
+                postings[gram].append(doc_id)
+        
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.gram_counts = gram_counts
+    
+    def _grams(self, text: str) -> set:
+        padded = f" {text} "
+        if len(padded) < self.n:
+            return {padded}
+        return {padded[i:i + self.n] for i in range(len(padded) - self.n + 1)}
+    
+    def candidates(self, text: str, limit: int = 300) -> np.ndarray:
+        """
+        Return ids of the texts sharing the most n-grams with a query
+        
+        Args:
+            text: Normalized query text
+            limit: Maximum number of candidates
+        
+        Returns:
+            Candidate ids, best first (by Jaccard similarity of gram sets)
+        """
+        grams = self._grams(text)
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not lists:
+            return np.array([], dtype=np.int32)
+        
+        # Skip near-ubiquitous grams unless they are all we have; they add
+        # work proportional to the catalog without discriminating anything
+        max_df = max(1, int(self.max_df_ratio * self.size))
+        selective = [ids for ids in lists if len(ids) <= max_df]
+        if selective:
+            lists = selective
+        
+        ids, shared = np.unique(np.concatenate(lists), return_counts=True)
+        jaccard = shared / (len(grams) + self.gram_counts[ids] - shared)
+        
+        if len(ids) > limit:
+            top = np.argpartition(jaccard, -limit)[-limit:]
+            ids, jaccard = ids[top], jaccard[top]
+        
+        return ids[np.argsort(-jaccard, kind='stable')]
+
+def load_catalog(path: str) -> List[str]:
+    """
+    Load OEM markings from a file
+    
+    A .json file holds a list of markings; any other file has one marking
+    per line, with blank lines and lines starting with '#' ignored.
+    """
+    path = Path(path)
+    if path.suffix.lower() == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            return [str(text) for text in json.load(f) if text]
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+class MarkingCatalog:
+    """
+    OEM marking catalog with a confusion-folded exact-match fast path
+    
+    Lookups first try a hash index over confusion-folded keys (see
+    SimilarityMatcher.fold_text), which resolves OCR reads that differ from
+    a marking only by 0/O, 1/I/L, 5/S, 8/B or 2/Z. On a miss, the n-gram
+    index (also over folded keys) prunes the catalog to a few hundred
+    candidates for confusion-weighted fuzzy scoring.
+    """
+    
+    def __init__(self, markings: List[str], matcher: SimilarityMatcher,
+                 max_candidates: int = 300, confusion_weight: float = 0.7):
+        self.matcher = matcher
+        self.max_candidates = max_candidates
+        # Share of the score taken from folded text; the rest still rewards
+        # the literal characters, so exact reads outrank confusable ones
+        self.confusion_weight = confusion_weight
+        self.references = matcher.prepare_references(markings)
+        self.folded = [text.translate(CONFUSION_TABLE) for text in self.references.normalized]
+        
+        self.exact_index: Dict[str, List[int]] = defaultdict(list)
+        for doc_id, key in enumerate(self.folded):
+            self.exact_index[key].append(doc_id)
+        
+        self.index = NGramIndex(self.folded)
+        self.stats = {
+            'lookups': 0,
+            'exact_hits': 0,
+            'fuzzy_lookups': 0
+        }
+    
+    def __len__(self) -> int:
+        return len(self.references)
+    
+    def search(self, text: str, limit: int = 5, method: str = 'rapidfuzz',
+               score_cutoff: float = 0.0) -> Tuple[List[Tuple[str, float]], int, str]:
+        """
+        Find the catalog markings most similar to a text
+        
+        Args:
+            text: Text to match (e.g. OCR output)
+            limit: Maximum number of matches to return
+            method: Similarity method used for fuzzy scoring
+            score_cutoff: Minimum similarity (0.0-1.0)
+        
+        Returns:
+            Tuple of (matches as (marking, score) sorted by score, candidates
+            scored, match type: 'exact', 'fuzzy' or 'none')
+        """
+        with span("catalog.search", method=method) as current:
+            matches, candidates, match_type = self._search(text, limit, method, score_cutoff)
+            current.set_attributes(match_type=match_type, candidates=candidates)
+        return matches, candidates, match_type
+    
+    def _search(self, text: str, limit: int, method: str,
+                score_cutoff: float) -> Tuple[List[Tuple[str, float]], int, str]:
+        query = self.matcher.fold_text(text)
+        if not query:
+            return [], 0, 'none'
+        
+        self.stats['lookups'] += 1
+        
+        ids = self.exact_index.get(query)
+        if ids:
+            self.stats['exact_hits'] += 1
+            match_type = 'exact'
+        else:
+            self.stats['fuzzy_lookups'] += 1
+            match_type = 'fuzzy'
+            ids = self.index.candidates(query, self.max_candidates)
+            if len(ids) == 0:
+                return [], 0, 'none'
+        
+        scores = self._score(text, query, ids, method)
+        order = np.argsort(-scores, kind='stable')[:limit]
+        matches = [
+            (self.references.texts[ids[i]], float(scores[i]))
+            for i in order
+            if scores[i] >= score_cutoff
+        ]
+        return matches, len(ids), match_type
+    
+    def _score(self, text: str, folded_query: str, ids: Any, method: str) -> np.ndarray:
+        """Blend literal and confusion-folded similarity for a set of candidates"""
+        literal = ReferenceSet(
+            [self.references.texts[i] for i in ids],
+            [self.references.normalized[i] for i in ids]
+        )
+        folded = ReferenceSet(literal.texts, [self.folded[i] for i in ids])
+        
+        literal_scores = self.matcher.similarity_matrix([text], literal, method, dtype=np.float64)[0]
+        folded_scores = self.matcher.similarity_matrix([folded_query], folded, method, dtype=np.float64)[0]
+        
+        w = self.confusion_weight
+        return np.clip(w * folded_scores + (1.0 - w) * literal_scores, 0.0, 1.0)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Lookup counters, including how often the exact path avoided fuzzy scoring"""
+        stats = dict(self.stats)
+        stats['exact_hit_rate'] = stats['exact_hits'] / stats['lookups'] if stats['lookups'] else 0.0
+        stats['markings'] = len(self.references)
+        stats['folded_keys'] = len(self.exact_index)
+        return stats
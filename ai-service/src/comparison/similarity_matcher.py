@@ -1,16 +1,55 @@
 import re
-from typing import Dict, List, Tuple, Optional, Any
+import numpy as np
+from typing import Dict, List, Tuple, Optional, Any, Union
 from rapidfuzz import fuzz, process
+from rapidfuzz.distance import Levenshtein
 import logging
 
+from src.monitoring.tracing import span
+
 logger = logging.getLogger(__name__)
 
+# rapidfuzz scorers behind each similarity method, with the score that means
+# a perfect match; used for one-to-many matching against a ReferenceSet
+SCORERS = {
+    'rapidfuzz': (fuzz.ratio, 100.0),
+    'ratio': (fuzz.ratio, 100.0),
+    'partial_ratio': (fuzz.partial_ratio, 100.0),
+    'token_sort': (fuzz.token_sort_ratio, 100.0),
+    'token_set': (fuzz.token_set_ratio, 100.0),
+    'levenshtein': (Levenshtein.normalized_similarity, 1.0)
+}
+
+# Classic OCR confusions on IC markings, folded onto one canonical character
+OCR_CONFUSIONS = {
+    'O': '0',
+    'I': '1', 'L': '1',
+    'S': '5',
+    'B': '8',
+    'Z': '2'
+}
+CONFUSION_TABLE = str.maketrans(OCR_CONFUSIONS)
+
+class ReferenceSet:
+    """
+    Reference texts normalized once, ready for repeated one-to-many matching
+    """
+    
+    def __init__(self, texts: List[str], normalized: List[str]):
+        self.texts = texts
+        self.normalized = normalized
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+
 class SimilarityMatcher:
     """
     Text similarity matching for IC marking comparison
     """
     
-    def __init__(self):
+    def __init__(self, workers: int = -1):
+        # Threads used by rapidfuzz for one-to-many scoring (-1: all cores)
+        self.workers = workers
         self.methods = {
             'rapidfuzz': self._rapidfuzz_similarity,
             'ratio': self._ratio_similarity,
@@ -28,7 +67,7 @@ class SimilarityMatcher:
             text1: First text string
             text2: Second text string  
             method: Similarity method to use
-            
+        
         Returns:
             Similarity score between 0.0 and 1.0
         """
@@ -36,8 +75,8 @@ class SimilarityMatcher:
             return 0.0
         
         # Normalize texts
-        text1_norm = self._normalize_text(text1)
-        text2_norm = self._normalize_text(text2)
+        text1_norm = self.normalize_text(text1)
+        text2_norm = self.normalize_text(text2)
         
         if text1_norm == text2_norm:
             return 1.0
@@ -47,43 +86,150 @@ class SimilarityMatcher:
             method = 'rapidfuzz'
         
         try:
-            similarity = self.methods[method](text1_norm, text2_norm)
+            with span("similarity", method=method):
+                similarity = self.methods[method](text1_norm, text2_norm)
             return min(max(similarity / 100.0, 0.0), 1.0)  # Ensure 0-1 range
         except Exception as e:
             logger.error(f"Similarity calculation failed: {e}")
             return 0.0
     
-    def find_best_matches(self, query_text: str, reference_texts: List[str], 
-                         method: str = 'rapidfuzz', limit: int = 5) -> List[Tuple[str, float]]:
+    def prepare_references(self, reference_texts: List[str]) -> ReferenceSet:
+        """
+        Normalize reference texts once for reuse across queries
+        
+        Args:
+            reference_texts: Reference texts (empty entries are dropped)
+        
+        Returns:
+            ReferenceSet to pass to find_best_matches
+        """
+        texts = [text for text in reference_texts if text]
+        return ReferenceSet(texts, [self.normalize_text(text) for text in texts])
+    
+    def find_best_matches(self, query_text: str, reference_texts: Union[List[str], ReferenceSet],
+                         method: str = 'rapidfuzz', limit: int = 5,
+                         score_cutoff: float = 0.0) -> List[Tuple[str, float]]:
         """
         Find best matching texts from a list of references
         
         Args:
             query_text: Text to match
-            reference_texts: List of reference texts
+            reference_texts: List of reference texts, or a ReferenceSet from
+                prepare_references to skip re-normalizing them on every query
             method: Similarity method
             limit: Maximum number of matches to return
-            
+            score_cutoff: Minimum similarity (0.0-1.0) for a match to be returned
+        
         Returns:
             List of (text, similarity_score) tuples sorted by similarity
         """
         if not query_text or not reference_texts:
             return []
         
-        query_norm = self._normalize_text(query_text)
+        if not isinstance(reference_texts, ReferenceSet):
+            reference_texts = self.prepare_references(reference_texts)
+        if not len(reference_texts) or limit <= 0:
+            return []
+        
+        scores = self.similarity_matrix([query_text], reference_texts, method, score_cutoff, dtype=np.float64)[0]
+        
+        # Top-k without sorting the whole reference list. Ties keep reference
+        # order, also at the cut: the earliest tied references make it in.
+        if limit < len(scores):
+            kth = np.partition(scores, -limit)[-limit]
+            above = np.flatnonzero(scores > kth)
+            tied = np.flatnonzero(scores == kth)[:limit - len(above)]
+            candidates = np.sort(np.concatenate([above, tied]))
+        else:
+            candidates = np.arange(len(scores))
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        
+        return [
+            (reference_texts.texts[index], float(min(max(scores[index], 0.0), 1.0)))
+            for index in candidates
+            if scores[index] >= score_cutoff
+        ]
+    
+    def similarity_matrix(self, queries: List[str], references: Union[List[str], ReferenceSet],
+                          method: str = 'rapidfuzz', score_cutoff: float = 0.0,
+                          dtype: Any = np.float32) -> np.ndarray:
+        """
+        Score every query against every reference
+        
+        Args:
+            queries: Query texts
+            references: Reference texts or a prepared ReferenceSet
+            method: Similarity method
+            score_cutoff: Scores below this (0.0-1.0) are reported as 0
+            dtype: Output dtype
+        
+        Returns:
+            Matrix of shape (len(queries), len(references)) with scores in 0.0-1.0
+        """
+        if not isinstance(references, ReferenceSet):
+            references = ReferenceSet(list(references), [self.normalize_text(text) for text in references])
+        
+        if method not in SCORERS:
+            logger.warning(f"Unknown similarity method: {method}, using rapidfuzz")
+            method = 'rapidfuzz'
+        scorer, max_score = SCORERS[method]
+        
+        # Native, multi-threaded all-pairs scoring
+        with span("similarity_matrix", method=method, queries=len(queries), references=len(references)):
+            matrix = process.cdist(
+                [self.normalize_text(text) for text in queries],
+                references.normalized,
+                scorer=scorer,
+                score_cutoff=score_cutoff * max_score if score_cutoff else None,
+                dtype=dtype,
+                workers=self.workers
+            )
+        if max_score != 1.0:
+            matrix /= max_score
+        return matrix
+    
+    def top_k_matrix(self, queries: List[str], references: Union[List[str], ReferenceSet],
+                     k: int, method: str = 'rapidfuzz', score_cutoff: float = 0.0,
+                     max_cells: int = 50_000_000) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Best k references for each query
+        
+        Queries are scored in chunks of at most max_cells matrix cells, so
+        large reference sets never need the full matrix in memory.
+        
+        Returns:
+            Tuple of (indices, scores), each of shape (len(queries), k'),
+            rows sorted by descending score, with k' = min(k, len(references)).
+            Slots a query has no reference reaching score_cutoff for hold
+            index -1 and score 0
+        """
+        if not isinstance(references, ReferenceSet):
+            references = ReferenceSet(list(references), [self.normalize_text(text) for text in references])
         
-        matches = []
-        for ref_text in reference_texts:
-            if ref_text:
-                similarity = self.calculate_similarity(query_norm, ref_text, method)
-                matches.append((ref_text, similarity))
+        k = min(k, len(references))
+        indices = np.zeros((len(queries), k), dtype=np.int64)
+        scores = np.zeros((len(queries), k), dtype=np.float32)
+        if k == 0:
+            return indices, scores
         
-        # Sort by similarity score descending
-        matches.sort(key=lambda x: x[1], reverse=True)
+        chunk = max(1, max_cells // len(references))
+        for start in range(0, len(queries), chunk):
+            block = self.similarity_matrix(queries[start:start + chunk], references, method, score_cutoff)
+            top = np.argpartition(block, -k, axis=1)[:, -k:] if k < block.shape[1] else np.tile(np.arange(k), (len(block), 1))
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            indices[start:start + len(block)] = np.take_along_axis(top, order, axis=1)
+            scores[start:start + len(block)] = np.take_along_axis(top_scores, order, axis=1)
         
-        return matches[:limit]
+        if score_cutoff > 0:
+            # similarity_matrix zeroed these; they are fillers, not matches
+            below = scores < score_cutoff
+            indices[below] = -1
+            scores[below] = 0.0
+        
+        return indices, scores
     
-    def _normalize_text(self, text: str) -> str:
+    def normalize_text(self, text: str) -> str:
         """Normalize text for comparison"""
         if not text:
             return ""
@@ -99,6 +245,16 @@ class SimilarityMatcher:
         
         return normalized
     
+    def fold_text(self, text: str) -> str:
+        """
+        Canonical key with OCR-confusable characters folded together
+        
+        'STM32F1O3' and 'STM32F103' (or '5TM32F1O3') share one key, so an
+        OCR read that differs from a reference only by classic confusions
+        can be found with a dictionary lookup.
+        """
+        return self.normalize_text(text).translate(CONFUSION_TABLE)
+    
     def _rapidfuzz_similarity(self, text1: str, text2: str) -> float:
         """RapidFuzz default similarity"""
         return fuzz.ratio(text1, text2)
@@ -121,8 +277,4 @@ class SimilarityMatcher:
     
     def _levenshtein_similarity(self, text1: str, text2: str) -> float:
         """Levenshtein distance based similarity"""
-        distance = fuzz.distance(text1, text2)
-        max_len = max(len(text1), len(text2))
-        if max_len == 0:
-            return 100.0
-        return (1 - distance / max_len) * 100.0
\ No newline at end of file
+        return Levenshtein.normalized_similarity(text1, text2) * 100.0
\ No newline at end of file
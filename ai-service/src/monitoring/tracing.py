@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import queue
+import numbers
+import threading
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional, Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Instrumentation scope named in OTLP exports
+SCOPE_NAME = "marksure.ai_service"
+
+# OTLP enum values (opentelemetry/proto/trace/v1/trace.proto)
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+def otlp_value(value: Any) -> Dict[str, Any]:
+    """Encode a Python value as an OTLP/JSON AnyValue"""
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    # numbers.* also covers numpy scalars
+    if isinstance(value, numbers.Integral):
+        # 64-bit integers are strings in OTLP/JSON
+        return {'intValue': str(int(value))}
+    if isinstance(value, numbers.Real):
+        return {'doubleValue': float(value)}
+    if isinstance(value, (list, tuple)):
+        return {'arrayValue': {'values': [otlp_value(item) for item in value]}}
+    return {'stringValue': str(value)}
+
+def otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Encode a mapping as an OTLP/JSON KeyValue list, dropping None values"""
+    return [{'key': key, 'value': otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+class Span:
+    """
+    One timed operation within a trace
+    
+    to_dict() is a flat view for API responses; to_otlp() is the OTLP/JSON
+    Span written to trace files.
+    """
+    
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'start_ns', 'end_ns', 'attributes', 'error')
+    
+    def __init__(self, trace: 'Trace', name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+    
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+    
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+    
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return round((end_ns - self.start_ns) / 1e6, 3)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_id or '',
+            'name': self.name,
+            'startTimeUnixNano': self.start_ns,
+            'endTimeUnixNano': self.end_ns,
+            'durationMs': self.duration_ms,
+            'attributes': {**self.trace.resource, **self.trace.attributes, **self.attributes},
+            'status': {'code': 'ERROR', 'message': self.error} if self.error else {'code': 'OK'}
+        }
+    
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': SPAN_KIND_INTERNAL if self.parent_id else SPAN_KIND_SERVER,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns if self.end_ns is not None else time.time_ns()),
+            'attributes': otlp_attributes({**self.trace.attributes, **self.attributes}),
+            'status': {'code': STATUS_CODE_ERROR, 'message': self.error} if self.error else {'code': STATUS_CODE_OK}
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+class _NoopSpan:
+    """Stand-in yielded when no trace is active, so callers never need to check"""
+    
+    def set_attribute(self, key: str, value: Any):
+        pass
+    
+    def set_attributes(self, **attributes):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class Trace:
+    """
+    Spans of one request; attributes (e.g. inspection_id) are copied onto every span
+    
+    resource describes the service (OTLP resource attributes); to_list()
+    merges it into each span's attributes, to_otlp() keeps it apart.
+    """
+    
+    def __init__(self, attributes: Dict[str, Any], resource: Optional[Dict[str, Any]] = None):
+        self.trace_id = os.urandom(16).hex()
+        self.attributes = attributes
+        self.resource = resource or {}
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+    
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+    
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Finished spans in start order"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start_ns)
+        return [span.to_dict() for span in spans]
+    
+    def to_otlp(self) -> Dict[str, Any]:
+        """The trace as an OTLP/JSON ExportTraceServiceRequest"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start_ns)
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': otlp_attributes(self.resource)},
+                'scopeSpans': [{
+                    'scope': {'name': SCOPE_NAME},
+                    'spans': [span.to_otlp() for span in spans]
+                }]
+            }]
+        }
+
+# Innermost open span of the running task; asyncio tasks (gather) and
+# asyncio.to_thread inherit it, plain executor threads do not
+_current_span: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Any]:
+    """
+    Time a block as a child of the current span
+    
+    Outside a trace this costs one context variable lookup and yields a
+    no-op span, so library code can be instrumented unconditionally.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    
+    current = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        parent.trace.add(current)
+
+class Tracer:
+    """
+    Starts per-request traces and appends finished ones to a rotating file
+    
+    Each line is one trace in OTLP/JSON: an ExportTraceServiceRequest
+    (resourceSpans -> scopeSpans -> spans, hex ids, nanosecond timestamps,
+    attributes as key/value lists), the format of the OpenTelemetry
+    Collector's file exporter and otlpjsonfile receiver. Trace attributes
+    (e.g. inspection_id) are on every span, so lines can also be grepped.
+    
+    File writes (and rotation) happen on a background thread, never on the
+    event loop. Rotation is not safe across processes sharing one file, so
+    the {pid} placeholder in the path gives each web worker its own.
+    
+    Args:
+        path: Trace file path (None keeps traces in memory only)
+        max_bytes: Rotate the file once it reaches this size
+        backup_count: Rotated files to keep
+        resource: Attributes describing the service (name, version), added to
+            every span so traces can be compared across releases
+    """
+    
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 10_000_000, backup_count: int = 5,
+                 resource: Optional[Dict[str, Any]] = None):
+        self.resource = resource or {}
+        self.path = path.format(pid=os.getpid()) if path else None
+        self._writer = None
+        self._listener = None
+        
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            handler = RotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            lines: queue.SimpleQueue = queue.SimpleQueue()
+            self._listener = QueueListener(lines, handler)
+            self._listener.start()
+            # Private logger so trace lines never reach the console handlers
+            self._writer = logging.getLogger(f"{__name__}.file.{id(self)}")
+            self._writer.propagate = False
+            self._writer.setLevel(logging.INFO)
+            self._writer.addHandler(QueueHandler(lines))
+    
+    @contextmanager
+    def trace(self, name: str, **attributes) -> Iterator[Any]:
+        """
+        Open a root span and a new trace; spans opened inside become its children
+        
+        attributes are copied onto every span of the trace. When the root
+        span closes, all spans are written to the trace file.
+        """
+        current = Span(Trace(attributes, self.resource), name, None, {})
+        token = _current_span.set(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current.end_ns = time.time_ns()
+            _current_span.reset(token)
+            current.trace.add(current)
+            self._write(current.trace)
+    
+    def _write(self, trace: Trace):
+        if not self._writer:
+            return
+        try:
+            self._writer.info(json.dumps(trace.to_otlp(), separators=(',', ':'), default=str))
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to write trace {trace.trace_id}: {e}")
+    
+    def close(self):
+        """Flush queued traces and close the file"""
+        if self._listener:
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
+        if self._writer:
+            for handler in list(self._writer.handlers):
+                self._writer.removeHandler(handler)
@@ -0,0 +1,160 @@
+import cv2
+import numpy as np
+from typing import Dict, List, Optional, Any, Tuple
+import logging
+import asyncio
+from concurrent.futures import Executor
+
+logger = logging.getLogger(__name__)
+
+class EasyOCRBatchScheduler:
+    """
+    Micro-batching scheduler that coalesces concurrent EasyOCR calls
+    
+    Requests arriving within a short window (or until the batch is full) are
+    stacked and sent through a single readtext_batched call. Every caller
+    awaits its own future and receives the same result list readtext returns.
+    """
+    
+    def __init__(self,
+                 reader: Any,
+                 executor: Executor,
+                 max_batch_size: int = 8,
+                 max_wait_ms: float = 10.0,
+                 max_concurrent_batches: int = 1,
+                 readtext_params: Optional[Dict[str, Any]] = None):
+        self.reader = reader
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        self.readtext_params = readtext_params or {}
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector_task: Optional[asyncio.Task] = None
+        self._batch_slots: Optional[asyncio.Semaphore] = None
+        
+        self.stats = {
+            'batches': 0,
+            'images': 0,
+            'largest_batch': 0
+        }
+    
+    def _ensure_started(self):
+        """Start the collector on the running event loop"""
+        if self._collector_task is None or self._collector_task.done():
+            self._queue = asyncio.Queue()
+            self._batch_slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._collector_task = asyncio.create_task(self._collect_batches())
+    
+    async def submit(self, image: np.ndarray) -> List[Tuple[Any, str, float]]:
+        """
+        Queue an image for the next batch and wait for its OCR results
+        
+        Args:
+            image: BGR or grayscale image as numpy array
+        
+        Returns:
+            EasyOCR detail=1 results for this image
+        """
+        self._ensure_started()
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, future))
+        return await future
+    
+    async def _collect_batches(self):
+        """Group queued requests into batches and dispatch them"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            # Wait for a free batch slot first, so requests keep piling up
+            # in the queue while the previous batch is still running
+            await self._batch_slots.acquire()
+            
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                try:
+                    if timeout <= 0:
+                        batch.append(self._queue.get_nowait())
+                    else:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+            
+            # Drop callers that gave up while waiting
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                self._batch_slots.release()
+                continue
+            
+            asyncio.create_task(self._run_batch(batch))
+    
+    async def _run_batch(self, batch: List[Tuple[np.ndarray, asyncio.Future]]):
+        """Run one batch through EasyOCR and resolve each caller's future"""
+        images = [image for image, _ in batch]
+        
+        try:
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(self.executor, self._readtext_batched, images)
+            
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            
+            self.stats['batches'] += 1
+            self.stats['images'] += len(batch)
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+        
+        except Exception as e:
+            logger.error(f"❌ EasyOCR batch of {len(batch)} failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._batch_slots.release()
+    
+    def _readtext_batched(self, images: List[np.ndarray]) -> List[List[Tuple[Any, str, float]]]:
+        """Pad images to a common shape and run EasyOCR's batched pipeline"""
+        # EasyOCR expects RGB image
+        images = [
+            cv2.cvtColor(image, cv2.COLOR_BGR2RGB) if image.ndim == 3 and image.shape[2] == 3 else image
+            for image in images
+        ]
+        
+        if len(images) == 1:
+            return [self.reader.readtext(images[0], **self.readtext_params)]
+        
+        # readtext_batched needs equally sized images. Padding on the
+        # bottom/right keeps every box in its original image coordinates;
+        # replicating the edge avoids the hard black border constant
+        # padding would add, which the detector can mistake for text edges.
+        as_color = any(image.ndim == 3 for image in images)
+        max_h = max(image.shape[0] for image in images)
+        max_w = max(image.shape[1] for image in images)
+        
+        padded = []
+        for image in images:
+            if as_color and image.ndim == 2:
+                image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+            h, w = image.shape[:2]
+            if h != max_h or w != max_w:
+                image = cv2.copyMakeBorder(image, 0, max_h - h, 0, max_w - w, cv2.BORDER_REPLICATE)
+            padded.append(image)
+        
+        return self.reader.readtext_batched(padded, **self.readtext_params)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Batching statistics"""
+        stats = dict(self.stats)
+        stats['queued'] = self._queue.qsize() if self._queue else 0
+        stats['average_batch'] = (stats['images'] / stats['batches']) if stats['batches'] else 0.0
+        return stats
+    
+    def close(self):
+        """Stop the collector task"""
+        if self._collector_task and not self._collector_task.done():
+            self._collector_task.cancel()
@@ -0,0 +1,93 @@
+import re
+from collections import deque
+from typing import Callable, Dict, Optional, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _normalize(text: str) -> str:
+    return re.sub(r'\s+', ' ', text.upper()).strip()
+
+class TemporalConsensus:
+    """
+    Majority vote over the OCR readings of consecutive frames of one chip
+    
+    Single frames misread characters now and then (glare, focus, sensor
+    noise). Readings are grouped by key (by default case and whitespace
+    insensitive; pass SimilarityMatcher.fold_text to also merge 0/O, 1/I
+    style confusions) and weighted by confidence. The result is stable once
+    the leading group has enough votes and a clear share of the window.
+    
+    Args:
+        window: Most recent readings taken into account
+        min_votes: Readings the leading group needs before it can be stable
+        min_share: Share of the window's confidence the leading group needs
+        key: Maps a reading to its voting group
+    """
+    
+    def __init__(self, window: int = 7, min_votes: int = 3, min_share: float = 0.6,
+                 key: Optional[Callable[[str], str]] = None):
+        self.window = max(1, window)
+        self.min_votes = max(1, min_votes)
+        self.min_share = min_share
+        self.key = key or _normalize
+        self.readings: deque = deque(maxlen=self.window)
+    
+    def add(self, text: str, confidence: float) -> Dict[str, Any]:
+        """
+        Record one frame's reading and return the updated consensus
+        
+        Empty readings take up a place in the window but vote for nothing,
+        so a run of unreadable frames delays stability instead of
+        producing an empty result.
+        
+        Returns:
+            Result of current()
+        """
+        text = _normalize(text or '')
+        self.readings.append((self.key(text) if text else '', text, max(0.0, float(confidence))))
+        return self.current()
+    
+    def current(self) -> Dict[str, Any]:
+        """
+        Consensus over the window
+        
+        Returns:
+            Dictionary with text (best-supported variant of the leading
+            group), confidence (its mean confidence), votes, share of the
+            window's confidence, readings and whether it is stable
+        """
+        groups: Dict[str, Dict[str, Any]] = {}
+        total_weight = 0.0
+        for key, text, confidence in self.readings:
+            # A floor keeps zero-confidence readings from vanishing from the share
+            weight = max(confidence, 0.01)
+            total_weight += weight
+            if not key:
+                continue
+            group = groups.setdefault(key, {'votes': 0, 'weight': 0.0, 'confidence': 0.0, 'variants': {}})
+            group['votes'] += 1
+            group['weight'] += weight
+            group['confidence'] += confidence
+            group['variants'][text] = group['variants'].get(text, 0.0) + weight
+        
+        if not groups:
+            return {'text': '', 'confidence': 0.0, 'votes': 0, 'share': 0.0,
+                    'readings': len(self.readings), 'stable': False, 'alternatives': []}
+        
+        ranked = sorted(groups.values(), key=lambda group: group['weight'], reverse=True)
+        leader = ranked[0]
+        share = leader['weight'] / total_weight
+        
+        return {
+            'text': max(leader['variants'], key=leader['variants'].get),
+            'confidence': round(leader['confidence'] / leader['votes'], 4),
+            'votes': leader['votes'],
+            'share': round(share, 4),
+            'readings': len(self.readings),
+            'stable': leader['votes'] >= self.min_votes and share >= self.min_share,
+            'alternatives': [max(group['variants'], key=group['variants'].get) for group in ranked[1:]]
+        }
+    
+    def reset(self):
+        self.readings.clear()
@@ -0,0 +1,157 @@
+import cv2
+import numpy as np
+import easyocr
+import asyncio
+from typing import Dict, List, Optional, Any
+import logging
+
+from src.ocr.engine_registry import OCRBackend, register_engine
+from src.ocr.batch_scheduler import EasyOCRBatchScheduler
+from src.ocr.worker_pool import OCRWorkerPool
+
+logger = logging.getLogger(__name__)
+
+# readtext parameters shared by the single-image and batched EasyOCR paths
+EASYOCR_READTEXT_PARAMS = {
+    'detail': 1,
+    'paragraph': False,
+    'width_ths': 0.7,
+    'height_ths': 0.7
+}
+
+@register_engine('easyocr')
+class EasyOCRBackend(OCRBackend):
+    """
+    EasyOCR backend: in-process reader, micro-batched reader, or worker processes
+    
+    Options:
+        reader: Preloaded easyocr.Reader (shared copy-on-write after fork)
+        batch_size: > 1 coalesces concurrent calls into batched inference
+        batch_window_ms: How long a batch waits to fill
+        max_concurrent_batches: Batches running inference at once
+        worker_processes: > 0 runs EasyOCR in that many separate processes
+    """
+    
+    capabilities = {
+        'batching': True,
+        'bounding_boxes': True,
+        'char_whitelist': False,
+        'relative_cost': 5.0
+    }
+    
+    def __init__(self, languages, executor, reader: Any = None, batch_size: int = 1,
+                 batch_window_ms: float = 10.0, max_concurrent_batches: int = 1,
+                 worker_processes: int = 0, **options):
+        super().__init__(languages, executor, **options)
+        self.reader = reader
+        self.batch_size = batch_size
+        self.batch_window_ms = batch_window_ms
+        self.max_concurrent_batches = max_concurrent_batches
+        self.worker_processes = worker_processes
+        self.batcher = None
+        self.worker_pool = None
+    
+    async def initialize(self):
+        if self.worker_processes > 0:
+            # Each worker process loads its own reader; none is kept in this process
+            logger.info(f"🔧 Starting {self.worker_processes} EasyOCR worker processes...")
+            self.worker_pool = OCRWorkerPool(
+                self.worker_processes,
+                self.languages,
+                readtext_params=EASYOCR_READTEXT_PARAMS
+            )
+            await self.worker_pool.start()
+            return
+        
+        if self.reader:
+            logger.info("✅ EasyOCR using preloaded reader")
+        else:
+            logger.info("🔧 Initializing EasyOCR...")
+            self.reader = easyocr.Reader(self.languages, gpu=False)
+            logger.info("✅ EasyOCR initialized")
+        
+        if self.batch_size > 1:
+            self.batcher = EasyOCRBatchScheduler(
+                self.reader,
+                self.executor,
+                max_batch_size=self.batch_size,
+                max_wait_ms=self.batch_window_ms,
+                max_concurrent_batches=self.max_concurrent_batches,
+                readtext_params=EASYOCR_READTEXT_PARAMS
+            )
+            logger.info(f"✅ EasyOCR micro-batching enabled (batch size {self.batch_size}, window {self.batch_window_ms}ms)")
+    
+    async def extract(self, image: np.ndarray, min_confidence: float) -> Dict[str, Any]:
+        """Extract text using EasyOCR"""
+        if not self.reader and not self.worker_pool:
+            raise RuntimeError("EasyOCR not initialized")
+        
+        def _run_easyocr():
+            # EasyOCR expects RGB image
+            if len(image.shape) == 3 and image.shape[2] == 3:
+                rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            else:
+                rgb_image = image
+            
+            # Run OCR
+            return self.reader.readtext(rgb_image, **EASYOCR_READTEXT_PARAMS)
+        
+        if self.worker_pool:
+            # Hand the image to a worker process through shared memory
+            results = await self.worker_pool.readtext(image)
+        elif self.batcher:
+            # Coalesce with other in-flight requests into one batched pass
+            results = await self.batcher.submit(image)
+        else:
+            # Run EasyOCR in thread pool to avoid blocking
+            loop = asyncio.get_event_loop()
+            results = await loop.run_in_executor(self.executor, _run_easyocr)
+        
+        # Process results
+        text_parts = []
+        bounding_boxes = []
+        confidences = []
+        
+        for (bbox, text, confidence) in results:
+            if confidence >= min_confidence:
+                text_parts.append(text)
+                confidences.append(confidence)
+                
+                # Convert bbox to standard format
+                bbox_dict = {
+                    'text': text,
+                    'confidence': float(confidence),
+                    'coordinates': {
+                        'x': int(min(point[0] for point in bbox)),
+                        'y': int(min(point[1] for point in bbox)),
+                        'width': int(max(point[0] for point in bbox) - min(point[0] for point in bbox)),
+                        'height': int(max(point[1] for point in bbox) - min(point[1] for point in bbox))
+                    }
+                }
+                bounding_boxes.append(bbox_dict)
+        
+        # Combine text parts
+        combined_text = ' '.join(text_parts).strip()
+        overall_confidence = np.mean(confidences) if confidences else 0.0
+        
+        return {
+            'text': combined_text,
+            'confidence': float(overall_confidence),
+            'bounding_boxes': bounding_boxes,
+            'alternatives': text_parts if len(text_parts) > 1 else [],
+            'engine_used': 'easyocr'
+        }
+    
+    def get_status(self) -> Dict[str, Any]:
+        if self.worker_pool:
+            return {'mode': 'worker_processes', 'worker_pool': self.worker_pool.get_status()}
+        if self.batcher:
+            return {'mode': 'batched', 'batcher': self.batcher.get_stats()}
+        return {'mode': 'in_process'}
+    
+    def close(self):
+        """Stop batching and worker processes (before the executor shuts down)"""
+        if self.batcher:
+            self.batcher.close()
+        if self.worker_pool:
+            self.worker_pool.stop()
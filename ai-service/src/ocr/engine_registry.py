@@ -0,0 +1,90 @@
+import importlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Type
+import logging
+
+logger = logging.getLogger(__name__)
+
+class OCRBackend:
+    """
+    Base class for OCR engine backends
+    
+    A backend wraps one OCR library. Its module is imported only when the
+    engine is enabled, so heavy dependencies (e.g. torch for EasyOCR) are
+    never loaded by workers that do not use them.
+    """
+    
+    name: str = ''
+    
+    # What the backend offers; callers can plan around these
+    capabilities: Dict[str, Any] = {
+        'batching': False,        # Coalesces concurrent calls into batched inference
+        'bounding_boxes': True,   # Returns per-word boxes
+        'char_whitelist': False,  # Restricts output to the IC marking alphabet
+        'relative_cost': 1.0      # Rough per-image cost; cascades run cheapest first
+    }
+    
+    def __init__(self, languages: List[str], executor: ThreadPoolExecutor, **options):
+        self.languages = languages
+        self.executor = executor
+        self.options = options
+    
+    async def initialize(self):
+        """Load models / check the installation"""
+    
+    async def extract(self, image: np.ndarray, min_confidence: float) -> Dict[str, Any]:
+        """
+        Run OCR on one image
+        
+        Returns:
+            Dictionary with text, confidence, bounding_boxes, alternatives
+            and engine_used
+        """
+        raise NotImplementedError
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {}
+    
+    def close(self):
+        """Stop background work (called before the shared executor shuts down)"""
+    
+    def cleanup(self):
+        """Release resources (called after the shared executor has shut down)"""
+
+# Engines shipped with the service: name -> module that registers it
+BUILTIN_ENGINES = {
+    'easyocr': 'src.ocr.easyocr_backend',
+    'tesseract': 'src.ocr.tesseract_backend'
+}
+
+_REGISTRY: Dict[str, Type[OCRBackend]] = {}
+
+def register_engine(name: str):
+    """
+    Class decorator registering an OCRBackend under an engine name
+    
+    Third-party backends register the same way; add their module to
+    BUILTIN_ENGINES (or import it before initialization) to make them
+    available.
+    """
+    def _register(cls: Type[OCRBackend]) -> Type[OCRBackend]:
+        cls.name = name
+        _REGISTRY[name] = cls
+        return cls
+    return _register
+
+def get_engine_class(name: str) -> Type[OCRBackend]:
+    """Return the backend class for an engine, importing its module on first use"""
+    if name not in _REGISTRY:
+        module = BUILTIN_ENGINES.get(name)
+        if module is None:
+            raise ValueError(f"Unknown OCR engine: {name}. Available: {', '.join(available_engines())}")
+        importlib.import_module(module)
+        if name not in _REGISTRY:
+            raise ValueError(f"Module {module} did not register OCR engine '{name}'")
+    return _REGISTRY[name]
+
+def available_engines() -> List[str]:
+    """Names of all known engines, loaded or not"""
+    return sorted(set(BUILTIN_ENGINES) | set(_REGISTRY))
@@ -0,0 +1,147 @@
+import time
+import threading
+import numpy as np
+from collections import deque
+from typing import Dict, List, Tuple, Optional, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+class EngineRouter:
+    """
+    Picks an OCR engine per request from image features and live engine stats
+    
+    Tesseract is several times cheaper than EasyOCR and does well on clean,
+    high-contrast, single-line markings; everything else goes to EasyOCR.
+    Rolling per-engine latency/confidence windows let the router back off
+    an engine whose recent results have been poor, and a cheap pick whose
+    confidence comes back low is escalated to the accurate engine.
+    """
+    
+    DEFAULT_POLICY = {
+        'max_lines_for_fast': 1,          # Tesseract runs with --psm 8 (single line)
+        'min_contrast_for_fast': 80.0,    # Text-to-background step in the preprocessed frame
+        'min_text_height_for_fast': 16.0, # Pixels; tiny glyphs go to EasyOCR
+        'min_engine_confidence': 0.6,     # Rolling mean below this demotes an engine
+        'min_samples': 5,                 # Samples needed before stats are trusted
+        'escalate_below': 0.6,            # Re-run a fast pick on the accurate engine below this
+        'probe_every': 20                 # Still try a demoted engine every Nth eligible image
+    }
+    
+    def __init__(self,
+                 fast_engine: str = 'tesseract',
+                 accurate_engine: str = 'easyocr',
+                 policy: Optional[Dict[str, float]] = None,
+                 window: int = 200,
+                 history: int = 50):
+        self.fast_engine = fast_engine
+        self.accurate_engine = accurate_engine
+        self.policy = dict(self.DEFAULT_POLICY)
+        if policy:
+            self.policy.update(policy)
+        
+        self.window = window
+        self._samples: Dict[str, deque] = {
+            engine: deque(maxlen=window) for engine in (fast_engine, accurate_engine)
+        }
+        self._decisions: deque = deque(maxlen=history)
+        self._counts: Dict[str, int] = {}
+        self._demoted_skips = 0
+        self._lock = threading.Lock()
+    
+    def choose(self, features: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Pick an engine for one image
+        
+        Args:
+            features: Quality metrics of the preprocessed image
+                (text_contrast, text_line_count, text_height)
+        
+        Returns:
+            Decision record with 'engine' and 'reason'
+        """
+        p = self.policy
+        
+        if not features or 'text_line_count' not in features:
+            engine, reason = self.accurate_engine, 'no_features'
+        elif features['text_line_count'] > p['max_lines_for_fast']:
+            engine, reason = self.accurate_engine, 'multi_line'
+        elif features.get('text_contrast', 0.0) < p['min_contrast_for_fast']:
+            engine, reason = self.accurate_engine, 'low_contrast'
+        elif features.get('text_height', 0.0) < p['min_text_height_for_fast']:
+            engine, reason = self.accurate_engine, 'small_text'
+        elif self._underperforming(self.fast_engine) and not self._probe_due():
+            engine, reason = self.accurate_engine, 'fast_engine_low_confidence'
+        else:
+            engine, reason = self.fast_engine, 'clean_single_line'
+        
+        return self._record_decision(engine, reason, features)
+    
+    def should_escalate(self, engine: str, result: Dict[str, Any]) -> bool:
+        """Whether a fast-engine result is too weak to return as is"""
+        return engine == self.fast_engine and result.get('confidence', 0.0) < self.policy['escalate_below']
+    
+    def record(self, engine: str, latency_ms: float, confidence: float):
+        """Add one OCR outcome to the engine's rolling window"""
+        with self._lock:
+            samples = self._samples.setdefault(engine, deque(maxlen=self.window))
+            samples.append((latency_ms, confidence))
+    
+    def note_escalation(self, decision: Dict[str, Any], engine: str):
+        """Mark a decision from choose() as escalated to another engine"""
+        with self._lock:
+            decision['escalated_to'] = engine
+    
+    def _underperforming(self, engine: str) -> bool:
+        with self._lock:
+            samples = list(self._samples.get(engine, ()))
+        if len(samples) < self.policy['min_samples']:
+            return False
+        return float(np.mean([confidence for _, confidence in samples])) < self.policy['min_engine_confidence']
+    
+    def _probe_due(self) -> bool:
+        """Occasionally let a demoted engine through so its stats can recover"""
+        with self._lock:
+            self._demoted_skips += 1
+            return self._demoted_skips % int(self.policy['probe_every']) == 0
+    
+    def _record_decision(self, engine: str, reason: str, features: Dict[str, Any]) -> Dict[str, Any]:
+        decision = {
+            'timestamp': time.time(),
+            'engine': engine,
+            'reason': reason,
+            'features': {
+                key: features.get(key) for key in ('text_contrast', 'text_line_count', 'text_height')
+            } if features else {}
+        }
+        with self._lock:
+            self._counts[engine] = self._counts.get(engine, 0) + 1
+            self._decisions.append(decision)
+        return decision
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Policy, per-engine rolling stats and recent decisions"""
+        with self._lock:
+            samples = {engine: list(window) for engine, window in self._samples.items()}
+            decisions = [dict(decision) for decision in self._decisions]
+            counts = dict(self._counts)
+        
+        engines = {}
+        for engine, window in samples.items():
+            latencies = [latency for latency, _ in window]
+            confidences = [confidence for _, confidence in window]
+            engines[engine] = {
+                'samples': len(window),
+                'mean_confidence': float(np.mean(confidences)) if confidences else None,
+                'p50_latency_ms': float(np.percentile(latencies, 50)) if latencies else None,
+                'p95_latency_ms': float(np.percentile(latencies, 95)) if latencies else None
+            }
+        
+        return {
+            'fast_engine': self.fast_engine,
+            'accurate_engine': self.accurate_engine,
+            'policy': self.policy,
+            'engines': engines,
+            'routed': counts,
+            'recent_decisions': decisions
+        }
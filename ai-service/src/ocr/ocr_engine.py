@@ -1,63 +1,107 @@
-import cv2
 import numpy as np
-import easyocr
-import pytesseract
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Callable, Awaitable
 import logging
 import asyncio
+import time
 from concurrent.futures import ThreadPoolExecutor
 
+from src.ocr.engine_registry import OCRBackend, get_engine_class, available_engines
+from src.ocr.tiling import generate_tiles, translate_tile_boxes, merge_tile_boxes
+from src.monitoring.tracing import span
+
 logger = logging.getLogger(__name__)
 
+# Ensemble modes that combine the enabled engines
+ENSEMBLE_MODES = ('ensemble', 'cascade')
+
 class OCREngine:
     """
     OCR Engine supporting multiple OCR backends for IC marking text extraction
     """
     
-    def __init__(self, primary_engine: str = 'easyocr', fallback_engine: str = 'tesseract', languages: List[str] = ['en']):
+    def __init__(self, primary_engine: str = 'easyocr', fallback_engine: str = 'tesseract', languages: List[str] = ['en'],
+                 max_workers: int = 2, batch_size: int = 1, batch_window_ms: float = 10.0,
+                 max_concurrent_batches: int = 1, worker_processes: int = 0, cascade_exit_confidence: float = 0.85,
+                 easyocr_reader: Any = None):
         self.primary_engine = primary_engine
         self.fallback_engine = fallback_engine
         self.languages = languages
         self.is_initialized = False
         
-        # OCR instances
-        self.easyocr_reader = None
-        self.executor = ThreadPoolExecutor(max_workers=2)
+        # Shared thread pool for blocking OCR calls
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        
+        # Per-engine backend options. Only enabled engines are imported, so a
+        # Tesseract-only worker never loads EasyOCR/torch.
+        self.engine_options: Dict[str, Dict[str, Any]] = {
+            'easyocr': {
+                # A reader preloaded before forking is shared copy-on-write
+                'reader': easyocr_reader,
+                # Micro-batching of concurrent calls (disabled when batch_size is 1)
+                'batch_size': batch_size,
+                'batch_window_ms': batch_window_ms,
+                'max_concurrent_batches': max_concurrent_batches,
+                # Out-of-process workers (disabled when worker_processes is 0)
+                'worker_processes': worker_processes
+            }
+        }
+        self.backends: Dict[str, OCRBackend] = {}
+        
+        # OCR calls submitted to each backend and not finished yet
+        self.in_flight: Dict[str, int] = {}
         
+        # Cascade mode stops at the first engine reaching this confidence
+        self.cascade_exit_confidence = cascade_exit_confidence
+        
+        # Optional observer(event, engine, seconds) for metrics; events are
+        # 'extract' and 'error' per backend call, and 'fallback' per retry
+        self.observer: Optional[Callable[[str, str, float], None]] = None
+    
+    @property
+    def enabled_engines(self) -> List[str]:
+        return [engine for engine in dict.fromkeys([self.primary_engine, self.fallback_engine]) if engine]
+    
     async def initialize(self):
         """Initialize OCR engines"""
         try:
-            # Initialize EasyOCR
-            if 'easyocr' in [self.primary_engine, self.fallback_engine]:
-                logger.info("🔧 Initializing EasyOCR...")
-                self.easyocr_reader = easyocr.Reader(self.languages, gpu=False)
-                logger.info("✅ EasyOCR initialized")
-            
-            # Check Tesseract installation
-            if 'tesseract' in [self.primary_engine, self.fallback_engine]:
-                try:
-                    # Test Tesseract installation
-                    version = pytesseract.get_tesseract_version()
-                    logger.info(f"✅ Tesseract initialized (version: {version})")
-                except Exception as e:
-                    logger.warning(f"⚠️ Tesseract not properly installed: {e}")
+            for engine in self.enabled_engines:
+                backend_class = get_engine_class(engine)
+                backend = backend_class(self.languages, self.executor, **self.engine_options.get(engine, {}))
+                await backend.initialize()
+                self.backends[engine] = backend
             
             self.is_initialized = True
-            logger.info("🎉 OCR Engine fully initialized")
-            
+            logger.info(f"🎉 OCR Engine fully initialized ({', '.join(self.backends)})")
+        
         except Exception as e:
             logger.error(f"❌ Failed to initialize OCR engines: {e}")
             raise
     
+    def get_engine_info(self) -> Dict[str, Any]:
+        """Enabled engines with their capabilities and status"""
+        return {
+            'available': available_engines(),
+            'primary': self.primary_engine,
+            'fallback': self.fallback_engine,
+            'enabled': {
+                engine: {
+                    'capabilities': backend.capabilities,
+                    'status': backend.get_status()
+                }
+                for engine, backend in self.backends.items()
+            }
+        }
+    
     async def extract_text(self, image: np.ndarray, engine: str = None, min_confidence: float = 0.5) -> Dict[str, Any]:
         """
         Extract text from image using specified OCR engine
         
         Args:
             image: Input image as numpy array
-            engine: OCR engine to use ('easyocr' or 'tesseract')
+            engine: Enabled OCR engine (e.g. 'easyocr', 'tesseract'), or an
+                ensemble mode: 'ensemble' or 'cascade'
             min_confidence: Minimum confidence threshold
-            
+        
         Returns:
             Dictionary with extracted text, confidence, and bounding boxes
         """
@@ -66,20 +110,19 @@ class OCREngine:
         
         engine = engine or self.primary_engine
         
+        if engine in ENSEMBLE_MODES:
+            return await self.extract_with_ensemble(image, min_confidence, mode='parallel' if engine == 'ensemble' else 'cascade')
+        
         try:
-            if engine == 'easyocr':
-                return await self._extract_with_easyocr(image, min_confidence)
-            elif engine == 'tesseract':
-                return await self._extract_with_tesseract(image, min_confidence)
-            else:
-                raise ValueError(f"Unsupported OCR engine: {engine}")
-                
+            return await self._extract_with_engine(image, engine, min_confidence)
+        
         except Exception as e:
             logger.error(f"❌ OCR extraction failed with {engine}: {e}")
             
             # Try fallback engine if available
             if self.fallback_engine and self.fallback_engine != engine:
                 logger.info(f"🔄 Trying fallback engine: {self.fallback_engine}")
+                self._notify('fallback', engine, 0.0)
                 try:
                     return await self.extract_text(image, self.fallback_engine, min_confidence)
                 except Exception as fallback_error:
@@ -95,153 +138,205 @@ class OCREngine:
                 'error': str(e)
             }
     
-    async def _extract_with_easyocr(self, image: np.ndarray, min_confidence: float) -> Dict[str, Any]:
-        """Extract text using EasyOCR"""
-        if not self.easyocr_reader:
-            raise RuntimeError("EasyOCR not initialized")
-        
-        def _run_easyocr():
-            # EasyOCR expects RGB image
-            if len(image.shape) == 3 and image.shape[2] == 3:
-                rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            else:
-                rgb_image = image
-            
-            # Run OCR
-            results = self.easyocr_reader.readtext(
-                rgb_image,
-                detail=1,
-                paragraph=False,
-                width_ths=0.7,
-                height_ths=0.7
-            )
-            
-            return results
+    async def _extract_with_engine(self, image: np.ndarray, engine: str, min_confidence: float) -> Dict[str, Any]:
+        """Run exactly one engine, without fallback"""
+        backend = self.backends.get(engine)
+        if backend is None:
+            raise ValueError(f"OCR engine not enabled: {engine}")
         
-        # Run EasyOCR in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        results = await loop.run_in_executor(self.executor, _run_easyocr)
+        with span(f"ocr.{engine}", height=image.shape[0], width=image.shape[1]) as current:
+            started = time.perf_counter()
+            self.in_flight[engine] = self.in_flight.get(engine, 0) + 1
+            try:
+                result = await backend.extract(image, min_confidence)
+            except Exception:
+                self._notify('error', engine, time.perf_counter() - started)
+                raise
+            finally:
+                self.in_flight[engine] -= 1
+            self._notify('extract', engine, time.perf_counter() - started)
+            current.set_attributes(confidence=result.get('confidence', 0.0), boxes=len(result.get('bounding_boxes', [])))
+        return result
+    
+    def _notify(self, event: str, engine: str, seconds: float):
+        if self.observer:
+            try:
+                self.observer(event, engine, seconds)
+            except Exception as e:
+                logger.warning(f"⚠️ OCR observer failed: {e}")
+    
+    async def extract_text_regions(self, image: np.ndarray, regions: List[Dict[str, int]],
+                                   engine: str = None, min_confidence: float = 0.5) -> Dict[str, Any]:
+        """
+        Extract text from selected regions of an image
+        
+        Args:
+            image: Input image as numpy array
+            regions: Crops as {'x', 'y', 'width', 'height'} in image coordinates
+            engine: OCR engine to use ('easyocr' or 'tesseract')
+            min_confidence: Minimum confidence threshold
+        
+        Returns:
+            Same structure as extract_text, with bounding boxes mapped back
+            into the coordinates of the full image
+        """
+        crops = [
+            image[region['y']:region['y'] + region['height'], region['x']:region['x'] + region['width']]
+            for region in regions
+        ]
+        
+        # Crops are independent; let the executor (or batcher) take them together
+        with span("ocr.regions", regions=len(regions)):
+            results = await asyncio.gather(*[
+                self.extract_text(crop, engine, min_confidence) for crop in crops
+            ])
         
-        # Process results
         text_parts = []
         bounding_boxes = []
-        confidences = []
+        engines_used = []
         
-        for (bbox, text, confidence) in results:
-            if confidence >= min_confidence:
-                text_parts.append(text)
-                confidences.append(confidence)
-                
-                # Convert bbox to standard format
-                bbox_dict = {
-                    'text': text,
-                    'confidence': float(confidence),
-                    'coordinates': {
-                        'x': int(min(point[0] for point in bbox)),
-                        'y': int(min(point[1] for point in bbox)),
-                        'width': int(max(point[0] for point in bbox) - min(point[0] for point in bbox)),
-                        'height': int(max(point[1] for point in bbox) - min(point[1] for point in bbox))
-                    }
-                }
-                bounding_boxes.append(bbox_dict)
+        for region, result in zip(regions, results):
+            for box in result.get('bounding_boxes', []):
+                coordinates = dict(box['coordinates'])
+                coordinates['x'] += region['x']
+                coordinates['y'] += region['y']
+                bounding_boxes.append({**box, 'coordinates': coordinates})
+            
+            if result.get('text'):
+                text_parts.append(result['text'])
+            if result.get('engine_used') not in (None, 'none'):
+                engines_used.append(result['engine_used'])
         
-        # Combine text parts
-        combined_text = ' '.join(text_parts).strip()
+        confidences = [box['confidence'] for box in bounding_boxes]
         overall_confidence = np.mean(confidences) if confidences else 0.0
         
         return {
-            'text': combined_text,
+            'text': ' '.join(text_parts).strip(),
             'confidence': float(overall_confidence),
             'bounding_boxes': bounding_boxes,
             'alternatives': text_parts if len(text_parts) > 1 else [],
-            'engine_used': 'easyocr'
+            'engine_used': engines_used[0] if engines_used else 'none'
         }
     
-    async def _extract_with_tesseract(self, image: np.ndarray, min_confidence: float) -> Dict[str, Any]:
-        """Extract text using Tesseract OCR"""
-        
-        def _run_tesseract():
-            # Convert to grayscale if needed
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = image
-            
-            # Configure Tesseract for IC markings (small text, single line)
-            custom_config = r'--oem 3 --psm 8 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-+./'
-            
-            # Extract text with confidence data
-            data = pytesseract.image_to_data(
-                gray,
-                config=custom_config,
-                output_type=pytesseract.Output.DICT
-            )
-            
-            return data
+    async def extract_text_tiled(self, image: np.ndarray, engine: str = None, min_confidence: float = 0.5,
+                                 tile_size: int = 1024, overlap: int = 160, max_concurrency: int = 2,
+                                 preprocess: Optional[Callable[[np.ndarray], Awaitable[np.ndarray]]] = None) -> Dict[str, Any]:
+        """
+        Extract text from a large image by OCR-ing overlapping tiles
         
-        # Run Tesseract in thread pool
-        loop = asyncio.get_event_loop()
-        data = await loop.run_in_executor(self.executor, _run_tesseract)
+        Tiles are numpy views, so no tile is copied until its turn comes, and
+        at most max_concurrency tiles are being preprocessed or OCR'd at once.
+        Peak working memory therefore depends on the tile size, not the frame.
         
-        # Process results
-        text_parts = []
-        bounding_boxes = []
-        confidences = []
-        
-        n_boxes = len(data['level'])
-        for i in range(n_boxes):
-            confidence = int(data['conf'][i])
-            if confidence > (min_confidence * 100):  # Tesseract uses 0-100 scale
-                text = data['text'][i].strip()
-                if text:  # Skip empty text
-                    text_parts.append(text)
-                    confidences.append(confidence / 100.0)  # Convert to 0-1 scale
-                    
-                    bbox_dict = {
-                        'text': text,
-                        'confidence': confidence / 100.0,
-                        'coordinates': {
-                            'x': int(data['left'][i]),
-                            'y': int(data['top'][i]),
-                            'width': int(data['width'][i]),
-                            'height': int(data['height'][i])
-                        }
-                    }
-                    bounding_boxes.append(bbox_dict)
-        
-        # Combine text parts
-        combined_text = ' '.join(text_parts).strip()
+        Args:
+            image: Input image as numpy array
+            engine: OCR engine to use ('easyocr' or 'tesseract')
+            min_confidence: Minimum confidence threshold
+            tile_size: Tile edge length in pixels
+            overlap: Overlap between neighbouring tiles in pixels
+            max_concurrency: Tiles processed in parallel
+            preprocess: Optional coroutine applied to each tile before OCR;
+                it must not change the tile's geometry
+        
+        Returns:
+            Same structure as extract_text, with global bounding boxes
+            de-duplicated across tile seams
+        """
+        height, width = image.shape[:2]
+        tiles = generate_tiles(width, height, tile_size, overlap)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def _process_tile(tile: Dict[str, int]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                with span("ocr.tile", **tile):
+                    tile_image = image[tile['y']:tile['y'] + tile['height'], tile['x']:tile['x'] + tile['width']]
+                    if preprocess:
+                        tile_image = await preprocess(tile_image)
+                    result = await self.extract_text(tile_image, engine, min_confidence)
+                    return translate_tile_boxes(result.get('bounding_boxes', []), tile, width, height)
+        
+        tile_boxes = await asyncio.gather(*[_process_tile(tile) for tile in tiles])
+        bounding_boxes = merge_tile_boxes([box for boxes in tile_boxes for box in boxes])
+        
+        text_parts = [box['text'] for box in bounding_boxes]
+        confidences = [box['confidence'] for box in bounding_boxes]
         overall_confidence = np.mean(confidences) if confidences else 0.0
         
         return {
-            'text': combined_text,
+            'text': ' '.join(text_parts).strip(),
             'confidence': float(overall_confidence),
             'bounding_boxes': bounding_boxes,
-            'alternatives': text_parts if len(text_parts) > 1 else [],
-            'engine_used': 'tesseract'
+            'alternatives': [],
+            'engine_used': engine or self.primary_engine,
+            'tiles': len(tiles)
         }
     
-    async def extract_with_ensemble(self, image: np.ndarray, min_confidence: float = 0.5) -> Dict[str, Any]:
-        """
-        Extract text using ensemble of both OCR engines and combine results
+    async def extract_with_ensemble(self, image: np.ndarray, min_confidence: float = 0.5,
+                                    mode: str = 'parallel', exit_confidence: float = None) -> Dict[str, Any]:
         """
-        results = {}
+        Extract text using ensemble of the enabled OCR engines and combine results
         
-        # Try both engines
-        for engine in ['easyocr', 'tesseract']:
-            try:
-                result = await self.extract_text(image, engine, min_confidence)
-                results[engine] = result
-            except Exception as e:
-                logger.warning(f"⚠️ Ensemble OCR failed for {engine}: {e}")
-                results[engine] = None
+        Args:
+            image: Input image as numpy array
+            min_confidence: Minimum confidence threshold
+            mode: 'parallel' runs all engines concurrently and keeps the best
+                result; 'cascade' runs them cheapest first and stops at the
+                first result reaching exit_confidence
+            exit_confidence: Cascade early-exit threshold (defaults to
+                cascade_exit_confidence)
+        
+        Returns:
+            Best result, with 'engines_run' listing the engines that ran
+        """
+        with span(f"ocr.{'ensemble' if mode == 'parallel' else mode}") as current:
+            results = await self._run_ensemble(image, min_confidence, mode, exit_confidence)
+            current.set_attribute('engines_run', list(results))
         
         # Combine results intelligently
         best_result = self._combine_ocr_results(results)
-        best_result['engine_used'] = 'ensemble'
+        best_result['engine_used'] = 'ensemble' if mode == 'parallel' else 'cascade'
+        best_result['engines_run'] = list(results)
         
         return best_result
     
+    async def _run_ensemble(self, image: np.ndarray, min_confidence: float, mode: str,
+                            exit_confidence: Optional[float]) -> Dict[str, Any]:
+        """Run the engines of an ensemble mode; failed engines map to None"""
+        results = {}
+        
+        if mode == 'parallel':
+            # Wall time is that of the slowest engine rather than the sum
+            outcomes = await asyncio.gather(
+                *[self._extract_with_engine(image, engine, min_confidence) for engine in self.backends],
+                return_exceptions=True
+            )
+            for engine, outcome in zip(self.backends, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.warning(f"⚠️ Ensemble OCR failed for {engine}: {outcome}")
+                    results[engine] = None
+                else:
+                    results[engine] = outcome
+        elif mode == 'cascade':
+            if exit_confidence is None:
+                exit_confidence = self.cascade_exit_confidence
+            
+            # Cheapest engine first
+            order = sorted(self.backends, key=lambda name: self.backends[name].capabilities.get('relative_cost', 1.0))
+            for engine in order:
+                try:
+                    results[engine] = await self._extract_with_engine(image, engine, min_confidence)
+                except Exception as e:
+                    logger.warning(f"⚠️ Cascade OCR failed for {engine}: {e}")
+                    results[engine] = None
+                    continue
+                
+                if results[engine]['text'] and results[engine]['confidence'] >= exit_confidence:
+                    break
+        else:
+            raise ValueError(f"Unsupported ensemble mode: {mode}")
+        
+        return results
+    
     def _combine_ocr_results(self, results: Dict[str, Any]) -> Dict[str, Any]:
         """Combine results from multiple OCR engines"""
         valid_results = {k: v for k, v in results.items() if v and v.get('text')}
@@ -270,5 +365,9 @@ class OCREngine:
     
     def cleanup(self):
         """Cleanup resources"""
+        for backend in self.backends.values():
+            backend.close()
         if self.executor:
-            self.executor.shutdown(wait=True)
\ No newline at end of file
+            self.executor.shutdown(wait=True)
+        for backend in self.backends.values():
+            backend.cleanup()
\ No newline at end of file
@@ -0,0 +1,105 @@
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    tesserocr = None
+    TESSEROCR_AVAILABLE = False
+
+# Tesseract configuration for IC markings (small text, single word/line),
+# shared by the in-process API and the pytesseract subprocess path
+TESSERACT_OEM = 3
+TESSERACT_PSM = 8
+TESSERACT_WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-+./"
+TESSERACT_CONFIG = f"--oem {TESSERACT_OEM} --psm {TESSERACT_PSM} -c tessedit_char_whitelist={TESSERACT_WHITELIST}"
+
+class TesseractAPIPool:
+    """
+    Long-lived Tesseract API handles, one per thread, via tesserocr
+    
+    pytesseract writes a temp file, forks a tesseract process and reloads
+    the traineddata on every call. Here each worker thread initializes one
+    PyTessBaseAPI once and feeds it image buffers directly. A handle is not
+    thread-safe, hence one per thread rather than one shared.
+    """
+    
+    def __init__(self, language: str = 'eng'):
+        if not TESSEROCR_AVAILABLE:
+            raise RuntimeError("tesserocr is not installed")
+        
+        self.language = language
+        self._local = threading.local()
+        self._handles: List[Any] = []
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def version() -> str:
+        return tesserocr.tesseract_version().splitlines()[0]
+    
+    def _get_api(self):
+        api = getattr(self._local, 'api', None)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(
+                lang=self.language,
+                psm=TESSERACT_PSM,
+                oem=TESSERACT_OEM
+            )
+            api.SetVariable('tessedit_char_whitelist', TESSERACT_WHITELIST)
+            self._local.api = api
+            with self._lock:
+                self._handles.append(api)
+            logger.info(f"🔧 Tesseract API handle created for thread {threading.current_thread().name}")
+        return api
+    
+    def image_to_data(self, gray: np.ndarray) -> Dict[str, List[Any]]:
+        """
+        Recognize words in a grayscale image
+        
+        Args:
+            gray: 8-bit single-channel image
+        
+        Returns:
+            Word-level results in pytesseract's Output.DICT layout
+            (level, text, conf, left, top, width, height)
+        """
+        gray = np.ascontiguousarray(gray, dtype=np.uint8)
+        height, width = gray.shape
+        
+        api = self._get_api()
+        api.SetImageBytes(gray.tobytes(), width, height, 1, width)
+        api.Recognize()
+        
+        data = {'level': [], 'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+        level = tesserocr.RIL.WORD
+        iterator = api.GetIterator()
+        
+        if iterator is not None:
+            for word in tesserocr.iterate_level(iterator, level):
+                box = word.BoundingBox(level)
+                if box is None:
+                    continue
+                x1, y1, x2, y2 = box
+                data['level'].append(5)
+                data['text'].append(word.GetUTF8Text(level) or '')
+                data['conf'].append(word.Confidence(level))
+                data['left'].append(x1)
+                data['top'].append(y1)
+                data['width'].append(x2 - x1)
+                data['height'].append(y2 - y1)
+        
+        api.Clear()
+        return data
+    
+    def close(self):
+        """Release every handle created so far"""
+        with self._lock:
+            for api in self._handles:
+                api.End()
+            self._handles = []
+        self._local = threading.local()
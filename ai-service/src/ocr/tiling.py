@@ -0,0 +1,115 @@
+import numpy as np
+from typing import Dict, List, Tuple, Optional, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+def generate_tiles(width: int, height: int, tile_size: int, overlap: int) -> List[Dict[str, int]]:
+    """
+    Cover an image with overlapping square tiles
+    
+    Args:
+        width: Image width
+        height: Image height
+        tile_size: Tile edge length in pixels
+        overlap: Pixels shared by neighbouring tiles; should exceed the
+            height of the largest marking so every word fits whole in some tile
+    
+    Returns:
+        List of tiles as {'x', 'y', 'width', 'height'}
+    """
+    if overlap >= tile_size:
+        raise ValueError("Tile overlap must be smaller than the tile size")
+    
+    def _starts(length: int) -> List[int]:
+        if length <= tile_size:
+            return [0]
+        stride = tile_size - overlap
+        starts = list(range(0, length - tile_size, stride))
+        # Last tile flush with the far edge
+        starts.append(length - tile_size)
+        return starts
+    
+    return [
+        {'x': x, 'y': y, 'width': min(tile_size, width - x), 'height': min(tile_size, height - y)}
+        for y in _starts(height)
+        for x in _starts(width)
+    ]
+
+def translate_tile_boxes(bounding_boxes: List[Dict[str, Any]], tile: Dict[str, int],
+                         image_width: int, image_height: int, edge_margin: int = 2) -> List[Dict[str, Any]]:
+    """
+    Map tile-local boxes into global image coordinates
+    
+    Boxes touching a tile edge that is not also an image edge are flagged
+    as 'clipped': the word was probably cut by the seam and a whole copy
+    exists in the neighbouring tile.
+    """
+    translated = []
+    
+    for box in bounding_boxes:
+        coords = box['coordinates']
+        x = coords['x'] + tile['x']
+        y = coords['y'] + tile['y']
+        w, h = coords['width'], coords['height']
+        
+        clipped = (
+            (coords['x'] <= edge_margin and tile['x'] > 0) or
+            (coords['y'] <= edge_margin and tile['y'] > 0) or
+            (coords['x'] + w >= tile['width'] - edge_margin and tile['x'] + tile['width'] < image_width) or
+            (coords['y'] + h >= tile['height'] - edge_margin and tile['y'] + tile['height'] < image_height)
+        )
+        
+        translated.append({
+            **box,
+            'coordinates': {'x': x, 'y': y, 'width': w, 'height': h},
+            'clipped': clipped
+        })
+    
+    return translated
+
+def merge_tile_boxes(bounding_boxes: List[Dict[str, Any]], overlap_threshold: float = 0.5) -> List[Dict[str, Any]]:
+    """
+    De-duplicate boxes seen by more than one tile
+    
+    Boxes are visited whole-before-clipped, then by confidence. A box is
+    dropped when most of it (intersection over the smaller box) lies
+    inside a box already kept.
+    
+    Returns:
+        Surviving boxes in reading order
+    """
+    ordered = sorted(bounding_boxes, key=lambda box: (box.get('clipped', False), -box['confidence']))
+    kept = []
+    
+    for box in ordered:
+        c = box['coordinates']
+        duplicate = False
+        
+        for other in kept:
+            o = other['coordinates']
+            ix = max(0, min(c['x'] + c['width'], o['x'] + o['width']) - max(c['x'], o['x']))
+            iy = max(0, min(c['y'] + c['height'], o['y'] + o['height']) - max(c['y'], o['y']))
+            smaller = min(c['width'] * c['height'], o['width'] * o['height'])
+            if smaller > 0 and (ix * iy) / smaller > overlap_threshold:
+                duplicate = True
+                break
+        
+        if not duplicate:
+            kept.append(box)
+    
+    return sort_reading_order([{k: v for k, v in box.items() if k != 'clipped'} for box in kept])
+
+def sort_reading_order(bounding_boxes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Sort boxes top-to-bottom by text line, then left-to-right"""
+    if not bounding_boxes:
+        return []
+    
+    line_height = float(np.median([box['coordinates']['height'] for box in bounding_boxes])) or 1.0
+    
+    def _key(box):
+        c = box['coordinates']
+        center_y = c['y'] + c['height'] / 2.0
+        return (int(center_y // line_height), c['x'])
+    
+    return sorted(bounding_boxes, key=_key)
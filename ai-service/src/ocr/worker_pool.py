@@ -0,0 +1,370 @@
+import cv2
+import numpy as np
+from typing import Dict, List, Optional, Any, Tuple
+import logging
+import asyncio
+import itertools
+import threading
+import time
+import sys
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+
+logger = logging.getLogger(__name__)
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to a block the parent created, without taking ownership of it
+    
+    Attaching registers the block with the resource tracker, which then
+    unlinks it (warning about a leak) once its owner exits, although the
+    parent still owns and unlinks it. Python 3.13+ attaches untracked.
+    Before that the registration is skipped rather than undone:
+    spawned workers share the parent's tracker, so unregistering here
+    would also drop the parent's own registration.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    
+    # Workers handle one request at a time, so nothing else registers meanwhile
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+def _worker_main(worker_id: int, conn, languages: List[str], readtext_params: Dict[str, Any]):
+    """
+    OCR worker process entry point
+    
+    Holds its own EasyOCR reader and serves requests from the parent over
+    a pipe. Image pixels never travel through the pipe: the parent places
+    them in a shared memory block and only sends its name, shape and dtype.
+    """
+    import easyocr
+    
+    reader = easyocr.Reader(languages, gpu=False)
+    conn.send(('ready', None, None))
+    
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        
+        kind, task_id, payload = message
+        
+        if kind == 'stop':
+            break
+        
+        if kind == 'ping':
+            conn.send(('pong', task_id, None))
+            continue
+        
+        if kind == 'ocr':
+            shm_name, shape, dtype = payload
+            shm = None
+            try:
+                shm = _attach_shared_memory(shm_name)
+                image = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+                
+                # EasyOCR expects RGB image; cvtColor also copies out of the shared block
+                if image.ndim == 3 and image.shape[2] == 3:
+                    rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                else:
+                    rgb_image = image.copy()
+                del image
+                
+                results = reader.readtext(rgb_image, **readtext_params)
+                
+                # Plain Python types keep the reply small and cheap to pickle
+                results = [
+                    ([[int(x), int(y)] for x, y in bbox], str(text), float(confidence))
+                    for bbox, text, confidence in results
+                ]
+                conn.send(('result', task_id, results))
+            
+            except Exception as e:
+                conn.send(('error', task_id, str(e)))
+            finally:
+                if shm is not None:
+                    shm.close()
+
+class _WorkerHandle:
+    """Parent-side bookkeeping for one OCR worker process"""
+    
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.process = None
+        self.conn = None
+        self.reader_thread = None
+        self.pending: Dict[int, Tuple[asyncio.Future, float]] = {}
+        self.ready = False
+        self.restarts = 0
+        self.completed = 0
+        self.failed = 0
+        self.started_at = 0.0
+        self.last_pong = 0.0
+    
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+class OCRWorkerPool:
+    """
+    Pool of OCR worker processes, each with its own EasyOCR reader
+    
+    Runs OCR outside the API process so inference and Python post-processing
+    use separate interpreters and cores. Images are handed over through
+    multiprocessing.shared_memory; results come back over a pipe. A monitor
+    task pings workers, restarts crashed ones and recycles stuck ones.
+    """
+    
+    def __init__(self,
+                 num_workers: int,
+                 languages: List[str],
+                 readtext_params: Optional[Dict[str, Any]] = None,
+                 health_interval: float = 5.0,
+                 task_timeout: float = 120.0):
+        self.num_workers = num_workers
+        self.languages = languages
+        self.readtext_params = readtext_params or {}
+        self.health_interval = health_interval
+        self.task_timeout = task_timeout
+        
+        # spawn keeps torch and the API process's threads out of the workers
+        self._context = multiprocessing.get_context('spawn')
+        self._workers = [_WorkerHandle(i) for i in range(num_workers)]
+        self._task_ids = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._closing = False
+    
+    async def start(self):
+        """Spawn all workers and start the health monitor"""
+        self._loop = asyncio.get_running_loop()
+        
+        for worker in self._workers:
+            self._spawn(worker)
+        
+        self._monitor_task = asyncio.create_task(self._monitor())
+        logger.info(f"✅ OCR worker pool started with {self.num_workers} processes")
+    
+    def _spawn(self, worker: _WorkerHandle):
+        """Start (or restart) the process behind a worker handle"""
+        parent_conn, child_conn = self._context.Pipe()
+        
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(worker.worker_id, child_conn, self.languages, self.readtext_params),
+            name=f"ocr-worker-{worker.worker_id}",
+            daemon=True
+        )
+        worker.process.start()
+        child_conn.close()
+        
+        worker.conn = parent_conn
+        worker.ready = False
+        worker.started_at = time.time()
+        worker.last_pong = worker.started_at
+        
+        worker.reader_thread = threading.Thread(
+            target=self._read_replies,
+            args=(worker, parent_conn),
+            name=f"ocr-worker-{worker.worker_id}-reader",
+            daemon=True
+        )
+        worker.reader_thread.start()
+    
+    def _read_replies(self, worker: _WorkerHandle, conn):
+        """Reader thread: forward worker replies to the event loop"""
+        try:
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    break
+                self._loop.call_soon_threadsafe(self._handle_reply, worker, message)
+            
+            self._loop.call_soon_threadsafe(self._handle_disconnect, worker, conn)
+        except RuntimeError:
+            # Event loop already closed during shutdown
+            pass
+    
+    def _handle_reply(self, worker: _WorkerHandle, message: Tuple[str, Any, Any]):
+        kind, task_id, payload = message
+        
+        if kind == 'ready':
+            worker.ready = True
+            logger.info(f"✅ OCR worker {worker.worker_id} ready (pid {worker.process.pid})")
+            return
+        
+        if kind == 'pong':
+            worker.last_pong = time.time()
+            return
+        
+        entry = worker.pending.pop(task_id, None)
+        if entry is None:
+            return
+        future, _ = entry
+        if future.done():
+            return
+        
+        if kind == 'result':
+            worker.completed += 1
+            future.set_result(payload)
+        else:
+            worker.failed += 1
+            future.set_exception(RuntimeError(f"OCR worker {worker.worker_id} failed: {payload}"))
+    
+    def _handle_disconnect(self, worker: _WorkerHandle, conn):
+        """Fail everything a dead worker was holding"""
+        if worker.conn is not conn:
+            # A newer process already replaced this one
+            return
+        
+        worker.ready = False
+        for future, _ in worker.pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError(f"OCR worker {worker.worker_id} exited"))
+        worker.failed += len(worker.pending)
+        worker.pending.clear()
+    
+    async def readtext(self, image: np.ndarray) -> List[Tuple[Any, str, float]]:
+        """
+        Run EasyOCR readtext on the least loaded worker
+        
+        Args:
+            image: BGR or grayscale image as numpy array
+        
+        Returns:
+            EasyOCR detail=1 results
+        """
+        worker = self._pick_worker()
+        if worker is None:
+            raise RuntimeError("No OCR worker processes available")
+        
+        image = np.ascontiguousarray(image)
+        shm = shared_memory.SharedMemory(create=True, size=max(image.nbytes, 1))
+        
+        try:
+            np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)[...] = image
+            
+            task_id = next(self._task_ids)
+            future = self._loop.create_future()
+            worker.pending[task_id] = (future, time.time())
+            
+            try:
+                worker.conn.send(('ocr', task_id, (shm.name, image.shape, image.dtype.str)))
+            except (OSError, ValueError) as e:
+                worker.pending.pop(task_id, None)
+                raise RuntimeError(f"OCR worker {worker.worker_id} unreachable: {e}")
+            
+            try:
+                return await future
+            finally:
+                worker.pending.pop(task_id, None)
+        
+        finally:
+            shm.close()
+            shm.unlink()
+    
+    def _pick_worker(self) -> Optional[_WorkerHandle]:
+        """Choose the live worker with the shortest queue, preferring ready ones"""
+        alive = [worker for worker in self._workers if worker.is_alive()]
+        if not alive:
+            return None
+        return min(alive, key=lambda worker: (not worker.ready, len(worker.pending)))
+    
+    async def _monitor(self):
+        """Ping workers, restart crashed ones and recycle stuck ones"""
+        while not self._closing:
+            await asyncio.sleep(self.health_interval)
+            now = time.time()
+            
+            for worker in self._workers:
+                if not worker.is_alive():
+                    exit_code = worker.process.exitcode if worker.process else None
+                    logger.warning(f"⚠️ OCR worker {worker.worker_id} died (exit code {exit_code}), restarting")
+                    self._restart(worker)
+                    continue
+                
+                oldest = min((started for _, started in worker.pending.values()), default=None)
+                if oldest is not None and now - oldest > self.task_timeout:
+                    logger.warning(f"⚠️ OCR worker {worker.worker_id} stuck for {now - oldest:.0f}s, restarting")
+                    worker.process.terminate()
+                    self._restart(worker)
+                    continue
+                
+                try:
+                    worker.conn.send(('ping', None, None))
+                except (OSError, ValueError):
+                    pass
+    
+    def _restart(self, worker: _WorkerHandle):
+        old_conn = worker.conn
+        if worker.process is not None:
+            worker.process.join(timeout=1)
+        self._handle_disconnect(worker, old_conn)
+        if old_conn is not None:
+            old_conn.close()
+        
+        worker.restarts += 1
+        self._spawn(worker)
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Per-worker health and queue depth for /health"""
+        now = time.time()
+        workers = []
+        
+        for worker in self._workers:
+            alive = worker.is_alive()
+            if not alive:
+                state = 'dead'
+            elif not worker.ready:
+                state = 'starting'
+            elif not worker.pending and now - worker.last_pong > 3 * self.health_interval:
+                state = 'unresponsive'
+            else:
+                state = 'healthy'
+            
+            workers.append({
+                'worker_id': worker.worker_id,
+                'pid': worker.process.pid if worker.process else None,
+                'state': state,
+                'queue_depth': len(worker.pending),
+                'completed': worker.completed,
+                'failed': worker.failed,
+                'restarts': worker.restarts,
+                'uptime_seconds': round(now - worker.started_at, 1) if alive else 0.0
+            })
+        
+        healthy = sum(1 for worker in workers if worker['state'] == 'healthy')
+        return {
+            'num_workers': self.num_workers,
+            'healthy_workers': healthy,
+            'total_queue_depth': sum(worker['queue_depth'] for worker in workers),
+            'workers': workers
+        }
+    
+    def stop(self):
+        """Stop the monitor and shut all workers down"""
+        self._closing = True
+        if self._monitor_task and not self._monitor_task.done():
+            self._monitor_task.cancel()
+        
+        for worker in self._workers:
+            if worker.is_alive():
+                try:
+                    worker.conn.send(('stop', None, None))
+                except (OSError, ValueError):
+                    pass
+        
+        for worker in self._workers:
+            if worker.process is None:
+                continue
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            if worker.conn is not None:
+                worker.conn.close()
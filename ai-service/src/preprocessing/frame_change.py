@@ -0,0 +1,79 @@
+import cv2
+import numpy as np
+from typing import Dict, Optional, Any, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class FrameChangeDetector:
+    """
+    Cheap frame-difference check for live camera streams
+    
+    Frames are shrunk to a small blurred grayscale thumbnail and compared
+    pixel by pixel, against the previous frame (is something moving?) and
+    against the reference frame, the last one that was OCR'd (did the
+    scene change since?). Costs well under a millisecond per frame, so it
+    can run at camera frame rate in front of OCR.
+    
+    Args:
+        thumbnail_size: Comparison resolution (width, height)
+        pixel_threshold: Gray-level difference that counts a pixel as changed
+            (above sensor noise and JPEG artifacts)
+        motion_fraction: Share of changed pixels versus the previous frame
+            that means the scene is still moving
+        change_fraction: Share of changed pixels versus the reference frame
+            that means the scene is materially different
+    """
+    
+    def __init__(self, thumbnail_size: Tuple[int, int] = (64, 48), pixel_threshold: int = 25,
+                 motion_fraction: float = 0.02, change_fraction: float = 0.05):
+        self.thumbnail_size = thumbnail_size
+        self.pixel_threshold = pixel_threshold
+        self.motion_fraction = motion_fraction
+        self.change_fraction = change_fraction
+        self.previous: Optional[np.ndarray] = None
+        self.reference: Optional[np.ndarray] = None
+    
+    def thumbnail(self, image: np.ndarray) -> np.ndarray:
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(image, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        # Blur away noise and compression artifacts that are not real change
+        return cv2.GaussianBlur(small, (3, 3), 0)
+    
+    def _changed_fraction(self, a: np.ndarray, b: np.ndarray) -> float:
+        return float(np.count_nonzero(cv2.absdiff(a, b) > self.pixel_threshold)) / a.size
+    
+    def check(self, image: np.ndarray) -> Dict[str, Any]:
+        """
+        Compare a frame with the previous and the reference frame
+        
+        Args:
+            image: Frame (any resolution; a reduced decode is enough)
+        
+        Returns:
+            Dictionary with 'moving' (differs from the previous frame),
+            'changed' (differs from the reference, or no reference yet),
+            'motion' and 'difference' (changed-pixel shares) and the
+            'thumbnail' to pass to set_reference()
+        """
+        thumb = self.thumbnail(image)
+        motion = self._changed_fraction(thumb, self.previous) if self.previous is not None else 0.0
+        difference = self._changed_fraction(thumb, self.reference) if self.reference is not None else 1.0
+        self.previous = thumb
+        
+        return {
+            'moving': motion > self.motion_fraction,
+            'changed': difference > self.change_fraction,
+            'motion': round(motion, 4),
+            'difference': round(difference, 4),
+            'thumbnail': thumb
+        }
+    
+    def set_reference(self, thumbnail: np.ndarray):
+        """Make a frame the reference later frames are compared against (call when it is OCR'd)"""
+        self.reference = thumbnail
+    
+    def reset(self):
+        self.previous = None
+        self.reference = None
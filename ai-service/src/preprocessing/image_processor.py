@@ -1,10 +1,35 @@
+import asyncio
 import cv2
 import numpy as np
 from typing import Dict, List, Tuple, Optional, Any
 import logging
+import io
+from PIL import Image
+
+from src.preprocessing.pipeline import PreprocessingPipeline, PRESETS, DEFAULT_PRESET
+from src.monitoring.tracing import span
 
 logger = logging.getLogger(__name__)
 
+# OpenCV reduced-resolution decode flags, keyed by downscale factor
+REDUCED_COLOR_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+REDUCED_GRAYSCALE_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8
+}
+
+# EXIF orientation tag; values 5-8 rotate by 90 degrees, swapping width and height
+EXIF_ORIENTATION = 0x0112
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
 class ImageProcessor:
     """
     Image preprocessing for IC marking analysis
@@ -12,12 +37,87 @@ class ImageProcessor:
     
     def __init__(self):
         self.preprocessing_steps = []
+        self._pipelines: Dict[str, PreprocessingPipeline] = {}
+    
+    def decode_image(self, image_data: bytes, target_size: Optional[Tuple[int, int]] = None,
+                     grayscale: bool = False) -> np.ndarray:
+        """
+        Decode uploaded image bytes straight into a BGR array
+        
+        Args:
+            image_data: Raw encoded image bytes (JPEG, PNG, ...)
+            target_size: Target size later passed to process_image (width, height).
+                When given, the decoder drops resolution by the largest factor
+                that still keeps the image at least as large as the resized output.
+            grayscale: Decode straight to a single channel (a third of the memory)
+        
+        Returns:
+            Decoded image as numpy array
+        """
+        if not image_data:
+            raise ValueError("Empty image data")
+        
+        # Wrap the upload buffer without copying it
+        buffer = np.frombuffer(memoryview(image_data), dtype=np.uint8)
+        
+        with span("decode", bytes=len(image_data), grayscale=grayscale) as current:
+            flag = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+            factor = 1
+            if target_size:
+                factor = self._select_reduction_factor(image_data, target_size)
+                flag = (REDUCED_GRAYSCALE_FLAGS if grayscale else REDUCED_COLOR_FLAGS)[factor]
+            
+            image = cv2.imdecode(buffer, flag)
+            if image is None:
+                raise ValueError("Unable to decode image")
+            
+            current.set_attributes(reduction_factor=factor, height=image.shape[0], width=image.shape[1])
+        
+        return image
+    
+    def _select_reduction_factor(self, image_data: bytes, target_size: Tuple[int, int]) -> int:
+        """Pick the largest reduced-decode factor that does not undershoot target_size"""
+        dimensions = self.read_image_dimensions(image_data)
+        if not dimensions:
+            return 1
+        
+        w, h = dimensions
+        target_w, target_h = target_size
+        
+        # Same aspect-preserving scale as the resize step in process_image
+        scale = min(target_w / w, target_h / h)
+        if scale >= 1.0:
+            return 1
+        
+        factor = 1
+        for candidate in sorted(REDUCED_COLOR_FLAGS):
+            if candidate * scale <= 1.0:
+                factor = candidate
+        return factor
+    
+    def read_image_dimensions(self, image_data: bytes) -> Optional[Tuple[int, int]]:
+        """
+        Read (width, height) from the image header without decoding pixels
+        
+        The size is the one cv2.imdecode returns, i.e. after EXIF orientation:
+        a portrait photo stored as a landscape JPEG reports portrait dimensions.
+        """
+        try:
+            with Image.open(io.BytesIO(image_data)) as header:
+                w, h = header.size
+                if header.getexif().get(EXIF_ORIENTATION) in TRANSPOSED_ORIENTATIONS:
+                    return h, w
+                return w, h
+        except Exception:
+            return None
     
     async def process_image(self, 
                           image: np.ndarray, 
                           auto_enhance: bool = True,
                           target_size: Optional[Tuple[int, int]] = None,
-                          return_intermediate: bool = False) -> Tuple[np.ndarray, List[str], Dict[str, Any]]:
+                          return_intermediate: bool = False,
+                          preset: str = DEFAULT_PRESET,
+                          timings: Optional[Dict[str, float]] = None) -> Tuple[np.ndarray, List[str], Dict[str, Any]]:
         """
         Process IC image for optimal OCR recognition
         
@@ -26,58 +126,54 @@ class ImageProcessor:
             auto_enhance: Apply automatic enhancement
             target_size: Target size for resizing (width, height)
             return_intermediate: Return intermediate processing steps
-            
+            preset: Name of the preprocessing preset to run
+            timings: Optional dict filled with per-stage timings in milliseconds
+        
         Returns:
             Tuple of (processed_image, preprocessing_steps, quality_metrics)
         """
-        steps = []
-        quality_metrics = {}
-        
         if image is None or image.size == 0:
             raise ValueError("Invalid input image")
         
-        processed = image.copy()
+        pipeline = self.get_pipeline(preset)
         
-        # Step 1: Convert to grayscale if needed
-        if len(processed.shape) == 3:
-            processed = cv2.cvtColor(processed, cv2.COLOR_BGR2GRAY)
-            steps.append("convert_to_grayscale")
+        # The stages are CPU-bound OpenCV calls: run them off the event loop
+        processed, steps, quality_metrics, stage_timings = await asyncio.to_thread(
+            self._run_pipeline, pipeline, image, target_size, auto_enhance, preset
+        )
         
-        # Step 2: Resize if target size specified
-        if target_size:
-            h, w = processed.shape
-            target_w, target_h = target_size
-            
-            # Calculate scale factor to maintain aspect ratio
-            scale = min(target_w / w, target_h / h)
-            if scale < 1.0:  # Only downsize
-                new_w, new_h = int(w * scale), int(h * scale)
-                processed = cv2.resize(processed, (new_w, new_h), interpolation=cv2.INTER_AREA)
-                steps.append(f"resize_to_{new_w}x{new_h}")
-        
-        # Step 3: Noise reduction
-        processed = cv2.bilateralFilter(processed, 9, 75, 75)
-        steps.append("bilateral_filter")
-        
-        # Step 4: Contrast enhancement
-        if auto_enhance:
-            # CLAHE (Contrast Limited Adaptive Histogram Equalization)
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-            processed = clahe.apply(processed)
-            steps.append("clahe_enhancement")
-        
-        # Step 5: Sharpening
-        kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-        processed = cv2.filter2D(processed, -1, kernel)
-        steps.append("sharpening")
-        
-        # Step 6: Calculate quality metrics
-        quality_metrics = self._calculate_quality_metrics(processed)
-        
-        logger.info(f"✅ Image processed with steps: {', '.join(steps)}")
+        if timings is not None:
+            timings.update(stage_timings)
+        
+        logger.info(f"✅ Image processed with preset '{preset}': {', '.join(steps)}")
         
         return processed, steps, quality_metrics
     
+    def _run_pipeline(self, pipeline: PreprocessingPipeline, image: np.ndarray,
+                      target_size: Optional[Tuple[int, int]], auto_enhance: bool,
+                      preset: str) -> Tuple[np.ndarray, List[str], Dict[str, Any], Dict[str, float]]:
+        with span("preprocess", preset=preset):
+            # Every stage returns a new array, so the input is never mutated
+            processed, steps, stage_timings = pipeline.run(
+                image,
+                target_size=target_size,
+                auto_enhance=auto_enhance
+            )
+            
+            # Calculate quality metrics
+            with span("quality_metrics"):
+                quality_metrics = self._calculate_quality_metrics(processed)
+        
+        return processed, steps, quality_metrics, stage_timings
+    
+    def get_pipeline(self, preset: str) -> PreprocessingPipeline:
+        """Return the (cached) pipeline for a preset name"""
+        pipeline = self._pipelines.get(preset)
+        if pipeline is None or pipeline.stages is not PRESETS.get(preset):
+            pipeline = PreprocessingPipeline.from_preset(preset)
+            self._pipelines[preset] = pipeline
+        return pipeline
+    
     def _calculate_quality_metrics(self, image: np.ndarray) -> Dict[str, Any]:
         """Calculate image quality metrics"""
         metrics = {}
@@ -98,4 +194,44 @@ class ImageProcessor:
         else:
             metrics['snr_estimate'] = 0.0
         
-        return metrics
\ No newline at end of file
+        # Text layout, used to route OCR engines
+        metrics.update(self._estimate_text_layout(image))
+        
+        return metrics
+    
+    def _estimate_text_layout(self, image: np.ndarray) -> Dict[str, Any]:
+        """Estimate text line count, height and contrast from an Otsu text mask"""
+        if len(image.shape) == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        
+        _, mask = cv2.threshold(image, 0, 1, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        # Text is the minority class, whatever its polarity
+        if mask.mean() > 0.5:
+            mask = 1 - mask
+        
+        # Stroke-to-background contrast; global std understates it for small markings
+        text_pixels = mask.astype(bool)
+        if text_pixels.any() and not text_pixels.all():
+            text_contrast = abs(float(image[text_pixels].mean()) - float(image[~text_pixels].mean()))
+        else:
+            text_contrast = 0.0
+        
+        h, w = mask.shape
+        rows = mask.sum(axis=1) > max(2, w // 100)
+        
+        # Runs of text rows are lines; very short runs are noise
+        line_heights = []
+        run = 0
+        for is_text in np.append(rows, False):
+            if is_text:
+                run += 1
+            else:
+                if run >= 4:
+                    line_heights.append(run)
+                run = 0
+        
+        return {
+            'text_line_count': len(line_heights),
+            'text_height': float(np.median(line_heights)) if line_heights else 0.0,
+            'text_contrast': text_contrast
+        }
\ No newline at end of file
@@ -0,0 +1,200 @@
+import cv2
+import numpy as np
+import json
+import time
+import logging
+from typing import Dict, List, Tuple, Optional, Any, Callable
+
+from src.monitoring.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Stage implementations. Each takes the current image, the pipeline context
+# and its own parameters, and returns (image, step_label). A None label
+# means the stage decided there was nothing to do.
+
+def _grayscale(image: np.ndarray, context: Dict[str, Any]) -> Tuple[np.ndarray, Optional[str]]:
+    if len(image.shape) == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), "convert_to_grayscale"
+    return image, None
+
+def _resize(image: np.ndarray, context: Dict[str, Any]) -> Tuple[np.ndarray, Optional[str]]:
+    target_size = context.get('target_size')
+    if not target_size:
+        return image, None
+    
+    h, w = image.shape[:2]
+    target_w, target_h = target_size
+    
+    # Calculate scale factor to maintain aspect ratio
+    scale = min(target_w / w, target_h / h)
+    if scale >= 1.0:  # Only downsize
+        return image, None
+    
+    new_w, new_h = int(w * scale), int(h * scale)
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA)
+    return resized, f"resize_to_{new_w}x{new_h}"
+
+def _bilateral_filter(image: np.ndarray, context: Dict[str, Any], diameter: int = 9,
+                      sigma_color: float = 75, sigma_space: float = 75) -> Tuple[np.ndarray, Optional[str]]:
+    return cv2.bilateralFilter(image, diameter, sigma_color, sigma_space), "bilateral_filter"
+
+def _gaussian_blur(image: np.ndarray, context: Dict[str, Any], kernel_size: int = 3) -> Tuple[np.ndarray, Optional[str]]:
+    return cv2.GaussianBlur(image, (kernel_size, kernel_size), 0), "gaussian_blur"
+
+def _median_blur(image: np.ndarray, context: Dict[str, Any], kernel_size: int = 3) -> Tuple[np.ndarray, Optional[str]]:
+    return cv2.medianBlur(image, kernel_size), "median_blur"
+
+def _clahe(image: np.ndarray, context: Dict[str, Any], clip_limit: float = 2.0,
+           tile_grid_size: int = 8) -> Tuple[np.ndarray, Optional[str]]:
+    # CLAHE (Contrast Limited Adaptive Histogram Equalization)
+    clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(tile_grid_size, tile_grid_size))
+    return clahe.apply(image), "clahe_enhancement"
+
+def _tophat(image: np.ndarray, context: Dict[str, Any], kernel_size: int = 15,
+            dark_text: bool = False) -> Tuple[np.ndarray, Optional[str]]:
+    # Flatten uneven package illumination around faint laser-etched strokes
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_size, kernel_size))
+    operation = cv2.MORPH_BLACKHAT if dark_text else cv2.MORPH_TOPHAT
+    return cv2.morphologyEx(image, operation, kernel), "tophat_background_removal"
+
+def _normalize(image: np.ndarray, context: Dict[str, Any]) -> Tuple[np.ndarray, Optional[str]]:
+    return cv2.normalize(image, None, 0, 255, cv2.NORM_MINMAX), "normalize_intensity"
+
+def _sharpen(image: np.ndarray, context: Dict[str, Any]) -> Tuple[np.ndarray, Optional[str]]:
+    kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
+    return cv2.filter2D(image, -1, kernel), "sharpening"
+
+def _unsharp_mask(image: np.ndarray, context: Dict[str, Any], sigma: float = 1.0,
+                  amount: float = 1.0) -> Tuple[np.ndarray, Optional[str]]:
+    blurred = cv2.GaussianBlur(image, (0, 0), sigma)
+    return cv2.addWeighted(image, 1.0 + amount, blurred, -amount, 0), "unsharp_mask"
+
+STAGES: Dict[str, Callable[..., Tuple[np.ndarray, Optional[str]]]] = {
+    'grayscale': _grayscale,
+    'resize': _resize,
+    'bilateral_filter': _bilateral_filter,
+    'gaussian_blur': _gaussian_blur,
+    'median_blur': _median_blur,
+    'clahe': _clahe,
+    'tophat': _tophat,
+    'normalize': _normalize,
+    'sharpen': _sharpen,
+    'unsharp_mask': _unsharp_mask
+}
+
+# Stages skipped when auto_enhance is off
+ENHANCEMENT_STAGES = {'clahe', 'tophat', 'normalize'}
+
+PRESETS: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {
+    # Cheap path for clean, high-contrast parts
+    'fast': [
+        ('grayscale', {}),
+        ('resize', {}),
+        ('gaussian_blur', {'kernel_size': 3}),
+        ('clahe', {'clip_limit': 2.0, 'tile_grid_size': 8})
+    ],
+    # The original fixed chain
+    'balanced': [
+        ('grayscale', {}),
+        ('resize', {}),
+        ('bilateral_filter', {'diameter': 9, 'sigma_color': 75, 'sigma_space': 75}),
+        ('clahe', {'clip_limit': 2.0, 'tile_grid_size': 8}),
+        ('sharpen', {})
+    ],
+    # Faint etched markings on textured packages
+    'laser_etched_low_contrast': [
+        ('grayscale', {}),
+        ('resize', {}),
+        ('median_blur', {'kernel_size': 3}),
+        ('tophat', {'kernel_size': 21}),
+        ('normalize', {}),
+        ('clahe', {'clip_limit': 4.0, 'tile_grid_size': 8}),
+        ('unsharp_mask', {'sigma': 1.5, 'amount': 1.5})
+    ]
+}
+
+DEFAULT_PRESET = 'balanced'
+
+def load_presets(path: str):
+    """
+    Add or override presets from a JSON file
+    
+    The file maps preset names to lists of [stage_name, params] pairs,
+    e.g. {"my_preset": [["grayscale", {}], ["clahe", {"clip_limit": 3.0}]]}
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        definitions = json.load(f)
+    
+    for name, stages in definitions.items():
+        PRESETS[name] = [(stage, dict(params or {})) for stage, params in stages]
+        # Fail fast on typos instead of at request time
+        PreprocessingPipeline.from_preset(name)
+    
+    logger.info(f"✅ Loaded preprocessing presets: {', '.join(definitions)}")
+
+class PreprocessingPipeline:
+    """
+    Ordered sequence of named preprocessing stages with per-stage timing
+    """
+    
+    def __init__(self, stages: List[Tuple[str, Dict[str, Any]]], name: str = 'custom'):
+        for stage_name, _ in stages:
+            if stage_name not in STAGES:
+                raise ValueError(f"Unknown preprocessing stage: {stage_name}")
+        
+        self.name = name
+        self.stages = stages
+    
+    @classmethod
+    def from_preset(cls, preset: str) -> 'PreprocessingPipeline':
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown preprocessing preset: {preset}")
+        return cls(PRESETS[preset], name=preset)
+    
+    def describe(self) -> Dict[str, Any]:
+        """Serializable description, e.g. for cache keys and /presets"""
+        return {
+            'preset': self.name,
+            'stages': [[stage_name, params] for stage_name, params in self.stages]
+        }
+    
+    def run(self,
+            image: np.ndarray,
+            target_size: Optional[Tuple[int, int]] = None,
+            auto_enhance: bool = True) -> Tuple[np.ndarray, List[str], Dict[str, float]]:
+        """
+        Run every stage in order
+        
+        Args:
+            image: Input image as numpy array
+            target_size: Target size for the resize stage (width, height)
+            auto_enhance: Run contrast enhancement stages
+        
+        Returns:
+            Tuple of (processed_image, applied_steps, stage_timings_ms)
+        """
+        context = {'target_size': target_size}
+        steps = []
+        timings = {}
+        
+        for stage_name, params in self.stages:
+            if not auto_enhance and stage_name in ENHANCEMENT_STAGES:
+                continue
+            
+            started = time.perf_counter()
+            with span(f"preprocess.{stage_name}"):
+                image, step = STAGES[stage_name](image, context, **params)
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            
+            key = stage_name
+            suffix = 2
+            while key in timings:
+                key = f"{stage_name}_{suffix}"
+                suffix += 1
+            timings[key] = round(elapsed_ms, 3)
+            
+            if step:
+                steps.append(step)
+        
+        return image, steps, timings
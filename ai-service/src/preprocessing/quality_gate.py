@@ -0,0 +1,100 @@
+import cv2
+import numpy as np
+from typing import Dict, List, Tuple, Optional, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+class QualityGate:
+    """
+    Fast pre-OCR check that rejects images OCR cannot read
+    
+    Runs on a small downsampled grayscale copy of the frame, so it costs a
+    fraction of a millisecond compared to a full preprocessing + OCR pass.
+    """
+    
+    DEFAULT_THRESHOLDS = {
+        'min_sharpness': 15.0,          # Laplacian variance on the downsampled frame
+        'min_brightness': 10.0,         # Mean intensity (0-255); chip tops are dark
+        'max_brightness': 235.0,
+        'max_dark_clipped_fraction': 0.6,    # Share of pixels at the black clip
+        'max_bright_clipped_fraction': 0.25, # Share of pixels at the white clip (glare)
+        'min_text_contrast': 30.0,      # 99.9th percentile of local gradient
+        'min_edge_density': 0.0005      # Share of pixels on a strong edge
+    }
+    
+    def __init__(self, thresholds: Optional[Dict[str, float]] = None, analysis_size: int = 512):
+        self.thresholds = dict(self.DEFAULT_THRESHOLDS)
+        if thresholds:
+            self.thresholds.update(thresholds)
+        self.analysis_size = analysis_size
+    
+    def evaluate(self, image: np.ndarray) -> Dict[str, Any]:
+        """
+        Score an image and decide whether it is worth running OCR on
+        
+        Args:
+            image: Decoded BGR or grayscale image
+        
+        Returns:
+            Dictionary with 'passed', 'reasons' (retake causes) and 'metrics'
+        """
+        gray = self._downsample(image)
+        metrics = self._measure(gray)
+        reasons = []
+        t = self.thresholds
+        
+        if metrics['sharpness'] < t['min_sharpness']:
+            reasons.append('blurred')
+        
+        if metrics['brightness'] < t['min_brightness'] or metrics['dark_clipped_fraction'] > t['max_dark_clipped_fraction']:
+            reasons.append('underexposed')
+        elif metrics['brightness'] > t['max_brightness'] or metrics['bright_clipped_fraction'] > t['max_bright_clipped_fraction']:
+            reasons.append('saturated')
+        
+        if metrics['text_contrast'] < t['min_text_contrast']:
+            reasons.append('low_contrast')
+        
+        if metrics['edge_density'] < t['min_edge_density']:
+            reasons.append('empty')
+        
+        return {
+            'passed': not reasons,
+            'reasons': reasons,
+            'metrics': metrics
+        }
+    
+    def _downsample(self, image: np.ndarray) -> np.ndarray:
+        if len(image.shape) == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        
+        h, w = image.shape
+        scale = self.analysis_size / max(h, w)
+        if scale < 1.0:
+            image = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))),
+                               interpolation=cv2.INTER_AREA)
+        return image
+    
+    def _measure(self, gray: np.ndarray) -> Dict[str, float]:
+        metrics = {}
+        pixels = gray.size
+        
+        # Exposure and clipping
+        metrics['brightness'] = float(np.mean(gray))
+        histogram = np.bincount(gray.ravel(), minlength=256)
+        metrics['dark_clipped_fraction'] = float(histogram[:5].sum() / pixels)
+        metrics['bright_clipped_fraction'] = float(histogram[251:].sum() / pixels)
+        
+        # Sharpness (Laplacian variance)
+        metrics['sharpness'] = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+        
+        # Text contrast: stroke-to-background step at the strongest local edges.
+        # Markings cover a few percent of the frame, so global spread would miss them.
+        gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, np.ones((3, 3), np.uint8))
+        gradient_histogram = np.cumsum(np.bincount(gradient.ravel(), minlength=256)) / pixels
+        metrics['text_contrast'] = float(np.searchsorted(gradient_histogram, 0.999))
+        
+        # Text presence: share of pixels on strong gradients
+        metrics['edge_density'] = float(np.count_nonzero(gradient > 40) / pixels)
+        
+        return metrics
@@ -0,0 +1,117 @@
+import cv2
+import numpy as np
+from typing import Dict, List, Tuple, Optional, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TextLocalizer:
+    """
+    Cheap marking-region finder based on morphological gradient and contours
+    
+    Character strokes produce dense, strong local gradients; closing them
+    with a wide kernel fuses each text line into one blob whose bounding
+    box is a crop candidate. Costs a few milliseconds on a 1024x768 frame.
+    """
+    
+    def __init__(self,
+                 padding: int = 8,
+                 min_height: int = 8,
+                 min_area: int = 150,
+                 max_regions: int = 8,
+                 max_coverage: float = 0.6):
+        self.padding = padding
+        self.min_height = min_height
+        self.min_area = min_area
+        self.max_regions = max_regions
+        self.max_coverage = max_coverage
+    
+    def locate(self, image: np.ndarray) -> List[Dict[str, int]]:
+        """
+        Find text regions in a preprocessed grayscale frame
+        
+        Args:
+            image: Grayscale image as numpy array
+        
+        Returns:
+            List of regions as {'x', 'y', 'width', 'height'} in the image's
+            own coordinates, in reading order. Empty when nothing convincing
+            was found or the regions would cover most of the frame anyway,
+            in which case callers should OCR the whole frame.
+        """
+        if len(image.shape) == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        
+        h, w = image.shape
+        
+        # Stroke edges, binarized with Otsu so the threshold follows the frame
+        gradient = cv2.morphologyEx(image, cv2.MORPH_GRADIENT,
+                                    cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+        _, mask = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        
+        # Join characters into lines, then drop isolated specks
+        line_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(9, w // 60), 3))
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, line_kernel)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+        
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        
+        boxes = []
+        for contour in contours:
+            x, y, bw, bh = cv2.boundingRect(contour)
+            if bh < self.min_height or bw * bh < self.min_area:
+                continue
+            # Lines of text are wider than tall; tall thin blobs are package edges or pins
+            if bw < bh * 0.8:
+                continue
+            # Fraction of the box actually covered by strokes
+            fill = cv2.countNonZero(mask[y:y + bh, x:x + bw]) / float(bw * bh)
+            if fill < 0.2:
+                continue
+            boxes.append([x, y, x + bw, y + bh])
+        
+        if not boxes:
+            return []
+        
+        boxes = self._merge(self._pad(boxes, w, h))
+        
+        # Keep the largest candidates, then present them in reading order
+        boxes.sort(key=lambda b: (b[2] - b[0]) * (b[3] - b[1]), reverse=True)
+        boxes = boxes[:self.max_regions]
+        
+        covered = sum((b[2] - b[0]) * (b[3] - b[1]) for b in boxes)
+        if covered > self.max_coverage * w * h:
+            return []
+        
+        boxes.sort(key=lambda b: (b[1], b[0]))
+        return [
+            {'x': int(x1), 'y': int(y1), 'width': int(x2 - x1), 'height': int(y2 - y1)}
+            for x1, y1, x2, y2 in boxes
+        ]
+    
+    def _pad(self, boxes: List[List[int]], w: int, h: int) -> List[List[int]]:
+        p = self.padding
+        return [
+            [max(0, x1 - p), max(0, y1 - p), min(w, x2 + p), min(h, y2 + p)]
+            for x1, y1, x2, y2 in boxes
+        ]
+    
+    def _merge(self, boxes: List[List[int]]) -> List[List[int]]:
+        """Merge overlapping boxes until no pair overlaps"""
+        merged = True
+        while merged:
+            merged = False
+            result = []
+            for box in boxes:
+                for other in result:
+                    if box[0] <= other[2] and other[0] <= box[2] and box[1] <= other[3] and other[1] <= box[3]:
+                        other[0] = min(other[0], box[0])
+                        other[1] = min(other[1], box[1])
+                        other[2] = max(other[2], box[2])
+                        other[3] = max(other[3], box[3])
+                        merged = True
+                        break
+                else:
+                    result.append(list(box))
+            boxes = result
+        return boxes
@@ -0,0 +1,290 @@
+import math
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager, AsyncExitStack
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Any, Iterable, AsyncIterator
+
+from src.monitoring.tracing import span
+
+logger = logging.getLogger(__name__)
+
+class AdmissionRejected(Exception):
+    """
+    A request was turned away before doing OCR work
+    
+    Args:
+        message: Reason shown to the client
+        engine: Engine whose gate rejected the request ('' when none)
+        retry_after: Suggested wait before retrying, in whole seconds
+    """
+    
+    reason = 'rejected'
+    
+    def __init__(self, message: str, engine: str = '', retry_after: int = 1):
+        super().__init__(message)
+        self.engine = engine
+        self.retry_after = retry_after
+
+class QueueFull(AdmissionRejected):
+    """The engine already holds as many requests as it may queue"""
+    
+    reason = 'queue_full'
+
+class DeadlineExceeded(AdmissionRejected):
+    """The request's deadline passed, or will pass before its OCR could start"""
+    
+    reason = 'deadline'
+
+class EngineGate:
+    """
+    Bounded queue in front of one OCR engine
+    
+    Admitted requests hold a place from admission until they finish, so the
+    preprocessing ahead of OCR counts against the queue too. At most
+    max_concurrent of them run OCR at once; the rest wait for a slot.
+    
+    Args:
+        name: Engine name
+        max_concurrent: Requests running OCR on this engine at once
+        max_queue: Admitted requests allowed beyond max_concurrent
+    """
+    
+    # Weight of the newest OCR duration in the moving average
+    EWMA_ALPHA = 0.2
+    
+    def __init__(self, name: str, max_concurrent: int, max_queue: int):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.admitted = 0
+        self.running = 0
+        # Moving average of how long a request holds an OCR slot
+        self.ewma_seconds: Optional[float] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        
+        self.stats = {
+            'admitted': 0,
+            'released': 0,
+            'queue_full': 0,
+            'deadline': 0
+        }
+    
+    @property
+    def capacity(self) -> int:
+        return self.max_concurrent + self.max_queue
+    
+    @property
+    def waiting(self) -> int:
+        """Admitted requests not (yet) running OCR"""
+        return self.admitted - self.running
+    
+    def estimated_wait(self) -> float:
+        """Seconds a request admitted now would wait for an OCR slot"""
+        if self.ewma_seconds is None:
+            return 0.0
+        ahead = max(0, self.admitted - self.max_concurrent + 1)
+        return ahead / self.max_concurrent * self.ewma_seconds
+    
+    def retry_after(self) -> int:
+        """Whole seconds until a queue place is likely to free up"""
+        return max(1, math.ceil(self.estimated_wait()))
+    
+    @asynccontextmanager
+    async def slot(self, deadline: Optional[float]) -> AsyncIterator[None]:
+        """Wait for an OCR slot, giving up once the deadline passes"""
+        if self._slots is None:
+            # Created lazily so the semaphore binds to the serving event loop
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        
+        if deadline is None:
+            await self._slots.acquire()
+        else:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.stats['deadline'] += 1
+                raise DeadlineExceeded(f"Deadline passed before {self.name} OCR started", self.name, self.retry_after())
+            try:
+                await asyncio.wait_for(self._slots.acquire(), remaining)
+            except asyncio.TimeoutError:
+                self.stats['deadline'] += 1
+                raise DeadlineExceeded(f"Deadline passed while queued for {self.name}", self.name, self.retry_after())
+        
+        self.running += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._slots.release()
+            held = time.monotonic() - started
+            if self.ewma_seconds is None:
+                self.ewma_seconds = held
+            else:
+                self.ewma_seconds += self.EWMA_ALPHA * (held - self.ewma_seconds)
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'admitted': self.admitted,
+            'running': self.running,
+            'waiting': self.waiting,
+            'avg_ocr_ms': round(self.ewma_seconds * 1000.0, 1) if self.ewma_seconds is not None else None,
+            'stats': dict(self.stats)
+        }
+
+# Ticket of the request the running task is serving; lets the OCR stage
+# find its gates without threading them through the pipeline
+_current_ticket: ContextVar[Optional['Ticket']] = ContextVar('admission_ticket', default=None)
+
+class Ticket:
+    """
+    A request's places in the queues of the engines it uses
+    
+    Use as a context manager: on entry it becomes the current ticket (see
+    ocr_slot), on exit its queue places are given back. Engines not known
+    at admission (e.g. the one an engine router picks) get their place
+    when the request first asks for their slot.
+    """
+    
+    def __init__(self, controller: 'AdmissionController', gates: List[EngineGate],
+                 deadline: Optional[float], bounded: bool = True):
+        self.controller = controller
+        self.gates: Dict[str, EngineGate] = {gate.name: gate for gate in gates}
+        self.deadline = deadline
+        self.bounded = bounded
+        self._released = False
+        self._token = None
+    
+    @asynccontextmanager
+    async def slot(self, engines: Iterable[str]) -> AsyncIterator[None]:
+        """
+        Hold an OCR slot on each engine's gate, taking a queue place first
+        on engines the ticket was not admitted for
+        
+        Raises QueueFull for such an engine when its queue is full, and
+        DeadlineExceeded when the deadline passes before the slots are free.
+        """
+        # Always acquired in name order, so multi-engine requests cannot deadlock
+        engines = sorted(dict.fromkeys(engines))
+        missing = [self.controller.gate(engine) for engine in engines if engine not in self.gates]
+        if missing:
+            self.controller.reserve(missing, self.deadline, self.bounded)
+            self.gates.update((gate.name, gate) for gate in missing)
+        
+        async with AsyncExitStack() as stack:
+            with span("ocr_queue", engines=engines):
+                for engine in engines:
+                    await stack.enter_async_context(self.gates[engine].slot(self.deadline))
+            yield
+    
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        for gate in self.gates.values():
+            gate.admitted -= 1
+            gate.stats['released'] += 1
+    
+    def __enter__(self) -> 'Ticket':
+        self._token = _current_ticket.set(self)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        _current_ticket.reset(self._token)
+        self.release()
+
+@asynccontextmanager
+async def ocr_slot(*engines: str) -> AsyncIterator[None]:
+    """
+    Wait for OCR slots on the named engines for the current request
+    
+    Hold it only around the OCR calls of those engines. Raises QueueFull
+    or DeadlineExceeded (see Ticket.slot). Without a ticket (warm-up,
+    benchmarks) OCR runs ungated.
+    """
+    ticket = _current_ticket.get()
+    if ticket is None or not engines:
+        yield
+        return
+    async with ticket.slot(engines):
+        yield
+
+class AdmissionController:
+    """
+    Admission control for OCR requests: one bounded queue per engine
+    
+    Requests are admitted or rejected up front, before any decoding or
+    preprocessing, so bursts beyond what the engines can absorb fail fast
+    with a retry hint instead of piling up until clients time out.
+    
+    Args:
+        max_concurrent: Default OCR concurrency per engine
+        max_queue: Default admitted requests per engine beyond max_concurrent
+        limits: Per-engine overrides, e.g. {'easyocr': {'max_queue': 4}}
+    """
+    
+    def __init__(self, max_concurrent: int = 2, max_queue: int = 16,
+                 limits: Optional[Dict[str, Dict[str, int]]] = None):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.limits = limits or {}
+        self.gates: Dict[str, EngineGate] = {}
+    
+    def gate(self, engine: str) -> EngineGate:
+        gate = self.gates.get(engine)
+        if gate is None:
+            limits = self.limits.get(engine, {})
+            gate = self.gates[engine] = EngineGate(
+                engine,
+                limits.get('max_concurrent', self.max_concurrent),
+                limits.get('max_queue', self.max_queue)
+            )
+        return gate
+    
+    def admit(self, engines: Iterable[str], deadline: Optional[float] = None, bounded: bool = True) -> Ticket:
+        """
+        Take a place in the queue of each engine the request will use
+        
+        Args:
+            engines: Engines known to run now; others are admitted lazily by
+                ocr_slot
+            deadline: time.monotonic() value after which OCR must not start
+            bounded: False queues without a size limit (callers that bound
+                their own concurrency, e.g. batch analysis)
+        
+        Returns:
+            Ticket to enter around the request's work
+        
+        Raises:
+            QueueFull: An engine's queue is full
+            DeadlineExceeded: The deadline has passed, or the estimated
+                queue wait would outlast it
+        """
+        gates = [self.gate(engine) for engine in dict.fromkeys(engines)]
+        self.reserve(gates, deadline, bounded)
+        return Ticket(self, gates, deadline, bounded)
+    
+    def reserve(self, gates: List[EngineGate], deadline: Optional[float], bounded: bool = True):
+        """Take one queue place on each gate, or none if any of them rejects (see admit)"""
+        remaining = deadline - time.monotonic() if deadline is not None else None
+        
+        for gate in gates:
+            if bounded and gate.admitted >= gate.capacity:
+                gate.stats['queue_full'] += 1
+                raise QueueFull(f"{gate.name} queue is full ({gate.admitted} requests)", gate.name, gate.retry_after())
+            if remaining is not None and (remaining <= 0 or gate.estimated_wait() > remaining):
+                gate.stats['deadline'] += 1
+                raise DeadlineExceeded(
+                    f"Deadline cannot be met: estimated {gate.name} queue wait {gate.estimated_wait():.1f}s",
+                    gate.name, gate.retry_after()
+                )
+        
+        for gate in gates:
+            gate.admitted += 1
+            gate.stats['admitted'] += 1
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {engine: gate.get_status() for engine, gate in self.gates.items()}
@@ -0,0 +1,582 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple, Callable, Awaitable, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+# A job moves queued -> running -> done | failed; finished jobs expire after the TTL
+FINISHED_STATES = ('done', 'failed')
+
+class JobQueueFull(Exception):
+    """More jobs are queued than the manager accepts"""
+
+class MemoryJobStore:
+    """
+    In-process job store; jobs are lost on restart
+    
+    Jobs are plain dicts (see JobManager.submit); the uploaded image is
+    kept beside the job until it finishes.
+    """
+    
+    blocking = False
+    durable = False
+    
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._payloads: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+    
+    def add(self, job: Dict[str, Any], payload: bytes):
+        with self._lock:
+            self._jobs[job['id']] = dict(job)
+            self._payloads[job['id']] = payload
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+    
+    def claim_next(self, owner: str, lease: float) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        """Mark the oldest queued job running for owner; returns it with its image"""
+        with self._lock:
+            queued = [job for job in self._jobs.values() if job['status'] == 'queued']
+            if not queued:
+                return None
+            job = min(queued, key=lambda job: job['created_at'])
+            now = time.time()
+            job.update(status='running', owner=owner, started_at=now, lease_expires_at=now + lease,
+                       attempts=job['attempts'] + 1)
+            return dict(job), self._payloads[job['id']]
+    
+    def renew(self, owner: str, job_ids: List[str], lease: float) -> int:
+        """Only this process runs the jobs, so leases never lapse"""
+        return 0
+    
+    def release(self, owner: str) -> int:
+        return 0
+    
+    def finish(self, job_id: str, owner: str, status: str, result: Optional[Dict[str, Any]],
+               error: Optional[str], ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['owner'] != owner:
+                return False
+            job.update(status=status, result=result, error=error, finished_at=now, expires_at=now + ttl,
+                       lease_expires_at=None)
+            self._payloads.pop(job_id, None)
+        return True
+    
+    def recover(self, max_attempts: int, ttl: float) -> int:
+        """Nothing survives a restart in memory"""
+        return 0
+    
+    def delete_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job['expires_at'] is not None and job['expires_at'] < now]
+            for job_id in expired:
+                del self._jobs[job_id]
+                self._payloads.pop(job_id, None)
+        return len(expired)
+    
+    def count_by_status(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+        return counts
+
+class SQLiteJobStore:
+    """
+    Durable job store in a local SQLite file
+    
+    Queued jobs (with their images) survive a restart, and jobs that were
+    running when their process died are queued again. Web workers on one
+    host can share the file: claiming a job is a single transaction, so
+    each job runs once. A claim is a lease the owner keeps renewing while
+    the job runs; a job is only treated as interrupted once its lease
+    lapses, so a restarted worker never takes over jobs its live siblings
+    are running.
+    """
+    
+    blocking = True
+    durable = True
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            inspection_id TEXT NOT NULL,
+            options TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            expires_at REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            owner TEXT,
+            lease_expires_at REAL,
+            result TEXT,
+            error TEXT,
+            payload BLOB
+        );
+        CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+        CREATE INDEX IF NOT EXISTS jobs_expires ON jobs (expires_at);
+    """
+    
+    COLUMNS = ('id', 'status', 'inspection_id', 'options', 'created_at', 'started_at', 'finished_at',
+               'expires_at', 'attempts', 'owner', 'lease_expires_at', 'result', 'error')
+    
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        # WAL lets pollers read while a worker writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        # Files created before leases existed lack the column
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if 'lease_expires_at' not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN lease_expires_at REAL")
+        self._lock = threading.Lock()
+    
+    def _row_to_job(self, row: Optional[tuple]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(zip(self.COLUMNS, row))
+        job['options'] = json.loads(job['options'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+    
+    def add(self, job: Dict[str, Any], payload: bytes):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, inspection_id, options, created_at, attempts, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job['id'], job['status'], job['inspection_id'], json.dumps(job['options']),
+                 job['created_at'], job['attempts'], payload)
+            )
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row_to_job(row)
+    
+    def claim_next(self, owner: str, lease: float) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        """Mark the oldest queued job running for owner, leased for lease seconds; returns it with its image"""
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two processes
+            # cannot claim the same row
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f"SELECT {', '.join(self.COLUMNS)}, payload FROM jobs "
+                    "WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                started_at = time.time()
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', owner = ?, started_at = ?, lease_expires_at = ?, "
+                    "attempts = attempts + 1 WHERE id = ?",
+                    (owner, started_at, started_at + lease, row[0])
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        
+        job = self._row_to_job(row[:-1])
+        job.update(status='running', owner=owner, started_at=started_at, lease_expires_at=started_at + lease,
+                   attempts=job['attempts'] + 1)
+        return job, row[-1]
+    
+    def renew(self, owner: str, job_ids: List[str], lease: float) -> int:
+        """Extend owner's leases on the given running jobs; returns how many it still holds"""
+        if not job_ids:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET lease_expires_at = ? WHERE status = 'running' AND owner = ? "
+                f"AND id IN ({', '.join('?' * len(job_ids))})",
+                (time.time() + lease, owner, *job_ids)
+            )
+        return cursor.rowcount
+    
+    def release(self, owner: str) -> int:
+        """End owner's leases at once (on shutdown), so its unfinished jobs are recovered without waiting"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE status = 'running' AND owner = ?",
+                (time.time(), owner)
+            )
+        return cursor.rowcount
+    
+    def finish(self, job_id: str, owner: str, status: str, result: Optional[Dict[str, Any]],
+               error: Optional[str], ttl: float) -> bool:
+        """
+        Record a job's outcome
+        
+        Returns False when owner no longer holds the job (its lease lapsed
+        and it was recovered), in which case the outcome is dropped.
+        """
+        now = time.time()
+        with self._lock:
+            # The image is only needed to (re)run the job
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, expires_at = ?, "
+                "lease_expires_at = NULL, payload = NULL WHERE id = ? AND owner = ? AND status = 'running'",
+                (status, json.dumps(result) if result is not None else None, error, now, now + ttl, job_id, owner)
+            )
+        return cursor.rowcount == 1
+    
+    def recover(self, max_attempts: int, ttl: float) -> int:
+        """
+        Queue again the running jobs whose lease lapsed
+        
+        A lapsed lease means the owner died (or lost the store for longer
+        than the lease); jobs of live owners, including sibling workers
+        sharing the file, are left alone. Jobs that already used
+        max_attempts fail instead, so an image that crashes the service
+        cannot take it down in a loop.
+        """
+        with self._lock:
+            # One transaction, so no owner renews a lease between the check and the requeue
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                orphaned = self._conn.execute(
+                    "SELECT id, attempts FROM jobs WHERE status = 'running' "
+                    "AND (lease_expires_at IS NULL OR lease_expires_at <= ?)", (now,)
+                ).fetchall()
+                for job_id, attempts in orphaned:
+                    if attempts >= max_attempts:
+                        self._conn.execute(
+                            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, expires_at = ?, "
+                            "lease_expires_at = NULL, payload = NULL WHERE id = ?",
+                            (f"Interrupted {attempts} times", now, now + ttl, job_id)
+                        )
+                    else:
+                        self._conn.execute(
+                            "UPDATE jobs SET status = 'queued', owner = NULL, lease_expires_at = NULL WHERE id = ?",
+                            (job_id,)
+                        )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(orphaned)
+    
+    def delete_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),))
+        return cursor.rowcount
+    
+    def count_by_status(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def create_job_store(kind: str, path: str = "jobs/jobs.sqlite3"):
+    """
+    Build a job store by name
+    
+    Args:
+        kind: 'memory' or 'sqlite'
+        path: Database file for the sqlite store
+    
+    Returns:
+        Job store instance
+    """
+    if kind == 'memory':
+        return MemoryJobStore()
+    elif kind == 'sqlite':
+        return SQLiteJobStore(path)
+    else:
+        raise ValueError(f"Unsupported job store: {kind}")
+
+class JobManager:
+    """
+    Background analysis jobs: submit now, poll or stream the result later
+    
+    A small pool of asyncio workers claims queued jobs from the store and
+    runs them through handler(job, image_bytes), which returns the result
+    dict. Workers mostly await the OCR executor, so they cost no threads of
+    their own. Finished jobs are kept for ttl seconds.
+    
+    Args:
+        store: MemoryJobStore or SQLiteJobStore
+        handler: Coroutine function running one job
+        workers: Jobs run concurrently by this process
+        max_queued: Queued jobs accepted before submit raises JobQueueFull
+        ttl: Seconds finished jobs (and their results) are kept
+        cleanup_interval: Seconds between expiry sweeps
+        poll_interval: Seconds between store polls; picks up jobs queued by
+            other processes sharing a durable store. Also the back-off after
+            a failed store call
+        max_attempts: Runs of a job interrupted by restarts before it fails
+        lease: Seconds a claim stays valid without renewal; renewed every
+            lease / 3 while the job runs, so a job is only recovered (by the
+            same heartbeat, in any process) once its owner stopped renewing
+    """
+    
+    def __init__(self, store: Any, handler: Callable[[Dict[str, Any], bytes], Awaitable[Dict[str, Any]]],
+                 workers: int = 2, max_queued: int = 1000, ttl: float = 3600.0,
+                 cleanup_interval: float = 60.0, poll_interval: float = 1.0, max_attempts: int = 3,
+                 lease: float = 30.0):
+        self.store = store
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self.cleanup_interval = cleanup_interval
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease = lease
+        
+        # Identifies this run of the service in the store's owner column
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        # Jobs this run is executing, whose leases the heartbeat renews
+        self._held: set = set()
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        # Per-job events set on every state change, and how many watch() calls wait on each
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._watchers: Dict[str, int] = {}
+        
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'expired': 0,
+            'recovered': 0,
+            'store_errors': 0
+        }
+    
+    async def _call(self, method: Callable, *args):
+        """Run a store call, off the event loop for blocking stores"""
+        if getattr(self.store, 'blocking', False):
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+    
+    async def start(self):
+        """Requeue interrupted jobs and start the workers and the expiry sweep"""
+        self._wakeup = asyncio.Event()
+        await self._recover()
+        
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._cleanup_loop()))
+        self._tasks.append(asyncio.create_task(self._heartbeat_loop()))
+    
+    async def stop(self):
+        """
+        Stop the workers
+        
+        Jobs cut off mid-run stay 'running' in a durable store with their
+        leases ended, so the next start() (or a sibling's heartbeat) queues
+        them again right away.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._held.clear()
+        try:
+            await self._call(self.store.release, self.owner)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not release job leases, they lapse in {self.lease:.0f}s: {e}")
+        if hasattr(self.store, 'close'):
+            self.store.close()
+    
+    async def submit(self, payload: bytes, inspection_id: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue an analysis job
+        
+        Args:
+            payload: Uploaded image bytes
+            inspection_id: Inspection ID from backend
+            options: JSON-serializable analysis options
+        
+        Returns:
+            The queued job
+        
+        Raises:
+            JobQueueFull: max_queued jobs are already waiting
+        """
+        counts = await self._call(self.store.count_by_status)
+        if counts.get('queued', 0) >= self.max_queued:
+            raise JobQueueFull(f"{counts['queued']} jobs already queued")
+        
+        job = {
+            'id': uuid.uuid4().hex,
+            'status': 'queued',
+            'inspection_id': inspection_id,
+            'options': options,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'expires_at': None,
+            'attempts': 0,
+            'owner': None,
+            'result': None,
+            'error': None
+        }
+        await self._call(self.store.add, job, payload)
+        self.stats['submitted'] += 1
+        if self._wakeup:
+            self._wakeup.set()
+        return job
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = await self._call(self.store.get, job_id)
+        # Expired but not swept yet: already gone as far as clients are concerned
+        if job and job['expires_at'] is not None and job['expires_at'] < time.time():
+            return None
+        return job
+    
+    async def watch(self, job_id: str, timeout: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield the job on every status change until it finishes
+        
+        Yields None when nothing changed for timeout seconds (e.g. to send a
+        keep-alive), and stops if the job does not exist.
+        """
+        last_status = None
+        idle = 0.0
+        self._watchers[job_id] = self._watchers.get(job_id, 0) + 1
+        try:
+            while True:
+                # Register before reading, so a change in between is not missed
+                changed = self._changed.setdefault(job_id, asyncio.Event())
+                job = await self.get(job_id)
+                if job is None:
+                    return
+                if job['status'] != last_status:
+                    last_status = job['status']
+                    idle = 0.0
+                    yield job
+                    if job['status'] in FINISHED_STATES:
+                        return
+                elif idle >= timeout:
+                    idle = 0.0
+                    yield None
+                
+                # Changes made by other processes are only seen by polling
+                try:
+                    await asyncio.wait_for(changed.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    idle += self.poll_interval
+        finally:
+            # The last watcher to leave (job finished or expired, client gone) drops the event
+            self._watchers[job_id] -= 1
+            if not self._watchers[job_id]:
+                del self._watchers[job_id]
+                self._changed.pop(job_id, None)
+    
+    def _notify(self, job_id: str):
+        changed = self._changed.pop(job_id, None)
+        if changed:
+            changed.set()
+    
+    async def _worker(self, index: int):
+        while True:
+            try:
+                claimed = await self._call(self.store.claim_next, self.owner, self.lease)
+            except Exception as e:
+                # e.g. "database is locked": the worker must outlive it
+                self.stats['store_errors'] += 1
+                logger.warning(f"⚠️ Job worker {index} could not claim a job: {e}")
+                await asyncio.sleep(self.poll_interval)
+                continue
+            
+            if claimed is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            job, payload = claimed
+            self._held.add(job['id'])
+            self._notify(job['id'])
+            try:
+                result = await self.handler(job, payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Job {job['id']} failed: {e}")
+                await self._finish(job['id'], 'failed', None, str(e))
+            else:
+                await self._finish(job['id'], 'done', result, None)
+            self._notify(job['id'])
+    
+    async def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]], error: Optional[str]):
+        """
+        Record a job's outcome, retrying failed store calls
+        
+        If the store stays unavailable the job is let go: its lease lapses
+        and a heartbeat requeues it, rather than it staying 'running'.
+        """
+        for attempt in range(3):
+            try:
+                if await self._call(self.store.finish, job_id, self.owner, status, result, error, self.ttl):
+                    self.stats['completed' if status == 'done' else 'failed'] += 1
+                else:
+                    logger.warning(f"⚠️ Job {job_id} was recovered by another worker; dropping its outcome")
+                break
+            except Exception as e:
+                self.stats['store_errors'] += 1
+                logger.warning(f"⚠️ Could not record job {job_id} as {status} (attempt {attempt + 1}): {e}")
+                await asyncio.sleep(self.poll_interval)
+        else:
+            logger.error(f"❌ Giving up on recording job {job_id}; it reruns once its lease lapses")
+        self._held.discard(job_id)
+    
+    async def _recover(self):
+        recovered = await self._call(self.store.recover, self.max_attempts, self.ttl)
+        if recovered:
+            self.stats['recovered'] += recovered
+            logger.info(f"♻️ Requeued {recovered} interrupted jobs")
+            if self._wakeup:
+                self._wakeup.set()
+    
+    async def _heartbeat_loop(self):
+        """Renew this run's leases, and requeue jobs of workers that stopped renewing theirs"""
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                await self._call(self.store.renew, self.owner, list(self._held), self.lease)
+                await self._recover()
+            except Exception as e:
+                self.stats['store_errors'] += 1
+                logger.warning(f"⚠️ Job lease heartbeat failed: {e}")
+    
+    async def _cleanup_loop(self):
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                expired = await self._call(self.store.delete_expired)
+            except Exception as e:
+                self.stats['store_errors'] += 1
+                logger.warning(f"⚠️ Job cleanup failed: {e}")
+                continue
+            if expired:
+                self.stats['expired'] += expired
+                logger.info(f"🧹 Removed {expired} expired jobs")
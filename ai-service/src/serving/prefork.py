@@ -0,0 +1,105 @@
+import os
+import gc
+import signal
+import socket
+import time
+from typing import Callable, Dict, Optional
+import logging
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+def serve_prefork(app: str,
+                  host: str,
+                  port: int,
+                  workers: int,
+                  log_level: str = "info",
+                  preload: Optional[Callable[[], None]] = None):
+    """
+    Load models once, then fork uvicorn workers that share them copy-on-write
+    
+    uvicorn's own multi-worker mode spawns fresh interpreters, so every
+    worker would load its own copy of the models. Here the parent runs
+    preload(), binds the listening socket and forks; children inherit the
+    loaded weights and accept on the shared socket. Dead workers are
+    replaced; SIGTERM/SIGINT are forwarded to all workers.
+    
+    preload() must not start threads or run inference (torch/OpenMP thread
+    pools do not survive fork); warm-up belongs in each worker's startup.
+    
+    Args:
+        app: Import string of the ASGI app, e.g. "main:app"
+        host: Bind address
+        port: Bind port
+        workers: Number of worker processes
+        log_level: uvicorn log level
+        preload: Called once in the parent before forking
+    """
+    if preload:
+        started = time.perf_counter()
+        preload()
+        logger.info(f"✅ Models preloaded in {time.perf_counter() - started:.1f}s, forking {workers} workers")
+    
+    # Keep preloaded objects out of the collector so refcount/GC bookkeeping
+    # does not dirty (and thereby copy) the shared pages in every worker
+    gc.collect()
+    gc.freeze()
+    
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    
+    children: Dict[int, int] = {}
+    stopping = False
+    
+    def _fork(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            config = uvicorn.Config(app, log_level=log_level)
+            server = uvicorn.Server(config)
+            try:
+                server.run(sockets=[sock])
+            finally:
+                os._exit(0)
+        children[pid] = slot
+        logger.info(f"👷 Worker {slot} started (pid {pid})")
+    
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+    
+    for slot in range(workers):
+        _fork(slot)
+    
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        
+        slot = children.pop(pid, None)
+        if slot is None:
+            continue
+        if not stopping:
+            logger.warning(f"⚠️ Worker {slot} (pid {pid}) exited with status {status}, restarting")
+            # Avoid a hot fork loop when workers die on startup
+            time.sleep(1.0)
+            _fork(slot)
+    
+    sock.close()
+    logger.info("🔒 All workers stopped")
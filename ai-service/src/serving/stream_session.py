@@ -0,0 +1,212 @@
+import time
+import asyncio
+import logging
+from typing import Callable, Dict, Optional, Any, Awaitable
+
+import numpy as np
+
+from src.preprocessing.frame_change import FrameChangeDetector
+from src.ocr.consensus import TemporalConsensus
+
+logger = logging.getLogger(__name__)
+
+class StreamSession:
+    """
+    Live inspection of one chip position from a stream of camera frames
+    
+    Every frame gets the cheap change check; only frames worth reading are
+    sent to OCR:
+    - 'motion': the scene is still moving (a chip being placed); skipped,
+      since blurred frames read badly
+    - a settled frame that differs from the last OCR'd one is a new scene:
+      the consensus starts over and the frame is OCR'd
+    - an unchanged frame is OCR'd at most every ocr_interval seconds while
+      the consensus is still forming ('unchanged' otherwise), and not at
+      all once it is 'stable'
+    - 'busy': OCR of an earlier frame is still running; frames never queue
+      up behind it, so the stream keeps up with the camera
+    
+    OCR runs in the background; its readings and the consensus result are
+    pushed through send() as they arrive. Once a send fails (the client
+    went away) the session is closed and later messages are dropped.
+    
+    Args:
+        decode: Frame bytes -> (small) image for the change check; raises
+            ValueError for undecodable frames
+        analyze: Coroutine function (frame bytes, frame number) -> analysis
+            dict with extracted_text, ocr_confidence and status
+        send: Coroutine function delivering one JSON message to the client
+        detector: Frame change detector
+        consensus: Temporal consensus of the readings
+        ocr_interval: Minimum seconds between OCRs of an unchanged scene
+    """
+    
+    def __init__(self, decode: Callable[[bytes], np.ndarray],
+                 analyze: Callable[[bytes, int], Awaitable[Dict[str, Any]]],
+                 send: Callable[[Dict[str, Any]], Awaitable[None]],
+                 detector: FrameChangeDetector, consensus: TemporalConsensus,
+                 ocr_interval: float = 0.25):
+        self.decode = decode
+        self.analyze = analyze
+        self._send = send
+        self.detector = detector
+        self.consensus = consensus
+        self.ocr_interval = ocr_interval
+        
+        self.frames = 0
+        self.reported: Optional[str] = None
+        # Bumped on every new scene, so late readings of the old one are dropped
+        self.generation = 0
+        self._last_ocr = 0.0
+        self._ocr_task: Optional[asyncio.Task] = None
+        self._send_lock = asyncio.Lock()
+        self.closed = False
+        
+        self.stats = {
+            'ocr': 0,
+            'motion': 0,
+            'unchanged': 0,
+            'stable': 0,
+            'busy': 0,
+            'invalid': 0,
+            'readings': 0,
+            'failed': 0,
+            'results': 0
+        }
+    
+    async def send(self, message: Dict[str, Any]) -> bool:
+        """Deliver a message to the client; False if the session is (now) closed"""
+        # OCR tasks and the receive loop both send; one message at a time
+        async with self._send_lock:
+            if self.closed:
+                return False
+            try:
+                await self._send(message)
+            except Exception as e:
+                self.closed = True
+                logger.info(f"🔌 Stream send failed, dropping further messages: {e}")
+                return False
+        return True
+    
+    async def on_frame(self, data: bytes) -> Dict[str, Any]:
+        """
+        Check one frame and start OCR on it if it is worth reading
+        
+        Returns:
+            Dictionary with the frame number, the action taken ('ocr' or the
+            reason for skipping) and the change measurements
+        """
+        self.frames += 1
+        frame = self.frames
+        
+        try:
+            # Decoding and comparing cost a few ms on large frames: keep them off the event loop
+            verdict = await asyncio.to_thread(lambda: self.detector.check(self.decode(data)))
+        except ValueError as e:
+            self.stats['invalid'] += 1
+            return {'frame': frame, 'action': 'invalid', 'detail': str(e)}
+        
+        new_scene = verdict['changed'] and not verdict['moving']
+        if verdict['moving']:
+            action = 'motion'
+        elif new_scene:
+            # Even with no readings yet, an OCR of the old chip may still be in flight
+            self._start_scene()
+            action = 'ocr'
+        elif self.consensus.current()['stable']:
+            action = 'stable'
+        elif time.monotonic() - self._last_ocr < self.ocr_interval:
+            action = 'unchanged'
+        else:
+            action = 'ocr'
+        
+        if action == 'ocr' and self._ocr_task and not self._ocr_task.done():
+            action = 'busy'
+        
+        if action == 'ocr':
+            # Later frames are compared with the one being read
+            self.detector.set_reference(verdict['thumbnail'])
+            self._last_ocr = time.monotonic()
+            self._ocr_task = asyncio.create_task(self._read(data, frame, self.generation))
+        
+        self.stats[action] += 1
+        return {'frame': frame, 'action': action, 'motion': verdict['motion'], 'difference': verdict['difference']}
+    
+    def _start_scene(self):
+        self.consensus.reset()
+        self.reported = None
+        self.generation += 1
+    
+    async def _read(self, data: bytes, frame: int, generation: int):
+        started = time.perf_counter()
+        try:
+            analysis = await self.analyze(data, frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats['failed'] += 1
+            await self.send({'type': 'error', 'frame': frame, 'detail': str(e)})
+            return
+        
+        if generation != self.generation:
+            return
+        
+        # Retake verdicts (blur, glare) vote for nothing
+        text = analysis.get('extracted_text', '') if analysis.get('status') == 'ok' else ''
+        confidence = analysis.get('ocr_confidence', 0.0) if text else 0.0
+        state = self.consensus.add(text, confidence)
+        self.stats['readings'] += 1
+        
+        await self.send({
+            'type': 'reading',
+            'frame': frame,
+            'text': text,
+            'confidence': confidence,
+            'status': analysis.get('status', 'ok'),
+            'retake_reasons': analysis.get('retake_reasons', []),
+            'ocr_ms': round((time.perf_counter() - started) * 1000.0, 1),
+            'consensus': state
+        })
+        
+        # Push the result once per stable text (again if it settles on a different one)
+        if state['stable'] and state['text'] != self.reported:
+            self.reported = state['text']
+            self.stats['results'] += 1
+            await self.send({
+                'type': 'result',
+                'frame': frame,
+                'text': state['text'],
+                'confidence': state['confidence'],
+                'votes': state['votes'],
+                'share': state['share'],
+                'alternatives': state['alternatives'],
+                'frames': self.frames,
+                'ocr_frames': self.stats['ocr']
+            })
+    
+    def reset(self):
+        """A new chip took the position: forget the scene and the readings"""
+        self.detector.reset()
+        self._start_scene()
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'frames': self.frames,
+            'ocr_ratio': round(self.stats['ocr'] / self.frames, 4) if self.frames else 0.0,
+            'result': self.reported,
+            'consensus': self.consensus.current(),
+            **self.stats
+        }
+    
+    async def close(self, wait: bool = False):
+        """Stop (or, with wait, finish) the OCR still running, and wait until it has ended"""
+        if self._ocr_task is None:
+            return
+        if not wait:
+            self._ocr_task.cancel()
+        # Retrieves the task's outcome, so a failure is never left unobserved
+        results = await asyncio.gather(self._ocr_task, return_exceptions=True)
+        self._ocr_task = None
+        error = results[0]
+        if isinstance(error, Exception):
+            logger.warning(f"⚠️ Stream OCR task failed: {error}")
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import service modules the way main.py does ("src.…"), from the service root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
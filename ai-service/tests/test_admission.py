@@ -0,0 +1,131 @@
+import time
+import asyncio
+
+import pytest
+
+from src.serving.admission import AdmissionController, DeadlineExceeded, QueueFull, ocr_slot
+
+def test_queue_full_rejects_with_a_retry_hint():
+    admission = AdmissionController(max_concurrent=1, max_queue=1)
+    first = admission.admit(['easyocr'])
+    second = admission.admit(['easyocr'])
+    
+    with pytest.raises(QueueFull) as rejected:
+        admission.admit(['easyocr'])
+    
+    assert rejected.value.reason == 'queue_full'
+    assert rejected.value.engine == 'easyocr'
+    assert rejected.value.retry_after >= 1
+    assert admission.gate('easyocr').stats['queue_full'] == 1
+    
+    first.release()
+    second.release()
+    admission.admit(['easyocr']).release()
+    assert admission.gate('easyocr').admitted == 0
+
+def test_unbounded_admission_ignores_the_queue_limit():
+    admission = AdmissionController(max_concurrent=1, max_queue=0)
+    tickets = [admission.admit(['tesseract'], bounded=False) for _ in range(5)]
+    
+    assert admission.gate('tesseract').admitted == 5
+    for ticket in tickets:
+        ticket.release()
+        ticket.release()
+    assert admission.gate('tesseract').admitted == 0
+
+def test_rejection_by_one_gate_takes_no_place_on_the_others():
+    admission = AdmissionController(limits={'easyocr': {'max_concurrent': 1, 'max_queue': 0}})
+    held = admission.admit(['easyocr'])
+    
+    with pytest.raises(QueueFull):
+        admission.admit(['tesseract', 'easyocr'])
+    
+    assert admission.gate('tesseract').admitted == 0
+    held.release()
+
+def test_deadline_already_passed_is_rejected_at_admission():
+    admission = AdmissionController()
+    
+    with pytest.raises(DeadlineExceeded) as rejected:
+        admission.admit(['easyocr'], deadline=time.monotonic() - 1)
+    
+    assert rejected.value.reason == 'deadline'
+    assert admission.gate('easyocr').admitted == 0
+
+def test_estimated_wait_beyond_the_deadline_is_rejected():
+    admission = AdmissionController(max_concurrent=1, max_queue=8)
+    gate = admission.gate('easyocr')
+    gate.ewma_seconds = 2.0
+    held = [admission.admit(['easyocr']) for _ in range(2)]
+    
+    # Two requests ahead at 2s each cannot start within 1s
+    with pytest.raises(DeadlineExceeded):
+        admission.admit(['easyocr'], deadline=time.monotonic() + 1.0)
+    admission.admit(['easyocr'], deadline=time.monotonic() + 10.0).release()
+    
+    for ticket in held:
+        ticket.release()
+
+@pytest.mark.asyncio
+async def test_deadline_passing_while_queued_for_a_slot():
+    admission = AdmissionController(max_concurrent=1, max_queue=4)
+    holding = asyncio.Event()
+    done = asyncio.Event()
+    
+    async def hold_slot():
+        with admission.admit(['easyocr']):
+            async with ocr_slot('easyocr'):
+                holding.set()
+                await done.wait()
+    
+    holder = asyncio.create_task(hold_slot())
+    await holding.wait()
+    
+    with pytest.raises(DeadlineExceeded):
+        with admission.admit(['easyocr'], deadline=time.monotonic() + 0.05):
+            async with ocr_slot('easyocr'):
+                pass
+    
+    done.set()
+    await holder
+    gate = admission.gate('easyocr')
+    assert gate.stats['deadline'] == 1
+    assert gate.admitted == gate.running == 0
+
+@pytest.mark.asyncio
+async def test_slots_of_other_engines_are_admitted_lazily():
+    admission = AdmissionController(max_concurrent=1, max_queue=0)
+    
+    with admission.admit([]):
+        assert admission.gates == {}
+        async with ocr_slot('tesseract'):
+            assert admission.gate('tesseract').running == 1
+        assert admission.gate('tesseract').admitted == 1
+        assert 'easyocr' not in admission.gates
+        
+        # Escalation: the second engine only now takes a place
+        async with ocr_slot('easyocr'):
+            assert admission.gate('easyocr').admitted == 1
+    
+    assert admission.gate('tesseract').admitted == admission.gate('easyocr').admitted == 0
+
+@pytest.mark.asyncio
+async def test_lazy_admission_still_respects_a_full_queue():
+    admission = AdmissionController(max_concurrent=1, max_queue=0)
+    
+    with admission.admit(['easyocr']):
+        with admission.admit([]):
+            with pytest.raises(QueueFull):
+                async with ocr_slot('easyocr'):
+                    pass
+    
+    assert admission.gate('easyocr').admitted == 0
+
+@pytest.mark.asyncio
+async def test_ocr_runs_ungated_without_a_ticket():
+    admission = AdmissionController()
+    
+    async with ocr_slot('easyocr'):
+        pass
+    
+    assert admission.gates == {}
@@ -0,0 +1,144 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.comparison.similarity_matcher import SimilarityMatcher
+from src.ocr.consensus import TemporalConsensus
+from src.preprocessing.frame_change import FrameChangeDetector
+from src.serving.stream_session import StreamSession
+
+def test_stable_once_the_leader_has_votes_and_share():
+    consensus = TemporalConsensus(window=5, min_votes=3, min_share=0.6)
+    
+    assert not consensus.add('LM358N', 0.9)['stable']
+    assert not consensus.add('LM358N', 0.8)['stable']
+    state = consensus.add('lm358n ', 0.7)
+    
+    assert state['stable']
+    assert state['text'] == 'LM358N'
+    assert state['votes'] == 3
+    assert state['confidence'] == pytest.approx(0.8)
+
+def test_occasional_misreads_are_outvoted():
+    consensus = TemporalConsensus(window=7, min_votes=3, min_share=0.6)
+    for text in ['NE555P', 'NE5S5P', 'NE555P', 'NE555P', 'NE555P']:
+        state = consensus.add(text, 0.9)
+    
+    assert state['stable']
+    assert state['text'] == 'NE555P'
+    assert state['alternatives'] == ['NE5S5P']
+    assert state['share'] == pytest.approx(0.8)
+
+def test_split_vote_is_not_stable():
+    consensus = TemporalConsensus(window=6, min_votes=3, min_share=0.6)
+    for text in ['LM358N', 'LM358P'] * 3:
+        state = consensus.add(text, 0.9)
+    
+    assert state['votes'] == 3
+    assert not state['stable']
+
+def test_confidence_weights_the_vote():
+    consensus = TemporalConsensus(window=5, min_votes=1, min_share=0.5)
+    consensus.add('LM358N', 0.2)
+    consensus.add('LM358N', 0.2)
+    state = consensus.add('LM358P', 0.95)
+    
+    assert state['text'] == 'LM358P'
+    assert state['stable']
+
+def test_empty_readings_delay_stability():
+    consensus = TemporalConsensus(window=4, min_votes=2, min_share=0.6)
+    consensus.add('LM358N', 0.9)
+    consensus.add('', 0.0)
+    consensus.add('', 0.0)
+    state = consensus.add('LM358N', 0.9)
+    
+    assert state['votes'] == 2
+    assert state['readings'] == 4
+    assert state['stable']
+    assert not TemporalConsensus().add('', 0.0)['text']
+
+def test_window_forgets_old_readings():
+    consensus = TemporalConsensus(window=3, min_votes=2, min_share=0.6)
+    for text in ['LM358N', 'LM358N', 'NE555P', 'NE555P', 'NE555P']:
+        state = consensus.add(text, 0.9)
+    
+    assert state['text'] == 'NE555P'
+    assert state['alternatives'] == []
+
+def test_folded_key_merges_confusable_readings():
+    consensus = TemporalConsensus(window=5, min_votes=3, min_share=0.6, key=SimilarityMatcher().fold_text)
+    consensus.add('STM32F103', 0.9)
+    consensus.add('STM32F1O3', 0.6)
+    state = consensus.add('STM32F103', 0.9)
+    
+    assert state['votes'] == 3
+    assert state['text'] == 'STM32F103'
+
+@pytest.mark.asyncio
+async def test_stream_session_drops_messages_after_a_failed_send():
+    attempts = 0
+    
+    async def broken_send(message):
+        nonlocal attempts
+        attempts += 1
+        raise RuntimeError("client went away")
+    
+    async def analyze(data, frame):
+        return {'extracted_text': 'LM358N', 'ocr_confidence': 0.9, 'status': 'ok'}
+    
+    session = StreamSession(
+        decode=lambda data: np.zeros((48, 64), dtype=np.uint8),
+        analyze=analyze,
+        send=broken_send,
+        detector=FrameChangeDetector(),
+        consensus=TemporalConsensus()
+    )
+    
+    assert (await session.on_frame(b'frame'))['action'] == 'ocr'
+    await session.close(wait=True)
+    
+    assert session.closed
+    assert session.stats['readings'] == 1
+    assert attempts == 1
+    assert not await session.send({'type': 'summary'})
+    assert attempts == 1
+
+@pytest.mark.asyncio
+async def test_stream_session_drops_a_late_reading_of_the_previous_chip():
+    release = asyncio.Event()
+    messages = []
+    
+    async def send(message):
+        messages.append(message)
+    
+    async def analyze(data, frame):
+        if data == b'old':
+            await release.wait()
+            return {'extracted_text': 'LM358N', 'ocr_confidence': 0.9, 'status': 'ok'}
+        return {'extracted_text': 'NE555P', 'ocr_confidence': 0.9, 'status': 'ok'}
+    
+    session = StreamSession(
+        decode=lambda data: np.full((48, 64), 200 if data == b'new' else 0, dtype=np.uint8),
+        analyze=analyze,
+        send=send,
+        detector=FrameChangeDetector(),
+        consensus=TemporalConsensus()
+    )
+    
+    assert (await session.on_frame(b'old'))['action'] == 'ocr'
+    # The chip is swapped before its first reading arrives: no readings to reset yet
+    assert (await session.on_frame(b'new'))['action'] == 'motion'
+    assert (await session.on_frame(b'new'))['action'] == 'busy'
+    
+    release.set()
+    await session._ocr_task
+    
+    assert len(session.consensus.readings) == 0
+    assert not messages
+    
+    assert (await session.on_frame(b'new'))['action'] == 'ocr'
+    await session.close(wait=True)
+    
+    assert [m['text'] for m in messages if m['type'] == 'reading'] == ['NE555P']
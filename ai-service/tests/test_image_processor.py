@@ -0,0 +1,46 @@
+import io
+
+import pytest
+from PIL import Image
+
+from src.preprocessing.image_processor import ImageProcessor, EXIF_ORIENTATION
+
+def encode_jpeg(width: int, height: int, orientation: int = 1) -> bytes:
+    """A width x height JPEG as stored on disk, tagged with an EXIF orientation"""
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = orientation
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (90, 90, 90)).save(buffer, 'JPEG', exif=exif.tobytes())
+    return buffer.getvalue()
+
+def resized_size(width: int, height: int, target_size):
+    """Output size of the aspect-preserving resize in process_image"""
+    scale = min(target_size[0] / width, target_size[1] / height)
+    return int(width * scale), int(height * scale)
+
+@pytest.mark.parametrize('orientation, expected', [(1, (1600, 1200)), (3, (1600, 1200)),
+                                                   (6, (1200, 1600)), (8, (1200, 1600))])
+def test_dimensions_follow_exif_orientation(orientation, expected):
+    data = encode_jpeg(1600, 1200, orientation)
+    
+    assert ImageProcessor().read_image_dimensions(data) == expected
+
+@pytest.mark.parametrize('grayscale', [False, True])
+def test_rotated_jpeg_is_not_reduced_below_target_size(grayscale):
+    # Stored landscape, displayed portrait: the stored size would pick factor 4
+    data = encode_jpeg(1600, 1200, orientation=6)
+    target_size = (400, 1000)
+    
+    image = ImageProcessor().decode_image(data, target_size=target_size, grayscale=grayscale)
+    
+    height, width = image.shape[:2]
+    assert height > width
+    min_width, min_height = resized_size(1200, 1600, target_size)
+    assert width >= min_width and height >= min_height
+
+def test_unrotated_jpeg_still_decodes_reduced():
+    data = encode_jpeg(1600, 1200)
+    
+    image = ImageProcessor().decode_image(data, target_size=(400, 1000))
+    
+    assert image.shape[:2] == (300, 400)
@@ -0,0 +1,295 @@
+import time
+import asyncio
+import sqlite3
+
+import pytest
+
+from src.serving.jobs import JobManager, JobQueueFull, SQLiteJobStore
+
+def make_job(job_id: str, created_at: float):
+    return {
+        'id': job_id,
+        'status': 'queued',
+        'inspection_id': f"inspection-{job_id}",
+        'options': {'ocr_engine_type': 'tesseract'},
+        'created_at': created_at,
+        'attempts': 0
+    }
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.sqlite3")
+
+@pytest.fixture
+def store(db_path):
+    store = SQLiteJobStore(db_path)
+    yield store
+    store.close()
+
+def test_claims_oldest_job_first_with_its_image(store):
+    store.add(make_job('b', 2.0), b'image-b')
+    store.add(make_job('a', 1.0), b'image-a')
+    
+    job, payload = store.claim_next('run-1', 60.0)
+    
+    assert (job['id'], payload) == ('a', b'image-a')
+    assert job['status'] == 'running'
+    assert job['owner'] == 'run-1'
+    assert job['attempts'] == 1
+    assert store.get('a')['status'] == 'running'
+
+def test_each_job_is_claimed_once_across_connections(store, db_path):
+    other = SQLiteJobStore(db_path)
+    store.add(make_job('a', 1.0), b'')
+    store.add(make_job('b', 2.0), b'')
+    
+    claimed = [store.claim_next('run-1', 60.0), other.claim_next('run-2', 60.0), store.claim_next('run-1', 60.0)]
+    other.close()
+    
+    assert sorted(claim[0]['id'] for claim in claimed if claim) == ['a', 'b']
+    assert claimed[2] is None
+
+def test_finish_drops_the_image_and_sets_the_expiry(store):
+    store.add(make_job('a', 1.0), b'image')
+    store.claim_next('run-1', 60.0)
+    assert store.finish('a', 'run-1', 'done', {'extracted_text': 'LM358'}, None, ttl=60.0)
+    
+    job = store.get('a')
+    assert job['status'] == 'done'
+    assert job['result'] == {'extracted_text': 'LM358'}
+    assert job['expires_at'] > time.time()
+    assert store.claim_next('run-2', 60.0) is None
+    
+    store.add(make_job('b', 2.0), b'image')
+    store.claim_next('run-1', 60.0)
+    store.finish('b', 'run-1', 'done', {}, None, ttl=-1.0)
+    assert store.delete_expired() == 1
+    assert store.get('b') is None
+    assert store.get('a') is not None
+
+def test_recover_requeues_only_jobs_whose_lease_lapsed(store):
+    store.add(make_job('live', 1.0), b'')
+    store.add(make_job('dead', 2.0), b'')
+    store.claim_next('run-1', 60.0)
+    store.claim_next('run-0', -1.0)
+    
+    assert store.recover(max_attempts=3, ttl=60.0) == 1
+    
+    assert store.get('live')['status'] == 'running'
+    dead = store.get('dead')
+    assert dead['status'] == 'queued'
+    assert dead['owner'] is None
+    job, _ = store.claim_next('run-1', 60.0)
+    assert (job['id'], job['attempts']) == ('dead', 2)
+
+def test_renewed_lease_is_not_recovered(store):
+    store.add(make_job('a', 1.0), b'')
+    store.claim_next('run-1', -1.0)
+    
+    assert store.renew('run-1', ['a'], 60.0) == 1
+    assert store.recover(max_attempts=3, ttl=60.0) == 0
+    assert store.renew('run-2', ['a'], 60.0) == 0
+
+def test_outcome_of_a_recovered_job_is_dropped(store):
+    store.add(make_job('a', 1.0), b'')
+    store.claim_next('run-1', -1.0)
+    store.recover(max_attempts=3, ttl=60.0)
+    store.claim_next('run-2', 60.0)
+    
+    assert not store.finish('a', 'run-1', 'done', {'extracted_text': 'stale'}, None, ttl=60.0)
+    assert store.get('a')['owner'] == 'run-2'
+
+def test_recover_fails_jobs_out_of_attempts(store):
+    store.add(make_job('a', 1.0), b'image')
+    for run in range(3):
+        store.recover(max_attempts=3, ttl=60.0)
+        store.claim_next(f"run-{run}", -1.0)
+    
+    store.recover(max_attempts=3, ttl=60.0)
+    
+    job = store.get('a')
+    assert job['status'] == 'failed'
+    assert job['error'] == 'Interrupted 3 times'
+    assert job['expires_at'] is not None
+
+def test_lease_column_is_added_to_older_files(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.executescript(SQLiteJobStore.SCHEMA.replace("lease_expires_at REAL,", ""))
+    conn.close()
+    
+    store = SQLiteJobStore(path)
+    store.add(make_job('a', 1.0), b'')
+    assert store.claim_next('run-1', 60.0)[0]['lease_expires_at'] is not None
+    store.close()
+
+@pytest.mark.asyncio
+async def test_restart_with_the_same_pid_recovers_the_interrupted_job(db_path):
+    started = asyncio.Event()
+    
+    async def hang(job, payload):
+        started.set()
+        await asyncio.sleep(3600)
+    
+    crashed = JobManager(SQLiteJobStore(db_path), hang, workers=1, poll_interval=0.01)
+    await crashed.start()
+    job = await crashed.submit(b'image', 'inspection-1', {})
+    await started.wait()
+    # Stopping leaves the job 'running' under the old owner, with its lease ended
+    await crashed.stop()
+    
+    async def analyze(job, payload):
+        return {'extracted_text': payload.decode()}
+    
+    # Same process, so same PID: only the per-run owner token tells the runs apart
+    restarted = JobManager(SQLiteJobStore(db_path), analyze, workers=1, poll_interval=0.01)
+    assert restarted.owner != crashed.owner
+    await restarted.start()
+    try:
+        assert restarted.stats['recovered'] == 1
+        statuses = [update['status'] async for update in restarted.watch(job['id'], timeout=5.0) if update]
+        finished = await restarted.get(job['id'])
+    finally:
+        await restarted.stop()
+    
+    assert statuses[-1] == 'done'
+    assert finished['result'] == {'extracted_text': 'image'}
+    assert finished['attempts'] == 2
+
+@pytest.mark.asyncio
+async def test_starting_worker_leaves_a_live_siblings_job_alone(db_path):
+    started = asyncio.Event()
+    
+    async def hang(job, payload):
+        started.set()
+        await asyncio.sleep(3600)
+    
+    async def analyze(job, payload):
+        return {'extracted_text': 'rerun'}
+    
+    # Two web workers sharing the default sqlite file; the second one was just (re)started
+    first = JobManager(SQLiteJobStore(db_path), hang, workers=1, poll_interval=0.01, lease=0.3)
+    await first.start()
+    job = await first.submit(b'image', 'inspection-1', {})
+    await started.wait()
+    
+    second = JobManager(SQLiteJobStore(db_path), analyze, workers=1, poll_interval=0.01, lease=0.3)
+    await second.start()
+    try:
+        # Several lease periods pass while the first worker keeps renewing
+        await asyncio.sleep(0.8)
+        assert second.stats['recovered'] == 0
+        held = await second.get(job['id'])
+        assert (held['status'], held['owner'], held['attempts']) == ('running', first.owner, 1)
+        
+        # The first worker dies without releasing anything: its lease lapses
+        for task in first._tasks:
+            task.cancel()
+        await asyncio.gather(*first._tasks, return_exceptions=True)
+        statuses = [update['status'] async for update in second.watch(job['id'], timeout=5.0) if update]
+        finished = await second.get(job['id'])
+    finally:
+        await second.stop()
+        first.store.close()
+    
+    assert second.stats['recovered'] == 1
+    assert statuses[-1] == 'done'
+    assert (finished['result'], finished['attempts']) == ({'extracted_text': 'rerun'}, 2)
+
+@pytest.mark.asyncio
+async def test_submit_rejects_beyond_max_queued(db_path):
+    async def analyze(job, payload):
+        return {}
+    
+    # Not started, so nothing is claimed
+    manager = JobManager(SQLiteJobStore(db_path), analyze, max_queued=2)
+    await manager.submit(b'', 'inspection-1', {})
+    await manager.submit(b'', 'inspection-2', {})
+    
+    with pytest.raises(JobQueueFull):
+        await manager.submit(b'', 'inspection-3', {})
+    await manager.stop()
+
+@pytest.mark.asyncio
+async def test_watching_an_unknown_job_leaves_no_state(db_path):
+    async def analyze(job, payload):
+        return {}
+    
+    manager = JobManager(SQLiteJobStore(db_path), analyze)
+    
+    assert [update async for update in manager.watch('missing')] == []
+    assert manager._changed == {}
+    assert manager._watchers == {}
+    await manager.stop()
+
+class FlakyStore(SQLiteJobStore):
+    """Raises "database is locked" on the first call of each listed method"""
+    
+    def __init__(self, path: str, methods):
+        super().__init__(path)
+        self.failing = set(methods)
+    
+    def _maybe_fail(self, method: str):
+        if method in self.failing:
+            self.failing.discard(method)
+            raise sqlite3.OperationalError("database is locked")
+    
+    def claim_next(self, owner, lease):
+        self._maybe_fail('claim_next')
+        return super().claim_next(owner, lease)
+    
+    def finish(self, *args):
+        self._maybe_fail('finish')
+        return super().finish(*args)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('methods', [['claim_next'], ['finish'], ['claim_next', 'finish']])
+async def test_worker_survives_a_store_error(db_path, methods):
+    async def analyze(job, payload):
+        return {'extracted_text': payload.decode()}
+    
+    manager = JobManager(FlakyStore(db_path, methods), analyze, workers=1, poll_interval=0.01)
+    await manager.start()
+    try:
+        first = await manager.submit(b'first', 'inspection-1', {})
+        second = await manager.submit(b'second', 'inspection-2', {})
+        for job in (first, second):
+            async for update in manager.watch(job['id'], timeout=5.0):
+                pass
+        results = [(await manager.get(job['id']))['result'] for job in (first, second)]
+    finally:
+        await manager.stop()
+    
+    assert results == [{'extracted_text': 'first'}, {'extracted_text': 'second'}]
+    assert manager.stats['store_errors'] == len(methods)
+    assert manager.stats['completed'] == 2
+
+class BrokenFinishStore(SQLiteJobStore):
+    def finish(self, *args):
+        raise sqlite3.OperationalError("disk I/O error")
+
+@pytest.mark.asyncio
+async def test_job_is_let_go_when_its_outcome_cannot_be_recorded(db_path):
+    async def analyze(job, payload):
+        return {}
+    
+    manager = JobManager(BrokenFinishStore(db_path), analyze, workers=1, poll_interval=0.01, lease=0.3)
+    await manager.start()
+    try:
+        job = await manager.submit(b'', 'inspection-1', {})
+        while manager.stats['store_errors'] < 3:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        
+        # No longer held: the lease lapses instead of being renewed, and the
+        # heartbeat requeues the job while the worker keeps running
+        assert manager._held == set()
+        while manager.stats['recovered'] == 0:
+            await asyncio.sleep(0.05)
+        assert not manager._tasks[0].done()
+    finally:
+        await manager.stop()
+    
+    store = SQLiteJobStore(db_path)
+    assert store.get(job['id'])['attempts'] >= 2
+    store.close()
@@ -0,0 +1,56 @@
+import pytest
+
+from src.comparison.ngram_index import MarkingCatalog
+from src.comparison.similarity_matcher import SimilarityMatcher
+
+@pytest.fixture
+def matcher():
+    return SimilarityMatcher(workers=1)
+
+@pytest.fixture
+def catalog(matcher):
+    return MarkingCatalog(['STM32F103', 'LM358N', 'NE555P', 'ATMEGA328P', 'SN74HC595N'], matcher)
+
+@pytest.mark.parametrize('text', ['STM32F1O3', '5TM32F103', 'stm32f1o3', ' STM32F103 '])
+def test_fold_text_merges_ocr_confusions(matcher, text):
+    assert matcher.fold_text(text) == matcher.fold_text('STM32F103') == '5TM32F103'
+
+def test_fold_text_keeps_other_differences(matcher):
+    assert matcher.fold_text('STM32F103') != matcher.fold_text('STM32F104')
+    assert matcher.fold_text('') == ''
+
+def test_confusable_read_is_an_exact_hit(catalog):
+    matches, candidates, match_type = catalog.search('NE5S5P')
+    
+    assert match_type == 'exact'
+    assert candidates == 1
+    assert matches[0][0] == 'NE555P'
+    assert catalog.stats['exact_hits'] == 1
+    assert catalog.stats['fuzzy_lookups'] == 0
+
+def test_literal_read_outranks_a_confusable_one(catalog):
+    exact, _, _ = catalog.search('LM358N')
+    confusable, _, _ = catalog.search('LM3S8N')
+    
+    assert exact[0] == ('LM358N', pytest.approx(1.0))
+    assert confusable[0][0] == 'LM358N'
+    assert confusable[0][1] < exact[0][1]
+
+def test_markings_sharing_a_folded_key_are_all_returned(matcher):
+    catalog = MarkingCatalog(['SO8-B', '508-8', 'LM358N'], matcher)
+    matches, candidates, match_type = catalog.search('SO8-B')
+    
+    assert match_type == 'exact'
+    assert candidates == 2
+    assert [marking for marking, _ in matches] == ['SO8-B', '508-8']
+
+def test_misses_fall_back_to_fuzzy_scoring(catalog):
+    matches, candidates, match_type = catalog.search('ATMEGA32BP-AU')
+    
+    assert match_type == 'fuzzy'
+    assert candidates >= 1
+    assert matches[0][0] == 'ATMEGA328P'
+    assert catalog.get_stats()['exact_hit_rate'] == 0.0
+
+def test_empty_read_matches_nothing(catalog):
+    assert catalog.search('  ') == ([], 0, 'none')
@@ -0,0 +1,33 @@
+from src.comparison.ngram_index import NGramIndex
+
+# Every marking shares the 'COMMON0' prefix grams; the digits tell them apart
+MARKINGS = [f"COMMON{i:03d}" for i in range(100)]
+
+def test_common_grams_are_pruned_when_selective_ones_exist():
+    index = NGramIndex(MARKINGS, max_df_ratio=0.05)
+    
+    # Only '042' and '42 ' are rare enough (df <= 5); prefix and 'N04' grams are skipped
+    assert index.candidates("COMMON042").tolist() == [42]
+
+def test_without_pruning_every_marking_sharing_a_gram_is_a_candidate():
+    index = NGramIndex(MARKINGS, max_df_ratio=1.0)
+    candidates = index.candidates("COMMON042")
+    
+    assert len(candidates) == len(MARKINGS)
+    assert candidates[0] == 42
+    # Markings sharing the 'N04' gram rank right behind the exact one
+    assert set(candidates[1:10].tolist()) == set(range(40, 50)) - {42}
+
+def test_common_grams_are_used_when_they_are_all_the_query_has():
+    index = NGramIndex(MARKINGS, max_df_ratio=0.05)
+    
+    assert sorted(index.candidates("COMMON").tolist()) == list(range(len(MARKINGS)))
+
+def test_candidates_respect_the_limit_and_unknown_grams():
+    index = NGramIndex(MARKINGS, max_df_ratio=1.0)
+    
+    candidates = index.candidates("COMMON042", limit=7)
+    
+    assert len(candidates) == 7
+    assert candidates[0] == 42
+    assert index.candidates("QXJ").tolist() == []
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from src.caching.result_cache import MemoryCacheBackend, ResultCache
+
+@pytest.fixture
+def cache():
+    return ResultCache(MemoryCacheBackend())
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_computation(cache):
+    calls = 0
+    release = asyncio.Event()
+    
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {'text': 'LM358'}
+    
+    tasks = [asyncio.create_task(cache.get_or_compute('key', compute)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+    
+    assert calls == 1
+    assert [result for result, _ in results] == [{'text': 'LM358'}] * 5
+    assert sorted(cached for _, cached in results) == [False, True, True, True, True]
+    assert cache.stats['misses'] == 1
+    assert cache.stats['coalesced'] == 4
+    assert cache.get_stats()['inflight'] == 0
+
+@pytest.mark.asyncio
+async def test_later_request_is_served_from_the_backend(cache):
+    async def compute():
+        return {'text': 'NE555P'}
+    
+    assert await cache.get_or_compute('key', compute) == ({'text': 'NE555P'}, False)
+    assert await cache.get_or_compute('key', compute) == ({'text': 'NE555P'}, True)
+    assert cache.stats['hits'] == 1
+
+@pytest.mark.asyncio
+async def test_waiter_takes_over_when_the_leader_is_cancelled(cache):
+    calls = 0
+    leader_started = asyncio.Event()
+    
+    async def compute():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            leader_started.set()
+            await asyncio.sleep(3600)
+        return {'text': 'recomputed'}
+    
+    leader = asyncio.create_task(cache.get_or_compute('key', compute))
+    await leader_started.wait()
+    waiter = asyncio.create_task(cache.get_or_compute('key', compute))
+    await asyncio.sleep(0)
+    
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    
+    assert await waiter == ({'text': 'recomputed'}, False)
+    assert calls == 2
+
+@pytest.mark.asyncio
+async def test_failures_reach_waiters_and_are_not_cached(cache):
+    calls = 0
+    release = asyncio.Event()
+    
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        raise RuntimeError("engine crashed")
+    
+    tasks = [asyncio.create_task(cache.get_or_compute('key', failing)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    
+    async def compute():
+        return {'text': 'ok'}
+    
+    assert await cache.get_or_compute('key', compute) == ({'text': 'ok'}, False)
@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from src.comparison.similarity_matcher import SimilarityMatcher
+
+@pytest.fixture(scope='module')
+def matcher():
+    return SimilarityMatcher(workers=1)
+
+def loop_matches(matcher, query, references, method='rapidfuzz', limit=5, score_cutoff=0.0):
+    """The per-reference loop find_best_matches used to run"""
+    matches = [
+        (reference, matcher.calculate_similarity(query, reference, method))
+        for reference in references
+        if reference
+    ]
+    matches.sort(key=lambda match: match[1], reverse=True)
+    return [match for match in matches if match[1] >= score_cutoff][:limit]
+
+def assert_same_matches(actual, expected):
+    assert [text for text, _ in actual] == [text for text, _ in expected]
+    assert [score for _, score in actual] == pytest.approx([score for _, score in expected], abs=1e-9)
+
+@pytest.mark.parametrize('method', ['rapidfuzz', 'partial_ratio', 'token_sort', 'levenshtein'])
+def test_matches_the_per_reference_loop(matcher, method):
+    rng = random.Random(13)
+    references = [''.join(rng.choice('LM358NE5P0O') for _ in range(rng.randint(3, 8))) for _ in range(200)]
+    
+    for query in ['LM358N', 'NE555P', 'L0O', 'lm 358']:
+        assert_same_matches(
+            matcher.find_best_matches(query, references, method=method, limit=7),
+            loop_matches(matcher, query, references, method=method, limit=7)
+        )
+
+def test_ties_keep_reference_order_also_at_the_cut(matcher):
+    # Every 'LM358x' scores the same against 'LM358'; the first two make the cut
+    references = ['NE555P', 'LM358A', 'LM358B', 'LM358', 'LM358C', 'LM358D']
+    matches = matcher.find_best_matches('LM358', references, limit=3)
+    
+    assert [text for text, _ in matches] == ['LM358', 'LM358A', 'LM358B']
+    assert_same_matches(matches, loop_matches(matcher, 'LM358', references, limit=3))
+
+def test_prepared_references_give_the_same_result(matcher):
+    references = ['LM358N', 'LM358P', 'NE555P', '', 'LM324N']
+    prepared = matcher.prepare_references(references)
+    
+    assert matcher.find_best_matches('LM358', prepared) == matcher.find_best_matches('LM358', references)
+
+def test_score_cutoff_drops_weak_matches(matcher):
+    references = ['LM358N', 'LM358P', 'NE555P', 'ATMEGA328P']
+    matches = matcher.find_best_matches('LM358N', references, score_cutoff=0.8)
+    
+    assert [text for text, _ in matches] == ['LM358N', 'LM358P']
+    assert_same_matches(matches, loop_matches(matcher, 'LM358N', references, score_cutoff=0.8))
+
+def test_limit_beyond_the_references_returns_them_all(matcher):
+    references = ['NE555P', 'LM358N', 'LM358P']
+    matches = matcher.find_best_matches('LM358N', references, limit=10)
+    
+    assert len(matches) == 3
+    assert_same_matches(matches, loop_matches(matcher, 'LM358N', references, limit=10))
+
+def test_nothing_to_match(matcher):
+    assert matcher.find_best_matches('', ['LM358N']) == []
+    assert matcher.find_best_matches('LM358N', []) == []
+    assert matcher.find_best_matches('LM358N', ['LM358N'], limit=0) == []
@@ -0,0 +1,65 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.comparison.similarity_matcher import SimilarityMatcher
+
+def random_markings(rng: random.Random, count: int):
+    alphabet = 'ABCDEFGHJKLMNPQRSTUVWXYZ0123456789'
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(4, 10))) for _ in range(count)]
+
+@pytest.fixture(scope='module')
+def matcher():
+    return SimilarityMatcher(workers=1)
+
+@pytest.fixture(scope='module')
+def texts():
+    rng = random.Random(13)
+    return random_markings(rng, 25), random_markings(rng, 120)
+
+def naive_top_k(matcher, queries, references, k):
+    """One calculate_similarity call per pair, the pre-matrix way"""
+    rows = []
+    for query in queries:
+        scores = [matcher.calculate_similarity(query, reference) for reference in references]
+        rows.append(sorted(scores, reverse=True)[:k])
+    return np.array(rows, dtype=np.float32)
+
+@pytest.mark.parametrize('max_cells', [1, 120, 7 * 120, 50_000_000])
+def test_top_k_matrix_chunks_match_the_naive_loop(matcher, texts, max_cells):
+    queries, references = texts
+    indices, scores = matcher.top_k_matrix(queries, references, k=5, max_cells=max_cells)
+    
+    assert indices.shape == scores.shape == (len(queries), 5)
+    np.testing.assert_allclose(scores, naive_top_k(matcher, queries, references, 5), atol=1e-5)
+    
+    # Every index points at a reference with the reported score, best first
+    for row, query in enumerate(queries):
+        for index, score in zip(indices[row], scores[row]):
+            assert matcher.calculate_similarity(query, references[index]) == pytest.approx(score, abs=1e-5)
+        assert list(scores[row]) == sorted(scores[row], reverse=True)
+
+def test_top_k_matrix_clamps_k_to_the_references(matcher):
+    indices, scores = matcher.top_k_matrix(['LM358'], ['LM358', 'NE555'], k=10)
+    
+    assert indices.tolist() == [[0, 1]]
+    assert scores[0, 0] == pytest.approx(1.0)
+
+def test_top_k_matrix_without_references(matcher):
+    indices, scores = matcher.top_k_matrix(['LM358', 'NE555'], [], k=3)
+    
+    assert indices.shape == scores.shape == (2, 0)
+
+def test_slots_below_the_cutoff_are_marked_empty(matcher):
+    references = ['LM358N', 'LM358P', 'NE555P', 'ATMEGA328P']
+    indices, scores = matcher.top_k_matrix(['LM358N', 'QQQQ'], references, k=3, score_cutoff=0.8)
+    
+    assert indices.tolist() == [[0, 1, -1], [-1, -1, -1]]
+    assert scores[0, 0] == pytest.approx(1.0)
+    assert scores[0, 1] >= 0.8
+    assert scores[0, 2] == scores[1].max() == 0.0
+    
+    # k larger than the references that pass (and than all references)
+    indices, _ = matcher.top_k_matrix(['LM358N'], references, k=10, score_cutoff=0.8, max_cells=1)
+    assert indices.tolist() == [[0, 1, -1, -1]]
@@ -0,0 +1,96 @@
+import os
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from src.monitoring.tracing import Tracer, otlp_attributes, span
+
+def read_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_trace_file_holds_otlp_json(tmp_path):
+    tracer = Tracer(str(tmp_path / "traces-{pid}.jsonl"), resource={'service.name': 'marksure-ai'})
+    
+    with tracer.trace("analyze", inspection_id="insp-1") as root:
+        with span("ocr", engine="tesseract", regions=3) as ocr:
+            ocr.set_attribute('confidence', 0.9)
+    tracer.close()
+    
+    [line] = read_lines(tracer.path)
+    [resource_spans] = line['resourceSpans']
+    assert resource_spans['resource']['attributes'] == [{'key': 'service.name', 'value': {'stringValue': 'marksure-ai'}}]
+    [scope_spans] = resource_spans['scopeSpans']
+    assert scope_spans['scope']['name']
+    
+    analyze, ocr_span = scope_spans['spans']
+    assert analyze['name'] == 'analyze'
+    assert 'parentSpanId' not in analyze
+    assert ocr_span['parentSpanId'] == analyze['spanId']
+    assert ocr_span['traceId'] == analyze['traceId'] == root.trace.trace_id
+    assert len(analyze['traceId']) == 32 and len(analyze['spanId']) == 16
+    int(analyze['traceId'], 16)
+    assert int(analyze['startTimeUnixNano']) <= int(ocr_span['startTimeUnixNano'])
+    assert int(ocr_span['endTimeUnixNano']) <= int(analyze['endTimeUnixNano'])
+    assert ocr_span['status'] == {'code': 1}
+    assert {item['key']: item['value'] for item in ocr_span['attributes']} == {
+        'inspection_id': {'stringValue': 'insp-1'},
+        'engine': {'stringValue': 'tesseract'},
+        'regions': {'intValue': '3'},
+        'confidence': {'doubleValue': 0.9}
+    }
+
+def test_failed_span_has_error_status(tmp_path):
+    tracer = Tracer(str(tmp_path / "traces.jsonl"))
+    
+    with pytest.raises(ValueError):
+        with tracer.trace("analyze"):
+            raise ValueError("bad image")
+    tracer.close()
+    
+    [root] = read_lines(tracer.path)[0]['resourceSpans'][0]['scopeSpans'][0]['spans']
+    assert root['status'] == {'code': 2, 'message': 'ValueError: bad image'}
+
+def test_path_gets_the_process_id(tmp_path):
+    tracer = Tracer(str(tmp_path / "traces-{pid}.jsonl"))
+    tracer.close()
+    
+    assert tracer.path.endswith(f"traces-{os.getpid()}.jsonl")
+
+def test_file_is_written_off_the_calling_thread(tmp_path):
+    tracer = Tracer(str(tmp_path / "traces.jsonl"))
+    writers = []
+    handler = tracer._listener.handlers[0]
+    emit = handler.emit
+    handler.emit = lambda record: (writers.append(threading.current_thread()), emit(record))
+    
+    with tracer.trace("analyze"):
+        pass
+    tracer.close()
+    
+    assert writers and threading.current_thread() not in writers
+    assert len(read_lines(tracer.path)) == 1
+
+def test_attribute_encoding():
+    assert otlp_attributes({'score': np.float32(0.5), 'boxes': np.int64(4)}) == [
+        {'key': 'score', 'value': {'doubleValue': 0.5}},
+        {'key': 'boxes', 'value': {'intValue': '4'}}
+    ]
+    assert otlp_attributes({'ok': True, 'engines': ['easyocr', 'tesseract'], 'none': None, 'shape': (2, 3)}) == [
+        {'key': 'ok', 'value': {'boolValue': True}},
+        {'key': 'engines', 'value': {'arrayValue': {'values': [{'stringValue': 'easyocr'}, {'stringValue': 'tesseract'}]}}},
+        {'key': 'shape', 'value': {'arrayValue': {'values': [{'intValue': '2'}, {'intValue': '3'}]}}}
+    ]
+
+def test_response_view_keeps_flat_attributes():
+    tracer = Tracer(resource={'service.name': 'marksure-ai'})
+    
+    with tracer.trace("analyze", inspection_id="insp-1") as root:
+        with span("ocr"):
+            pass
+    
+    spans = root.trace.to_list()
+    assert [item['name'] for item in spans] == ['analyze', 'ocr']
+    assert spans[1]['attributes'] == {'service.name': 'marksure-ai', 'inspection_id': 'insp-1'}
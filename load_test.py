@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+MarkSure AOI System - AI Service Load Test
+Drives /analyze, /analyze/batch and /similarity at a fixed arrival rate
+(open loop) or a fixed concurrency (closed loop) to find the saturation
+point of one ai-service instance.
+
+Examples:
+    python load_test.py --images samples/ --rate 5 --duration 60
+    python load_test.py --concurrency 8 --endpoint mix --duration 120
+    python load_test.py --endpoint similarity --rate 200 --duration 30
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+import httpx
+import numpy as np
+
+# Configuration
+BASE_DIR = Path(__file__).parent
+AI_SERVICE_URL = os.getenv("AI_SERVICE_URL", "http://localhost:8000")
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"}
+ENDPOINTS = ("analyze", "batch", "similarity")
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    return round(float(np.percentile(values, q)), 2) if values else None
+
+def load_corpus(images_dir: Optional[Path], synthetic_count: int) -> List[Dict[str, Any]]:
+    """Images from a directory, or synthetic chip images when none is given"""
+    if images_dir:
+        files = sorted(path for path in images_dir.iterdir() if path.suffix.lower() in IMAGE_EXTENSIONS)
+        if not files:
+            raise SystemExit(f"No images found in {images_dir}")
+        return [
+            {"name": path.name, "data": path.read_bytes(),
+             "content_type": "image/png" if path.suffix.lower() == ".png" else "image/jpeg",
+             "text": None}
+            for path in files
+        ]
+    
+    sys.path.insert(0, str(BASE_DIR / "ai-service" / "benchmarks"))
+    from synthetic import generate_samples
+    return [
+        {"name": f"synthetic_{i:03d}.jpg", "data": sample["encoded"], "content_type": "image/jpeg",
+         "text": sample["text"]}
+        for i, sample in enumerate(generate_samples(synthetic_count, seed=7))
+    ]
+
+class LoadTester:
+    def __init__(self, args):
+        self.args = args
+        self.corpus = load_corpus(args.images, args.synthetic_images)
+        self.records: List[Dict[str, Any]] = []
+        self.in_flight = 0
+        self.start_time = datetime.now()
+        self.started = None
+    
+    def log(self, message, status="INFO"):
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        print(f"[{timestamp}] {status}: {message}", flush=True)
+    
+    def pick_endpoint(self) -> str:
+        if self.args.endpoint != "mix":
+            return self.args.endpoint
+        return random.choices(ENDPOINTS, weights=self.args.mix)[0]
+    
+    async def send(self, client: httpx.AsyncClient, endpoint: str, scheduled: float):
+        """
+        Send one request and record it
+        
+        Latency is measured from the scheduled send time, so in open-loop
+        mode time spent waiting behind a saturated server still counts
+        (no coordinated omission).
+        """
+        record = {"endpoint": endpoint, "offset_s": scheduled - self.started, "stage_timings": {}}
+        self.in_flight += 1
+        try:
+            if endpoint == "analyze":
+                image = random.choice(self.corpus)
+                response = await client.post(
+                    "/analyze",
+                    files={"image": (image["name"], image["data"], image["content_type"])},
+                    data={"inspection_id": f"load-{len(self.records)}", "ocr_engine_type": self.args.engine}
+                )
+                record["status"] = response.status_code
+                if response.status_code == 200:
+                    body = response.json()
+                    record["stage_timings"] = body.get("stage_timings", {})
+                    record["cached"] = body.get("cached", False)
+            elif endpoint == "batch":
+                images = random.sample(self.corpus, min(self.args.batch_size, len(self.corpus)))
+                response = await client.post(
+                    "/analyze/batch",
+                    files=[("images", (image["name"], image["data"], image["content_type"])) for image in images],
+                    data={"ocr_engine_type": self.args.engine}
+                )
+                record["status"] = response.status_code
+                if response.status_code == 200:
+                    # NDJSON: one line per image, then a summary line
+                    timings: Dict[str, List[float]] = {}
+                    failed = 0
+                    for line in response.text.splitlines():
+                        item = json.loads(line)
+                        if "error" in item:
+                            failed += 1
+                        for stage, ms in item.get("result", {}).get("stage_timings", {}).items():
+                            timings.setdefault(stage, []).append(ms)
+                    record["stage_timings"] = {stage: float(np.mean(values)) for stage, values in timings.items()}
+                    record["batch_failures"] = failed
+            else:
+                text = random.choice(self.corpus)["text"] or "STM32F103C8T6"
+                response = await client.post(
+                    "/similarity",
+                    data={"text1": text, "text2": text.replace("0", "O"), "method": "rapidfuzz"}
+                )
+                record["status"] = response.status_code
+        except httpx.TimeoutException:
+            record["status"] = "timeout"
+        except httpx.HTTPError as e:
+            record["status"] = f"error: {type(e).__name__}"
+        finally:
+            self.in_flight -= 1
+        
+        record["latency_ms"] = (time.perf_counter() - scheduled) * 1000.0
+        self.records.append(record)
+    
+    async def run_open_loop(self, client: httpx.AsyncClient):
+        """Poisson arrivals at --rate per second, independent of response times"""
+        tasks = []
+        deadline = self.started + self.args.duration
+        next_arrival = self.started
+        
+        while next_arrival < deadline:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            
+            endpoint = self.pick_endpoint()
+            if self.in_flight >= self.args.max_in_flight:
+                # Client-side cap so a stalled server cannot exhaust local sockets
+                self.records.append({"endpoint": endpoint, "offset_s": next_arrival - self.started,
+                                     "status": "dropped", "latency_ms": None, "stage_timings": {}})
+            else:
+                tasks.append(asyncio.create_task(self.send(client, endpoint, next_arrival)))
+            next_arrival += random.expovariate(self.args.rate)
+        
+        await asyncio.gather(*tasks)
+    
+    async def run_closed_loop(self, client: httpx.AsyncClient):
+        """--concurrency users, each sending its next request as soon as the last one returns"""
+        deadline = self.started + self.args.duration
+        
+        async def _user():
+            while time.perf_counter() < deadline:
+                await self.send(client, self.pick_endpoint(), time.perf_counter())
+        
+        await asyncio.gather(*[_user() for _ in range(self.args.concurrency)])
+    
+    async def run(self):
+        mode = f"open loop at {self.args.rate}/s" if self.args.rate else f"closed loop with {self.args.concurrency} users"
+        self.log(f"Load testing {self.args.url} ({self.args.endpoint}, {mode}, {self.args.duration}s, "
+                 f"{len(self.corpus)} images)")
+        
+        limits = httpx.Limits(max_connections=self.args.max_in_flight, max_keepalive_connections=self.args.max_in_flight)
+        async with httpx.AsyncClient(base_url=self.args.url, timeout=self.args.timeout, limits=limits) as client:
+            try:
+                response = await client.get("/health")
+                self.log(f"AI service health: {response.json().get('status', 'unknown')}")
+            except httpx.HTTPError as e:
+                raise SystemExit(f"❌ AI service not reachable at {self.args.url}: {e}")
+            
+            self.started = time.perf_counter()
+            progress = asyncio.create_task(self.report_progress())
+            try:
+                if self.args.rate:
+                    await self.run_open_loop(client)
+                else:
+                    await self.run_closed_loop(client)
+            finally:
+                progress.cancel()
+    
+    async def report_progress(self):
+        while True:
+            await asyncio.sleep(self.args.interval)
+            window = [r for r in self.records if r["offset_s"] >= time.perf_counter() - self.started - self.args.interval]
+            ok = [r["latency_ms"] for r in window if r["status"] == 200]
+            self.log(f"{len(window) / self.args.interval:6.1f} req/s  p95 {percentile(ok, 95) or 0:8.1f}ms  "
+                     f"errors {len(window) - len(ok):4d}  in flight {self.in_flight}")
+    
+    def summarize(self, records: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+        ok = [r for r in records if r["status"] == 200]
+        latencies = [r["latency_ms"] for r in ok]
+        errors: Dict[str, int] = {}
+        for r in records:
+            if r["status"] != 200:
+                errors[str(r["status"])] = errors.get(str(r["status"]), 0) + 1
+        
+        stages: Dict[str, List[float]] = {}
+        for r in ok:
+            for stage, ms in r.get("stage_timings", {}).items():
+                stages.setdefault(stage, []).append(ms)
+        
+        return {
+            "requests": len(records),
+            "successful": len(ok),
+            "error_rate": round((len(records) - len(ok)) / len(records), 4) if records else 0.0,
+            "errors": errors,
+            "throughput_per_s": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "max": round(max(latencies), 2) if latencies else None
+            },
+            "stage_timings_ms": {
+                stage: {"p50": percentile(values, 50), "p95": percentile(values, 95)}
+                for stage, values in sorted(stages.items())
+            }
+        }
+    
+    def generate_report(self):
+        """Print the summary and save it, with per-interval windows, as JSON"""
+        end_time = datetime.now()
+        # Includes draining the last responses; shorter if interrupted
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        
+        overall = self.summarize(self.records, elapsed)
+        by_endpoint = {
+            endpoint: self.summarize([r for r in self.records if r["endpoint"] == endpoint], elapsed)
+            for endpoint in ENDPOINTS
+            if any(r["endpoint"] == endpoint for r in self.records)
+        }
+        
+        # Time series: where throughput flattens while latency climbs is the saturation point
+        windows = []
+        interval = self.args.interval
+        for start in np.arange(0, max(elapsed, interval), interval):
+            window = [r for r in self.records if start <= r["offset_s"] < start + interval]
+            windows.append({"start_s": float(start), **self.summarize(window, interval)})
+        
+        print("\n" + "="*80)
+        print("MARKSURE AI SERVICE - LOAD TEST REPORT")
+        print("="*80)
+        print(f"Target: {self.args.url}")
+        print(f"Mode: {'open loop, ' + str(self.args.rate) + ' req/s' if self.args.rate else 'closed loop, ' + str(self.args.concurrency) + ' users'}")
+        print(f"Duration: {elapsed:.0f} seconds")
+        print(f"Requests: {overall['requests']} ({overall['successful']} successful)")
+        print(f"Throughput: {overall['throughput_per_s']} req/s")
+        print(f"Error rate: {overall['error_rate'] * 100:.2f}%")
+        
+        print("\n" + "-"*80)
+        print(f"{'endpoint':<12} {'req':>7} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'errors':>8}")
+        print("-"*80)
+        for endpoint, summary in by_endpoint.items():
+            latency = summary["latency_ms"]
+            print(f"{endpoint:<12} {summary['requests']:>7} {summary['throughput_per_s']:>8} "
+                  f"{latency['p50'] or '-':>9} {latency['p95'] or '-':>9} {latency['p99'] or '-':>9} "
+                  f"{latency['max'] or '-':>9} {summary['error_rate'] * 100:>7.1f}%")
+        
+        if overall["stage_timings_ms"]:
+            print("\n" + "-"*80)
+            print("SERVER-SIDE STAGE TIMINGS (ms):")
+            print("-"*80)
+            for stage, values in overall["stage_timings_ms"].items():
+                print(f"{stage:<40} p50 {values['p50']:>9}  p95 {values['p95']:>9}")
+        
+        print("\n" + "="*80)
+        
+        report_file = self.args.report
+        with open(report_file, 'w') as f:
+            json.dump({
+                'timestamp': end_time.isoformat(),
+                'duration': elapsed,
+                'config': {
+                    'url': self.args.url,
+                    'endpoint': self.args.endpoint,
+                    'rate': self.args.rate,
+                    'concurrency': None if self.args.rate else self.args.concurrency,
+                    'engine': self.args.engine,
+                    'batch_size': self.args.batch_size,
+                    'images': len(self.corpus)
+                },
+                'summary': overall,
+                'endpoints': by_endpoint,
+                'timeline': windows
+            }, f, indent=2)
+        
+        print(f"📋 Detailed report saved to: {report_file}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the MarkSure AI service")
+    parser.add_argument("--url", default=AI_SERVICE_URL)
+    parser.add_argument("--endpoint", choices=ENDPOINTS + ("mix",), default="analyze")
+    parser.add_argument("--mix", default="8,1,1", help="analyze,batch,similarity weights for --endpoint mix")
+    parser.add_argument("--rate", type=float, default=None, help="Open loop: requests per second (Poisson arrivals)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Closed loop: concurrent users (ignored with --rate)")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to generate load")
+    parser.add_argument("--interval", type=float, default=5, help="Seconds per timeline window")
+    parser.add_argument("--images", type=Path, default=None, help="Directory of images (default: synthetic chips)")
+    parser.add_argument("--synthetic-images", type=int, default=16)
+    parser.add_argument("--engine", default="easyocr", help="ocr_engine_type sent to /analyze")
+    parser.add_argument("--batch-size", type=int, default=8, help="Images per /analyze/batch request")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--report", type=Path, default=BASE_DIR / "load_test_report.json")
+    args = parser.parse_args()
+    args.mix = [float(weight) for weight in args.mix.split(",")]
+    if len(args.mix) != len(ENDPOINTS):
+        parser.error("--mix needs one weight per endpoint: analyze,batch,similarity")
+    return args
+
+def main():
+    print("🔍 MARKSURE AI SERVICE - LOAD TEST")
+    print("="*60)
+    
+    tester = LoadTester(parse_args())
+    
+    try:
+        asyncio.run(tester.run())
+    except KeyboardInterrupt:
+        tester.log("Interrupted, reporting partial results", "WARN")
+    
+    # Generate report
+    tester.generate_report()
+
+if __name__ == "__main__":
+    main()